@@ -1,76 +1,261 @@
 import os
+import json
+import time
+import random
+import hashlib
+import threading
+import weakref
 import torch
+from contextlib import contextmanager
+from typing import Dict, Optional
 from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
 from peft import PeftModel  # ★ 추가된 라이브러리
+from app.core.cpu_tuning import resolve_cpu_mode, cpu_load_dtype, configure_cpu_threads, apply_cpu_optimizations
 
 # 전역 변수 (싱글톤 패턴)
 _model = None
 _processor = None
 _device = "cpu"
+_cpu_mode = None
+_adapters: Dict[str, Optional[str]] = {}  # 로드된 어댑터 이름 -> 어댑터 해시 (None: 기본 모델만)
+_adapter_split: Dict[str, float] = {}
+_adapter_lock = threading.Lock()
+_rope_locks: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # 모델 -> rope_deltas 구간 락
+_rope_locks_lock = threading.Lock()  # _rope_locks 조회/생성 전용 (use_adapter가 잡은 _adapter_lock과 분리)
+
+BASE_MODEL_ID = "Qwen/Qwen2.5-VL-3B-Instruct"
+# 경로: 프로젝트 루트 기준 (./models/food_adapter_v1.0)
+ADAPTER_PATH = os.getenv("VISION_ADAPTER_PATH", os.path.join(os.getcwd(), "models", "food_adapter_v1.0"))
+# 어댑터를 미리 병합해 둔 체크포인트 (scripts/merge_adapter.py로 생성)
+MERGED_MODEL_PATH = os.getenv("VISION_MERGED_MODEL_PATH", os.path.join(os.getcwd(), "models", "merged", "food_adapter_v1.0"))
+MERGE_MANIFEST = "merge_manifest.json"
+ADAPTER_HASH_FILES = ("adapter_config.json", "adapter_model.safetensors", "adapter_model.bin")
+# 다중 어댑터 서빙: "v1.0=models/food_adapter_v1.0,v1.1=models/food_adapter_v1.1"
+# 비어 있으면 ADAPTER_PATH 하나만 로드 (첫 번째 항목이 기본 어댑터)
+VISION_ADAPTERS = os.getenv("VISION_ADAPTERS", "")
+# 어댑터 미지정 요청의 A/B 분배 비율: "v1.0=90,v1.1=10" (비어 있으면 항상 기본 어댑터)
+VISION_ADAPTER_SPLIT = os.getenv("VISION_ADAPTER_SPLIT", "")
+# 장치 강제 지정 (cuda | mps | cpu). 비어 있으면 자동 감지
+VISION_DEVICE = os.getenv("VISION_DEVICE", "").lower()
 
 def get_device_and_dtype():
     """
     현재 실행 중인 컴퓨터의 하드웨어를 감지하여 
     최적의 장치(device)와 데이터 타입(dtype)을 반환합니다.
     """
+    # 0순위: 환경변수로 CPU 강제 지정 (CPU 전용 노드, 벤치마크 등)
+    force_cpu = VISION_DEVICE == "cpu"
+
     # 1순위: NVIDIA GPU (CUDA) - Windows/Linux
-    if torch.cuda.is_available():
+    if not force_cpu and torch.cuda.is_available():
         print("✅ 하드웨어 감지: NVIDIA GPU (CUDA)")
         return "cuda", torch.float16
     
     # 2순위: Apple Silicon (MPS) - Mac M1/M2/M3
-    elif torch.backends.mps.is_available():
+    elif not force_cpu and torch.backends.mps.is_available():
         print("✅ 하드웨어 감지: Apple Silicon (MPS)")
         return "mps", torch.float16
     
     # 3순위: CPU (Fallback) - GPU가 없는 서버 등
+    print("⚠️ 하드웨어 감지: GPU 없음 (CPU 사용)")
+    mode = resolve_cpu_mode()
+    if mode == "fp32":
+        print("   -> CPU는 속도가 느리며, 호환성을 위해 FP32를 사용합니다. (VISION_CPU_MODE=int8|bf16 권장)")
+    else:
+        print(f"   -> CPU 최적화 모드: {mode}")
+    return "cpu", cpu_load_dtype(mode)
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    """로딩 단계별 소요 시간 측정"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
+
+def _print_timings(timings: dict):
+    total = sum(timings.values())
+    print(f"⏱️ 모델 로딩 단계별 소요 시간 (총 {total:.2f}s)")
+    for name, elapsed in timings.items():
+        print(f"   - {name}: {elapsed:.2f}s")
+
+def adapter_fingerprint(adapter_path: str) -> str:
+    """어댑터 설정(+가중치) 파일의 SHA-256. 병합 체크포인트가 어떤 어댑터로 만들어졌는지 검증할 때 사용합니다."""
+    hasher = hashlib.sha256()
+    for filename in ADAPTER_HASH_FILES:
+        path = os.path.join(adapter_path, filename)
+        if not os.path.exists(path):
+            continue
+        hasher.update(filename.encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+def merge_adapter(adapter_path: str = ADAPTER_PATH, output_dir: str = MERGED_MODEL_PATH, dtype=None) -> str:
+    """
+    [빌드 단계] LoRA 어댑터를 기본 가중치에 병합하여 safetensors 체크포인트로 저장합니다.
+    저장 폴더에는 어댑터 해시가 담긴 merge_manifest.json이 함께 기록됩니다.
+    """
+    if not os.path.exists(os.path.join(adapter_path, "adapter_config.json")):
+        raise FileNotFoundError(f"어댑터 설정을 찾을 수 없습니다: {adapter_path}")
+    dtype = dtype or torch.float16
+
+    print(f"🧩 어댑터 병합 시작: {adapter_path} -> {output_dir}")
+    base_model = Qwen2_5_VLForConditionalGeneration.from_pretrained(BASE_MODEL_ID, torch_dtype=dtype, device_map=None)
+    merged = PeftModel.from_pretrained(base_model, adapter_path, torch_dtype=dtype).merge_and_unload()
+    merged.save_pretrained(output_dir, safe_serialization=True)
+    AutoProcessor.from_pretrained(BASE_MODEL_ID).save_pretrained(output_dir)
+
+    manifest = {
+        "base_model": BASE_MODEL_ID,
+        "adapter_path": os.path.relpath(adapter_path),
+        "adapter_sha256": adapter_fingerprint(adapter_path),
+        "torch_dtype": str(dtype).replace("torch.", ""),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(output_dir, MERGE_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"✅ 병합 체크포인트 저장 완료 (adapter_sha256={manifest['adapter_sha256'][:12]})")
+    return output_dir
+
+def _merged_checkpoint_is_valid(merged_path: str, adapter_path: str) -> bool:
+    """
+    병합 체크포인트가 존재하고, 현재 어댑터와 같은 해시로 만들어졌는지 확인
+    어댑터 폴더가 없으면 비교할 대상이 없으므로 경고를 남기고 병합 체크포인트를 검증 없이 사용
+    (어댑터 없이 병합 체크포인트만 배포하는 경우)
+    """
+    manifest_path = os.path.join(merged_path, MERGE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not os.path.exists(adapter_path):
+        print(f"⚠️ 어댑터 폴더({adapter_path})가 없어 병합 체크포인트를 검증 없이 사용합니다. "
+              f"(빌드 당시 어댑터 해시: {manifest.get('adapter_sha256') or '기록 없음'})")
+        return True
+    if manifest.get("adapter_sha256") != adapter_fingerprint(adapter_path):
+        print(f"⚠️ 병합 체크포인트의 어댑터 해시가 현재 어댑터와 다릅니다. 다시 빌드하세요. ({merged_path})")
+        return False
+    return True
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    """"a=1,b=2" -> {"a": "1", "b": "2"}"""
+    pairs = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            if name.strip() and value.strip():
+                pairs[name.strip()] = value.strip()
+    return pairs
+
+def adapter_specs() -> Dict[str, str]:
+    """등록할 어댑터 {이름: 경로}. VISION_ADAPTERS가 없으면 ADAPTER_PATH (폴더명이 이름)"""
+    specs = _parse_pairs(VISION_ADAPTERS)
+    if not specs:
+        return {os.path.basename(ADAPTER_PATH.rstrip(os.sep)): ADAPTER_PATH}
+    return {name: path if os.path.isabs(path) else os.path.join(os.getcwd(), path) for name, path in specs.items()}
+
+def _attach_adapters(base_model, adapters: Dict[str, str], dtype, timings: dict):
+    """기본 모델 하나에 LoRA 어댑터들을 이름별로 등록합니다. (가중치는 어댑터 크기만큼만 추가)"""
+    global _adapters
+    model = base_model
+    for name, path in adapters.items():
+        if not os.path.exists(path):
+            print(f"⚠️ 경고: 어댑터 폴더를 찾을 수 없습니다! ({name}: {path})")
+            continue
+        print(f"🧩 학습된 어댑터 합체 중... ({name}: {path})")
+        with _stage(timings, f"attach_adapter[{name}]"):
+            if isinstance(model, PeftModel):
+                model.load_adapter(path, adapter_name=name)
+            else:
+                model = PeftModel.from_pretrained(base_model, path, adapter_name=name, torch_dtype=dtype)
+        _adapters[name] = adapter_fingerprint(path)
+
+    if not _adapters:
+        print("   -> 기본 모델로만 동작합니다.")
+        _adapters["base"] = None
+    elif len(_adapters) == 1:
+        print("   -> (팁) `python -m scripts.merge_adapter`로 병합 체크포인트를 만들면 시작/추론이 빨라집니다.")
     else:
-        print("⚠️ 하드웨어 감지: GPU 없음 (CPU 사용)")
-        print("   -> CPU는 속도가 느리며, 호환성을 위해 FP32를 사용합니다.")
-        return "cpu", torch.float32
+        model.set_adapter(next(iter(_adapters)))
+        print(f"✅ 다중 어댑터 등록 완료: {', '.join(_adapters)} (기본: {next(iter(_adapters))})")
+    return model
 
 def load_model():
     """서버 시작 시 AI 모델을 로드합니다."""
-    global _model, _processor, _device
+    global _model, _processor, _device, _cpu_mode, _adapter_split
+    timings = {}
     
     # 1. 환경 감지
-    device, dtype = get_device_and_dtype()
+    with _stage(timings, "device_detect"):
+        device, dtype = get_device_and_dtype()
+        if device == "cpu":
+            _cpu_mode = resolve_cpu_mode()
+            configure_cpu_threads()
     _device = device
     
-    print(f"🔄 기본 Qwen 모델 로딩 중... (Target: {device.upper()})")
-    
     try:
-        # 1. 기본 모델 로드 (인터넷에서 다운로드 or 캐시 사용)
-        base_model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
-            "Qwen/Qwen2.5-VL-3B-Instruct",
-            torch_dtype=dtype,
-            # Mac(MPS)에서는 device_map="auto"가 불안정할 수 있어 수동 이동 추천
-            device_map=None 
-        )
-        
-        # 2. ★ 핵심! 우리가 만든 어댑터(LoRA) 장착
-        # 경로: 프로젝트 루트 기준 (./models/food_adapter)
-        adapter_path = os.path.join(os.getcwd(), "models", "food_adapter_v1.0")
-        
-        if os.path.exists(adapter_path):
-            print(f"🧩 학습된 어댑터 합체 중... ({adapter_path})")
-            _model = PeftModel.from_pretrained(
-                base_model, 
-                adapter_path,
-                torch_dtype=dtype
-            )
+        adapters = adapter_specs()
+        _adapters.clear()
+        adapter_name, adapter_path = next(iter(adapters.items()))
+
+        if len(adapters) == 1 and _merged_checkpoint_is_valid(MERGED_MODEL_PATH, adapter_path):
+            # 1-A. 빠른 경로: 미리 병합된 체크포인트를 바로 로드 (safetensors 메모리 매핑)
+            print(f"🔄 병합된 Qwen 모델 로딩 중... ({MERGED_MODEL_PATH}, Target: {device.upper()})")
+            with _stage(timings, "load_merged_weights"):
+                _model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
+                    MERGED_MODEL_PATH,
+                    torch_dtype=dtype,
+                    use_safetensors=True,
+                    low_cpu_mem_usage=True,
+                    device_map=None
+                )
+            _adapters[adapter_name] = adapter_fingerprint(adapter_path) if os.path.exists(adapter_path) else None
+            processor_source = MERGED_MODEL_PATH
         else:
-            print(f"⚠️ 경고: 어댑터 폴더를 찾을 수 없습니다! ({adapter_path})")
-            print("   -> 기본 모델로만 동작합니다.")
-            _model = base_model
+            print(f"🔄 기본 Qwen 모델 로딩 중... (Target: {device.upper()})")
+            # 1-B. 기본 모델 로드 (인터넷에서 다운로드 or 캐시 사용)
+            with _stage(timings, "load_base_weights"):
+                base_model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
+                    BASE_MODEL_ID,
+                    torch_dtype=dtype,
+                    # Mac(MPS)에서는 device_map="auto"가 불안정할 수 있어 수동 이동 추천
+                    device_map=None 
+                )
+            
+            # 2. ★ 핵심! 우리가 만든 어댑터(LoRA) 장착 (여러 개면 기본 모델 하나를 공유)
+            _model = _attach_adapters(base_model, adapters, dtype, timings)
+            processor_source = BASE_MODEL_ID
+
+        # 2-1. 어댑터 미지정 요청의 A/B 분배 비율 (로드된 어댑터만)
+        _adapter_split = {
+            name: float(weight) for name, weight in _parse_pairs(VISION_ADAPTER_SPLIT).items()
+            if name in _adapters and float(weight) > 0
+        }
+        if _adapter_split:
+            print(f"🔀 어댑터 A/B 분배: {_adapter_split}")
 
         # 3. 모델을 장치(MPS/GPU)로 이동
-        _model.to(device)
-        _model.eval() # 추론 모드 전환
+        with _stage(timings, "move_to_device"):
+            _model.to(device)
+            _model.eval() # 추론 모드 전환
+
+        # 3-1. CPU 전용 최적화 (int8 동적 양자화 등)
+        if device == "cpu" and _cpu_mode == "int8":
+            if isinstance(_model, PeftModel):
+                print("⚠️ LoRA 어댑터가 병합되지 않은 상태에서 양자화합니다. 병합 체크포인트 사용을 권장합니다.")
+            with _stage(timings, "cpu_quantize"):
+                _model = apply_cpu_optimizations(_model, _cpu_mode)
 
         # 4. 프로세서 로드
-        _processor = AutoProcessor.from_pretrained("Qwen/Qwen2.5-VL-3B-Instruct")
+        with _stage(timings, "load_processor"):
+            _processor = AutoProcessor.from_pretrained(processor_source)
+        # 배치 generate를 위해 왼쪽 패딩 사용 (디코더 모델은 오른쪽 패딩 시 생성이 깨짐)
+        _processor.tokenizer.padding_side = "left"
         
+        _print_timings(timings)
         print("✅ AI 모델(LoRA) 로딩 완료! 준비 끝!")
         
     except Exception as e:
@@ -81,4 +266,54 @@ def get_model_instance():
     """서비스 계층에서 모델을 호출할 때 사용합니다."""
     if _model is None or _processor is None:
         raise RuntimeError("AI 모델이 아직 로드되지 않았습니다. 서버 실행 로그를 확인하세요.")
-    return _model, _processor, _device
\ No newline at end of file
+    return _model, _processor, _device
+
+def registered_adapters() -> Dict[str, Optional[str]]:
+    """로드된 어댑터 {이름: 어댑터 해시}. 첫 번째가 기본 어댑터입니다."""
+    return dict(_adapters)
+
+def resolve_adapter(requested: Optional[str] = None) -> str:
+    """요청에 지정된 어댑터를 검증하고, 미지정이면 A/B 분배 비율(없으면 기본 어댑터)로 선택합니다."""
+    if requested:
+        if requested not in _adapters:
+            raise ValueError(f"등록되지 않은 어댑터입니다: {requested} (사용 가능: {', '.join(_adapters)})")
+        return requested
+    if _adapter_split:
+        return random.choices(list(_adapter_split), weights=list(_adapter_split.values()))[0]
+    return next(iter(_adapters))
+
+@contextmanager
+def use_adapter(model, name: str):
+    """
+    name 어댑터를 활성화한 상태로 추론합니다.
+    어댑터가 여러 개일 때만 전환하며, 전환~추론 구간을 잠가 다른 스레드의 전환과 섞이지 않게 합니다.
+    """
+    if not isinstance(model, PeftModel) or len(model.peft_config) < 2:
+        yield
+        return
+    with _adapter_lock:
+        if model.active_adapter != name:
+            model.set_adapter(name)
+        yield
+
+def rope_deltas_owners(model) -> list:
+    """
+    Qwen2.5-VL의 mrope 위치 보정값(rope_deltas)을 보관하는 모듈 목록.
+    transformers/peft 버전에 따라 보관 위치가 달라, 직접 prefill/KV 캐시를 다룰 때 사용합니다.
+    """
+    return [module for module in model.modules() if "rope_deltas" in vars(module)]
+
+@contextmanager
+def rope_deltas_guard(model):
+    """
+    rope_deltas를 쓰고 읽는 구간(prefill -> generate / 라벨 점수화)을 모델 단위로 직렬화합니다.
+    rope_deltas는 모델 모듈에 저장되어 다음 forward(생성 스텝)에서 읽히므로, VISION_INFERENCE_CONCURRENCY>1로
+    같은 모델을 여러 스레드가 쓰면 서로의 mrope 위치를 덮어씁니다. 전처리/디코딩/파싱은 이 구간 밖에서 병렬로 실행됩니다.
+    재진입 가능 (RLock), 어댑터 전환(use_adapter) 안쪽에서 잡습니다. (_adapter_lock은 다시 잡지 않음)
+    """
+    with _rope_locks_lock:
+        lock = _rope_locks.get(model)
+        if lock is None:
+            lock = _rope_locks[model] = threading.RLock()
+    with lock:
+        yield
@@ -0,0 +1,85 @@
+# GPU 없는 서버용 CPU 추론 최적화
+# - 동적 int8 양자화 또는 (지원 CPU에서) bf16
+# - intra/inter-op 스레드 수 고정 및 워커별 CPU 코어 고정(affinity)
+
+import os
+import torch
+from functools import lru_cache
+
+# fp32(기본) | int8 | bf16 | auto(bf16 지원 시 bf16, 아니면 int8)
+VISION_CPU_MODE = os.getenv("VISION_CPU_MODE", "fp32").lower()
+VISION_CPU_THREADS = int(os.getenv("VISION_CPU_THREADS", "0"))  # 0이면 torch 기본값
+VISION_CPU_INTEROP_THREADS = int(os.getenv("VISION_CPU_INTEROP_THREADS", "0"))
+VISION_CPU_PIN = os.getenv("VISION_CPU_PIN", "0") == "1"
+VISION_WORKER_INDEX = int(os.getenv("VISION_WORKER_INDEX", "0"))
+
+CPU_MODES = ("fp32", "int8", "bf16", "auto")
+
+
+def cpu_supports_bf16() -> bool:
+    """CPU가 bf16 연산(AVX512_BF16 / AMX)을 하드웨어로 지원하는지 확인"""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        # /proc/cpuinfo가 없는 환경(macOS 등)은 보수적으로 미지원 처리
+        return False
+
+
+@lru_cache(maxsize=None)
+def resolve_cpu_mode(mode: str = VISION_CPU_MODE) -> str:
+    """설정값을 실제로 적용할 모드로 변환합니다. (bf16 미지원 CPU는 int8로 대체)"""
+    if mode not in CPU_MODES:
+        print(f"⚠️ 알 수 없는 VISION_CPU_MODE={mode} -> fp32 사용")
+        return "fp32"
+    if mode == "auto":
+        return "bf16" if cpu_supports_bf16() else "int8"
+    if mode == "bf16" and not cpu_supports_bf16():
+        print("⚠️ 이 CPU는 bf16을 지원하지 않습니다 -> int8 양자화로 대체합니다.")
+        return "int8"
+    return mode
+
+
+def cpu_load_dtype(mode: str):
+    """모드별 가중치 로드 dtype (int8은 fp32로 로드 후 양자화)"""
+    return torch.bfloat16 if mode == "bf16" else torch.float32
+
+
+def configure_cpu_threads(threads: int = VISION_CPU_THREADS, interop_threads: int = VISION_CPU_INTEROP_THREADS,
+                          pin: bool = VISION_CPU_PIN, worker_index: int = VISION_WORKER_INDEX) -> dict:
+    """
+    torch 스레드 수를 명시적으로 설정하고, 필요 시 워커별로 서로 다른 코어에 고정합니다.
+    (여러 워커가 같은 코어를 두고 경쟁하면 지연시간이 크게 흔들림)
+    """
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # inter-op 스레드 수는 병렬 작업이 시작되기 전에만 변경 가능
+            print(f"⚠️ inter-op 스레드 설정 실패 (무시): {e}")
+
+    pinned = None
+    if pin and threads > 0 and hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        start = (worker_index * threads) % len(cores)
+        pinned = [cores[(start + i) % len(cores)] for i in range(min(threads, len(cores)))]
+        os.sched_setaffinity(0, pinned)
+
+    info = {
+        "intra_op_threads": torch.get_num_threads(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "pinned_cores": pinned,
+    }
+    print(f"🧵 CPU 스레드 설정: {info}")
+    return info
+
+
+def apply_cpu_optimizations(model, mode: str):
+    """로드된 모델에 CPU 모드를 적용합니다. int8은 Linear 계층 동적 양자화."""
+    if mode == "int8":
+        print("🗜️ 동적 int8 양자화 적용 중 (nn.Linear)...")
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
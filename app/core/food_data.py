@@ -0,0 +1,120 @@
+# 영양 성분 CSV 데이터 정의 및 파싱 (벡터 DB 적재, 음식명 사전 등에서 공용)
+
+import os
+import csv
+import json
+import hashlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 파일별 매핑 설정 [파일경로, 헤더행인덱스, 인코딩, {필드명: 인덱스}]
+FOOD_CSV_FILES = [
+    {
+        "key": "general",
+        "path": "app/400_Food_DB.csv", "header_row": 0, "encoding": "utf-8",
+        "map": {"name": 0, "kcal": 2, "carb": 3, "sugar": 4, "fat": 5, "prot": 6, "sodium": 9},
+        "desc": "일반 음식"
+    },
+    {
+        "key": "processed",
+        "path": "app/50000_Food_DB.csv", "header_row": 3, "encoding": "utf-8", # utf-8로 읽히는지 재확인 필요하지만 get_columns 성공했으므로 utf-8
+        "map": {"name": 5, "kcal": 15, "carb": 21, "sugar": 22, "fat": 20, "prot": 19, "sodium": 45},
+        "desc": "가공 식품"
+    }
+]
+
+
+def safe_float(val: str) -> float:
+    try: return float(val.replace(',', ''))
+    except: return 0.0
+
+
+def build_page_content(meta: dict) -> str:
+    """검색용 텍스트 생성"""
+    return (f"음식명: {meta['name']}, 칼로리: {meta['calories']}kcal, "
+            f"탄수: {meta['carbohydrate']}g, 단백: {meta['protein']}g, "
+            f"지방: {meta['fat']}g, 당류: {meta['sugar']}g")
+
+
+def iter_food_rows(sources: Optional[Sequence[str]] = None,
+                   status: Optional[Dict[str, bool]] = None) -> Iterator[Tuple[dict, dict]]:
+    """
+    CSV를 한 행씩 스트리밍으로 읽어 (파일설정, 메타데이터) 튜플을 생성합니다.
+    sources: 읽을 파일 key 목록 (None이면 전체)
+    status: 넘기면 파일 key별로 끝까지 읽었는지 기록 (파일 없음/읽기 실패는 False)
+            -> 빈 파일과 읽지 못한 파일을 구분해야 하는 호출자(동기화의 삭제 단계)용
+    """
+    for config in FOOD_CSV_FILES:
+        if sources is not None and config["key"] not in sources:
+            continue
+        fpath = config["path"]
+        if status is not None:
+            status[config["key"]] = False
+        if not os.path.exists(fpath):
+            print(f"⚠️ 파일 없음: {fpath}")
+            continue
+
+        try:
+            with open(fpath, 'r', encoding=config["encoding"]) as csvfile:
+                reader = csv.reader(csvfile)
+                # 헤더 건너뛰기
+                for _ in range(config["header_row"] + 1):
+                    next(reader)
+
+                m = config["map"]
+                for row in reader:
+                    # 인덱스 접근 안전 장치
+                    if len(row) <= max(m.values()): continue
+
+                    name = row[m["name"]].strip()
+                    if not name: continue
+
+                    yield config, {
+                        "name": name,
+                        "calories": safe_float(row[m["kcal"]]),
+                        "carbohydrate": safe_float(row[m["carb"]]),
+                        "sugar": safe_float(row[m["sugar"]]),
+                        "fat": safe_float(row[m["fat"]]),
+                        "protein": safe_float(row[m["prot"]]),
+                        "sodium": safe_float(row[m["sodium"]])
+                    }
+            if status is not None:
+                status[config["key"]] = True
+        except Exception as e:
+            print(f"❌ {fpath} 로드 실패: {e}")
+
+
+def content_hash(meta: dict) -> str:
+    """행 내용(영양 성분 + 검색 텍스트) 해시. 값이 바뀐 행만 다시 임베딩할 때 비교합니다."""
+    fields = {k: v for k, v in meta.items() if k not in ("row_id", "content_hash")}
+    payload = json.dumps(fields, ensure_ascii=False, sort_keys=True) + build_page_content(meta)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def iter_food_records(sources: Optional[Sequence[str]] = None,
+                      status: Optional[Dict[str, bool]] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    iter_food_rows + 안정적인 행 ID와 내용 해시. (row_id, 메타데이터) 튜플을 생성합니다.
+    row_id = "{파일 key}:{음식명}#{같은 파일 내 같은 이름의 등장 순번}" -> CSV가 그대로면 재적재해도 같은 ID
+    status: iter_food_rows와 같음 (파일별 완독 여부)
+    """
+    occurrences = {}
+    for config, meta in iter_food_rows(sources, status):
+        key = (config["key"], meta["name"])
+        occurrences[key] = occurrences.get(key, 0) + 1
+        row_id = f"{config['key']}:{meta['name']}#{occurrences[key]}"
+        meta = {**meta, "source": config["key"], "row_id": row_id}
+        meta["content_hash"] = content_hash(meta)
+        yield row_id, meta
+
+
+def load_food_names(sources: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> List[str]:
+    """CSV에 등장하는 음식명을 (중복 제거, 파일 순서 유지) 반환합니다."""
+    names, seen = [], set()
+    for _, meta in iter_food_rows(sources):
+        if meta["name"] in seen:
+            continue
+        seen.add(meta["name"])
+        names.append(meta["name"])
+        if limit is not None and len(names) >= limit:
+            break
+    return names
@@ -0,0 +1,92 @@
+# 모델 추론 전용 실행기 (이벤트 루프 블로킹 방지)
+# generate/batch_decode 같은 동기 연산을 별도 스레드 풀에서 실행하고,
+# 대기열이 가득 차면 즉시 거절(429)하여 과부하가 전체 서버로 번지지 않게 합니다.
+
+import os
+import math
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# 2 이상이면 전처리/디코딩은 겹쳐 실행되지만, 같은 모델의 forward(prefill~generate)는 rope_deltas_guard로 직렬화됩니다.
+VISION_INFERENCE_CONCURRENCY = int(os.getenv("VISION_INFERENCE_CONCURRENCY", "1"))
+VISION_MAX_QUEUE = int(os.getenv("VISION_MAX_QUEUE", "32"))
+
+
+class InferenceQueueFullError(Exception):
+    """추론 대기열이 가득 찼을 때 발생합니다. retry_after(초) 후 재시도를 권장합니다."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"추론 대기열이 가득 찼습니다. {retry_after}초 후 다시 시도하세요.")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    동시 실행 수(max_workers)와 대기열 길이(max_queue)가 제한된 추론 실행기.
+    pending 카운터는 이벤트 루프 스레드에서만 변경되므로 별도 락이 필요 없습니다.
+    """
+
+    def __init__(self, max_workers: int = VISION_INFERENCE_CONCURRENCY, max_queue: int = VISION_MAX_QUEUE, name: str = "inference"):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._avg_latency = 0.0  # 작업 1건 처리시간 지수이동평균(초)
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def retry_after(self, backlog: int = None) -> int:
+        """현재 대기열이 비워질 때까지의 예상 시간(초)"""
+        backlog = self._pending if backlog is None else backlog
+        estimate = self._avg_latency * backlog / self.max_workers
+        return max(1, math.ceil(estimate))
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """fn(*args)를 워커 스레드에서 실행합니다. 대기열 초과 시 InferenceQueueFullError."""
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise InferenceQueueFullError(self.retry_after())
+
+        def _timed():
+            # 스레드 풀 대기시간을 제외한 실제 처리시간만 측정
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._avg_latency = elapsed if not self.completed else 0.8 * self._avg_latency + 0.2 * elapsed
+                self.completed += 1
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, _timed)
+        finally:
+            self._pending -= 1
+
+    async def run_with_model(self, fn: Callable, *args) -> Any:
+        """fn(model, processor, device, *args) 형태로 로드된 모델과 함께 실행합니다."""
+        from app.core.ai_model import get_model_instance  # torch 의존성은 실제 추론 시점에 로드
+
+        def _call():
+            model, processor, device = get_model_instance()
+            return fn(model, processor, device, *args)
+        return await self.run(_call)
+
+    def snapshot(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self._avg_latency * 1000, 2),
+        }
+
+
+inference_executor = InferenceExecutor()
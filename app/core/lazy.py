@@ -0,0 +1,41 @@
+# 무거운 싱글톤(Chroma/OpenAI 클라이언트, LangChain 에이전트 등)의 지연 생성
+
+import threading
+from typing import Any, Callable
+
+
+class LazyProxy:
+    """
+    처음 속성에 접근할 때 factory()로 실제 객체를 만들고, 이후 모든 속성 접근을 그 객체로 넘깁니다.
+    모듈 import 시점에는 아무것도 생성하지 않으므로 서버 시작(cold start)이 빨라집니다.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "object"))
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, key: str, value: Any):
+        setattr(self._resolve(), key, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "lazy"
+        return f"<LazyProxy {object.__getattribute__(self, '_name')} ({state})>"
@@ -0,0 +1,51 @@
+# 서버 구성요소별 준비 상태 (시작 단계 병렬 실행 + /ready 응답)
+
+import time
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class Readiness:
+    """
+    구성요소(vision, food_index, tool_index 등)마다 상태와 소요 시간을 기록합니다.
+    run()은 동기 초기화 함수를 스레드 풀에서 실행하므로 여러 단계가 동시에 진행되고 이벤트 루프는 막히지 않습니다.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, dict] = {}
+
+    def register(self, name: str):
+        self._components.setdefault(name, {"status": PENDING, "elapsed_s": None, "error": None})
+
+    def set_status(self, name: str, status: str, error: Optional[str] = None):
+        self.register(name)
+        self._components[name].update(status=status, error=error)
+
+    async def run(self, name: str, fn: Callable, *args) -> Any:
+        """fn(*args)를 워커 스레드에서 실행하고 결과에 따라 ready/failed로 표시합니다. (예외는 전파하지 않음)"""
+        self.set_status(name, LOADING)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        except Exception as e:
+            self.set_status(name, FAILED, error=str(e))
+            print(f"❌ [{name}] 초기화 실패: {e}")
+            return None
+        finally:
+            self._components[name]["elapsed_s"] = round(time.perf_counter() - started, 2)
+        self.set_status(name, READY)
+        print(f"✅ [{name}] 준비 완료 ({self._components[name]['elapsed_s']}s)")
+        return result
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        if name is not None:
+            return self._components.get(name, {}).get("status") == READY
+        return bool(self._components) and all(c["status"] == READY for c in self._components.values())
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: dict(component) for name, component in self._components.items()}
+
+
+readiness = Readiness()
@@ -0,0 +1,8 @@
+# 배포 구성 (import 비용이 없는 설정만 두는 모듈)
+
+import os
+
+# local: 이 프로세스에서 비전 모델 로드 | remote: 별도 추론 서버(들)에 요청
+# none: 비전 API 비활성화 (lite 모드, /ai/* 상담 API만 제공하며 torch/transformers를 import하지 않음)
+VISION_BACKEND = os.getenv("VISION_BACKEND", "local").lower()
+LITE_MODE = VISION_BACKEND == "none"
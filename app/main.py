@@ -1,13 +1,13 @@
 import asyncio
 from fastapi import FastAPI, Depends, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # 환경변수 로드 (DB 연결 전 필수)
 load_dotenv()
-from app.core.ai_model import load_model
-from app.routers import vision
+from app.core.readiness import readiness
+from app.core.settings import VISION_BACKEND, LITE_MODE
 from app.schemas.dtos import PeriodFeedbackRequest, RecommendRequest, ChatRequest, MealPlanRequest
 from app.services.agent import coach
 from app.services.vector_store import tool_store
@@ -45,22 +45,32 @@ async def lifespan(app: FastAPI):
     print("🚀 MatchMeal AI 서버 시작 중...")
     
     async def initialize_data():
-        try:
-            print("🔍 AI 모델 로딩 시도...")
-            load_model()
-            print("✅ AI 모델 로딩 완료 (RAG 모드)")
-            
-            print("💾 벡터 데이터베이스 데이터 로딩 및 인덱싱 시작 (백그라운드)...")
-            from app.services.vector_store import food_store
-            food_store.load_from_csvs()
-            print("✅ 벡터 데이터베이스 준비 완료")
-            
-            print("🛠️ 도구 인덱싱 중...")
-            tool_store.index_tools(coach.all_tools)
-            print("✅ 도구 인덱싱 완료")
+        # 각 단계는 동기 작업이므로 스레드 풀에서 동시에 실행 (그동안 이벤트 루프는 계속 요청에 응답)
+        from app.services.vector_store import food_store
+        stages = [
+            # 싱글톤 생성(Chroma/OpenAI 클라이언트)도 워커 스레드에서 일어나도록 lambda로 감쌈
+            readiness.run("food_index", lambda: food_store.initialize()),
+            readiness.run("tool_index", lambda: tool_store.index_tools(coach.all_tools)),
+        ]
+        if LITE_MODE:
+            print("🪶 lite 모드: 비전 API 없이 상담(/ai/*) API만 제공합니다.")
+        elif VISION_BACKEND == "remote":
+            # 모델은 별도 추론 서버(scripts/vision_server.py)가 소유 -> API 워커는 로드하지 않음
+            from app.services.vision_remote import VISION_REMOTE_SOCKETS
+            print(f"🔗 원격 비전 추론 서버 사용: {', '.join(VISION_REMOTE_SOCKETS)}")
+        else:
+            from app.services.vision_local import prepare_vision
+            print("🔍 AI 모델 로딩 + 워밍업 시작...")
+            stages.append(readiness.run("vision", prepare_vision))
+        await asyncio.gather(*stages)
+        if readiness.is_ready():
             print("✨ 모든 초기화 작업이 백그라운드에서 완료되었습니다.")
-        except Exception as e:
-            print(f"❌ 백그라운드 초기화 중 오류 발생: {e}")
+        else:
+            print(f"⚠️ 일부 구성요소 초기화 실패: {readiness.snapshot()}")
+
+    # /ready가 초기화 시작 전에도 전체 구성요소를 보여주도록 미리 등록 (remote: 비전은 추론 서버 응답으로 판단)
+    for name in (["vision"] if VISION_BACKEND == "local" else []) + ["food_index", "tool_index"]:
+        readiness.register(name)
 
     # 초기화 작업을 백그라운드 태스크로 시작
     init_task = asyncio.create_task(initialize_data())
@@ -74,6 +84,14 @@ async def lifespan(app: FastAPI):
     finally:
         if not init_task.done():
             init_task.cancel()
+        if not LITE_MODE and VISION_BACKEND == "local":
+            # 실행 중인 비전 배치 정리 (시작 시 prepare_vision으로 이미 import한 모듈)
+            from app.services.vision_local import vision_scheduler
+            await vision_scheduler.aclose()
+        # 임베딩 캐시에 모아 둔 사용 시각(LRU) 반영
+        from app.services import embedding_cache
+        if embedding_cache.embedding_cache is not None:
+            embedding_cache.embedding_cache.flush()
         print("👋 AI 서버가 종료됩니다.")
 
 # 2. 앱 생성
@@ -92,14 +110,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 3. 라우터 등록
-app.include_router(vision.router)
+# 3. 라우터 등록 (lite 모드에서는 비전 라우터를 import하지 않아 torch/transformers 로드가 없음)
+if not LITE_MODE:
+    from app.routers import vision
+    app.include_router(vision.router)
 
 
 @app.get("/")
 def health_check():
     return {"status": "ok", "msg": "MatchMeal AI Ready"}
 
+@app.get("/ready")
+async def ready_check():
+    """
+    구성요소별 준비 상태. 모두 준비되면 200, 아니면 503 (오케스트레이터 readiness probe용)
+    비전 모델은 워밍업 생성까지 끝나야 ready로 표시됩니다.
+    """
+    components = readiness.snapshot()
+    if VISION_BACKEND == "remote":
+        from app.services.vision_remote import vision_client
+        servers = await vision_client.ping()
+        components["vision"] = {"status": "ready" if any(servers.values()) else "pending", "servers": servers}
+    ready = all(c["status"] == "ready" for c in components.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "components": components})
+
+@app.get("/ai/metrics")
+def ai_metrics():
+    """상담 API 쪽 지표 (임베딩 캐시 적중률, 쿼리 임베딩 배치 크기/대기 시간, 마지막 음식 데이터 동기화 결과)"""
+    from app.services.embedding_cache import embedding_batcher_metrics, embedding_cache_metrics
+    from app.services.food_name_index import food_name_index
+    from app.services.vector_store import food_store
+    return {
+        "embedding_cache": embedding_cache_metrics(),
+        "embedding_batcher": embedding_batcher_metrics(),
+        "food_names": food_name_index.snapshot(),
+        "food_ingest": food_store.ingest_stats if food_store.initialized else {},
+        "food_snapshot": food_store.snapshot_manifest if food_store.initialized else None,
+    }
+
 # [API 1] 기간별 식단 피드백 -> Heavy Model
 @app.post("/ai/period-feedback")
 async def period_feedback(req: PeriodFeedbackRequest):
@@ -190,7 +238,7 @@ async def meal_plan(req: MealPlanRequest):
     {', '.join(req.flavors) if req.flavors else "특별한 취향 없음"}
     
     위 기간 동안 사용자가 실천할 수 있는 구체적인 식단표를 짜주세요.
-    - **도구 사용 필수:** `recommend_food_from_db` 도구를 사용하여 각 끼니에 적합한 메뉴를 찾아주세요.
+    - **도구 사용 필수:** `recommend_foods_for_meals` 도구에 모든 끼니의 검색어를 한 번에 넘겨 각 끼니에 적합한 메뉴를 찾아주세요.
     - **구성:** 아침, 점심, 저녁 메뉴와 칼로리를 포함해야 합니다.
     - **형식:** 날짜별로 구분하여 보기 좋게 출력해주세요. (반드시 리스트 형식을 사용하세요)
     """
@@ -1,21 +1,132 @@
 # 이미지 분석 API
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.services.vision_service import analyze_food_image
+import json
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Header, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from app.services.vision_service import ANALYSIS_MODES, analyze_food_image, analyze_food_images, read_batch_uploads
+from app.services.vision_scheduler import VisionTimeoutError
+from app.services.vision_preprocess import ImageTooLargeError, preprocess_executor
+from app.core.settings import VISION_BACKEND
+from app.services.vision_remote import RemoteInferenceError, vision_client
+from app.core.inference_executor import InferenceQueueFullError
 from app.schemas.dtos import FoodAnalysisResponse
 
 router = APIRouter(prefix="/vision", tags=["Vision AI"])
 
+def _to_http_error(e: Exception) -> HTTPException:
+    """서비스 예외 -> HTTP 상태 코드 매핑 (/analyze, /analyze-batch 공용)"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, InferenceQueueFullError):
+        # 대기열 초과 -> 빠른 거절로 서버 전체가 밀리는 것을 방지
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if isinstance(e, ImageTooLargeError):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, VisionTimeoutError):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, RemoteInferenceError):
+        return HTTPException(status_code=503, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
 @router.post("/analyze", response_model=FoodAnalysisResponse)
-async def analyze_food(file: UploadFile = File(...)):
+async def analyze_food(
+    file: UploadFile = File(...),
+    mode: str = Form("generate"),
+    labels: Optional[str] = Form(None),
+    adapter: Optional[str] = Query(None),
+    x_vision_adapter: Optional[str] = Header(None),
+):
     """
     이미지를 업로드하면 음식 이름을 분석하여 반환합니다.
+    - mode=generate (기본): 자유 생성
+    - mode=classify: 후보 라벨 점수화. labels="김치찌개,된장찌개,..." (미지정 시 음식 DB 후보)
+      응답의 scores에 후보별 확률이 포함됩니다.
+    - 어댑터 지정: ?adapter=v1.1 또는 X-Vision-Adapter 헤더 (미지정 시 A/B 분배 또는 기본 어댑터)
     """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="이미지 파일만 업로드 가능합니다.")
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode는 {', '.join(ANALYSIS_MODES)} 중 하나여야 합니다.")
         
     try:
-        result = await analyze_food_image(file)
+        label_list = labels.split(",") if labels else None
+        result = await analyze_food_image(file, mode=mode, labels=label_list, adapter=adapter or x_vision_adapter)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise _to_http_error(e)
+
+@router.post("/analyze-batch")
+async def analyze_food_batch(
+    files: List[UploadFile] = File(...),
+    mode: str = Form("generate"),
+    labels: Optional[str] = Form(None),
+    adapter: Optional[str] = Query(None),
+    x_vision_adapter: Optional[str] = Header(None),
+):
+    """
+    한 끼 식사의 여러 사진을 한 번에 분석합니다. (mode/labels/adapter는 /analyze와 동일)
+    결과는 NDJSON으로, 이미지마다 분석이 끝나는 순서대로 한 줄씩 전송됩니다.
+    - 성공: {"index": 0, "filename": "tray.jpg", "status": 200, "result": {...}}
+    - 실패: {"index": 1, "filename": "drink.png", "status": 413, "error": "..."} (다른 이미지에는 영향 없음)
+    """
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode는 {', '.join(ANALYSIS_MODES)} 중 하나여야 합니다.")
+
+    label_list = labels.split(",") if labels else None
+    results = None
+    streaming = False
+    try:
+        payloads = await read_batch_uploads(files)
+        results = analyze_food_images(payloads, mode=mode, labels=label_list, adapter=adapter or x_vision_adapter)
+        # 첫 결과 전에 모드/모델 상태 오류를 HTTP 오류로 돌려주기 위해 제너레이터를 먼저 시작
+        first = await results.__anext__()
+        streaming = True
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        raise _to_http_error(e)
+    finally:
+        # 첫 결과에서 실패(시간 초과/429 등)하면 남은 이미지 작업을 정리한 뒤 오류 응답
+        if results is not None and not streaming:
+            await results.aclose()
+
+    def _line(index, outcome) -> str:
+        item = {"index": index, "filename": files[index].filename}
+        if isinstance(outcome, Exception):
+            error = _to_http_error(outcome)
+            item.update(status=error.status_code, error=error.detail)
+        else:
+            item.update(status=200, result=outcome.model_dump())
+        return json.dumps(item, ensure_ascii=False) + "\n"
+
+    async def _stream():
+        if first is None:
+            return
+        try:
+            yield _line(*first)
+            async for index, outcome in results:
+                yield _line(index, outcome)
+        finally:
+            # 클라이언트가 중간에 끊어도 남은 이미지 작업을 정리
+            await results.aclose()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+@router.get("/metrics")
+async def vision_metrics():
+    """
+    배치 스케줄러 / 추론 실행기 / 결과 캐시 지표를 반환합니다.
+    VISION_BACKEND=remote 이면 이 API 워커의 전처리/클라이언트 지표와 추론 서버별 지표를 함께 반환합니다.
+    """
+    if VISION_BACKEND == "remote":
+        return {
+            "backend": "remote",
+            "preprocess": preprocess_executor.snapshot(),
+            "client": vision_client.snapshot(),
+            "servers": await vision_client.metrics(),
+        }
+    from app.services.vision_local import local_metrics
+    return {"backend": "local", **local_metrics()}
@@ -3,10 +3,17 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
+# 후보 라벨 점수 (분류 모드)
+class CandidateScore(BaseModel):
+    name: str
+    probability: float     # 후보 라벨 전체에 대해 정규화된 확률
+
 # AI 분석 결과 응답 형식
 class FoodAnalysisResponse(BaseModel):
     candidates: List[str]  # ["김치찌개", "부대찌개", "김치찜"]
     best_candidate: str    # "김치찌개" (1순위)
+    scores: Optional[List[CandidateScore]] = None  # 분류 모드에서만 제공 (상위 k개)
+    adapter: Optional[str] = None  # 분석에 사용된 LoRA 어댑터 이름
 
 class UserProfile(BaseModel):
     user_id: Optional[int] = None
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from app.services.tools import (
     analyze_health_and_nutrition, 
     recommend_food_from_db,
+    recommend_foods_for_meals,
     calculate_exercise_burn,
     compare_foods,
     generate_shopping_list,
@@ -21,6 +22,7 @@ from app.services.tools import (
     analyze_nutrient_deficiency
 )
 from app.services.tool_selector import tool_selector
+from app.core.lazy import LazyProxy
 
 load_dotenv()
 
@@ -100,6 +102,7 @@ class MatchMealCoach:
         self.all_tools = [
             analyze_health_and_nutrition, 
             recommend_food_from_db,
+            recommend_foods_for_meals,
             calculate_exercise_burn,
             compare_foods,
             generate_shopping_list,
@@ -199,7 +202,7 @@ class MatchMealCoach:
         # 1. 도구 선별 (Vector Search + Fast LLM)
         # 모든 요청에 대해 도구 선별을 수행해 Context 최적화
         try:
-            selected_tool_names = tool_selector.select_tools(context_str, self.tools_map)
+            selected_tool_names = await tool_selector.aselect_tools(context_str, self.tools_map)
         except Exception as e:
             print(f"Tool Selection Failed: {e}")
             selected_tool_names = []
@@ -260,4 +263,4 @@ class MatchMealCoach:
                 yield f"\n\n[시스템 알림] 죄송합니다. 답변 생성 중 일시적인 오류가 발생했습니다. (Error: {str(e)[:50]}...)"
                 # 로깅 또는 재시도 로직 추가 가능
 
-coach = MatchMealCoach()
\ No newline at end of file
+coach = LazyProxy(MatchMealCoach)
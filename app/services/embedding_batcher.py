@@ -0,0 +1,149 @@
+# 쿼리 임베딩 마이크로 배칭 (요청 간 합치기)
+# 동시에 들어온 요청들이 각자 embed_query를 호출하면 짧은 HTTPS 요청이 여러 번 나가고, 요청마다 rate limit이 차감됩니다.
+# 몇 ms 안에 도착한 쿼리를 모아 embed_documents 한 번으로 보내고 결과를 기다리던 호출자에게 나눠 줍니다.
+# - 위치: 디스크 캐시(CachedEmbeddings) 아래, OpenAI 위 -> 캐시에 없는 쿼리만 모임
+# - 음식/도구 벡터 저장소가 같은 인스턴스를 공유 (get_embeddings)
+# - 배치 크기/대기 시간 지표 (GET /ai/metrics)
+
+import os
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_BATCH_ENABLED = os.getenv("EMBEDDING_BATCH_ENABLED", "1") == "1"
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))  # 첫 쿼리 도착 후 더 기다리는 최대 시간
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+EMBEDDING_BATCH_CONCURRENCY = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))  # 동시에 진행하는 배치 요청 수
+EMBEDDING_BATCH_TIMEOUT = float(os.getenv("EMBEDDING_BATCH_TIMEOUT", "60"))  # 동기 embed_query의 최대 대기 시간
+_RECENT_SAMPLES = 1000  # 지표 백분위 계산에 쓰는 최근 배치 수
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _resolve(future: Future, result=None, exception: Optional[BaseException] = None):
+    """future 하나에 결과 전달. 이미 끝난 future 때문에 배치의 나머지가 멈추지 않도록 개별 처리"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class EmbeddingBatcher(Embeddings):
+    """
+    embed_query / aembed_query 호출을 백그라운드 스레드가 모아 inner.embed_documents로 한 번에 요청합니다.
+    첫 쿼리가 들어온 뒤 wait_ms가 지나거나 max_size개가 모이면 전송하고, 전송은 스레드 풀에서 진행되므로
+    응답을 기다리는 동안에도 다음 배치를 모읍니다. embed_documents는 이미 배치이므로 그대로 전달합니다.
+    """
+
+    def __init__(self, inner: Embeddings, wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+                 max_size: int = EMBEDDING_BATCH_MAX_SIZE, concurrency: int = EMBEDDING_BATCH_CONCURRENCY):
+        self.inner = inner
+        self.wait_s = max(0.0, wait_ms) / 1000
+        self.max_size = max(1, max_size)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="embedding-batch")
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"queries": 0, "batches": 0, "deduplicated": 0, "cancelled": 0, "errors": 0}
+        self._batch_sizes: deque = deque(maxlen=_RECENT_SAMPLES)
+        self._waits: deque = deque(maxlen=_RECENT_SAMPLES)  # 배치에서 가장 오래 기다린 쿼리의 대기 시간
+        self._latencies: deque = deque(maxlen=_RECENT_SAMPLES)  # embed_documents 응답 시간
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result(timeout=EMBEDDING_BATCH_TIMEOUT)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._collect, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0][2] + self.wait_s
+            while len(batch) < self.max_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._pool.submit(self._flush, batch)
+
+    def _flush(self, batch: list):
+        started = time.perf_counter()
+        texts: Dict[str, List[Future]] = {}
+        cancelled = 0
+        for text, future, _ in batch:
+            # 기다리던 쪽이 이미 취소한 쿼리(wait_for 시간 초과, 연결 끊김)는 보내지 않음
+            if future.set_running_or_notify_cancel():
+                texts.setdefault(text, []).append(future)
+            else:
+                cancelled += 1
+        vectors = None
+        if texts:
+            try:
+                vectors = self.inner.embed_documents(list(texts))
+            except Exception as e:
+                for futures in texts.values():
+                    for future in futures:
+                        _resolve(future, exception=e)
+        if vectors is not None:
+            for futures, vector in zip(texts.values(), vectors):
+                for future in futures:
+                    _resolve(future, result=vector)
+        with self._stats_lock:
+            self.stats["queries"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["deduplicated"] += len(batch) - cancelled - len(texts)
+            self.stats["cancelled"] += cancelled
+            self.stats["errors"] += bool(texts) and vectors is None
+            self._batch_sizes.append(len(batch))
+            self._waits.append(started - batch[0][2])
+            self._latencies.append(time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            sizes, waits, latencies = list(self._batch_sizes), list(self._waits), list(self._latencies)
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "wait_ms": self.wait_s * 1000,
+            "max_size": self.max_size,
+            "pending": self._queue.qsize(),
+            "avg_batch_size": round(stats["queries"] / stats["batches"], 2) if stats["batches"] else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "wait_p50_ms": round(_percentile(waits, 0.5) * 1000, 2),
+            "wait_p95_ms": round(_percentile(waits, 0.95) * 1000, 2),
+            "request_p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+            "request_p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        }
@@ -0,0 +1,239 @@
+# 임베딩 결과 디스크 캐시 (SQLite)
+# 같은 문자열(음식 문서, 도구 설명, 반복 검색어)은 재시작/재적재 후에도 OpenAI를 다시 호출하지 않습니다.
+# - 키: (모델명, 텍스트 SHA-256), 값: float32 벡터 BLOB
+# - 최근 사용 시각 기준 LRU로 최대 항목 수 유지
+# - 적중률 지표 (GET /ai/metrics)
+
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.services.embedding_batcher import EMBEDDING_BATCH_ENABLED, EmbeddingBatcher
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./chroma_db/embedding_cache.sqlite3")
+# text-embedding-3-small 1536차원 float32 = 약 6KB/항목 -> 기본 10만 항목 ≈ 600MB
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+# 적중 시 last_used 갱신은 메모리에 모았다가 이 주기/개수마다 (또는 쓰기·정리 직전에) 한 번에 반영
+EMBEDDING_CACHE_TOUCH_FLUSH_SECONDS = float(os.getenv("EMBEDDING_CACHE_TOUCH_FLUSH_SECONDS", "30"))
+EMBEDDING_CACHE_TOUCH_FLUSH_SIZE = int(os.getenv("EMBEDDING_CACHE_TOUCH_FLUSH_SIZE", "1000"))
+_SQLITE_MAX_VARIABLES = 900  # IN (...) 조회 한 번에 넣는 키 수
+
+
+def text_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    (모델, 텍스트 해시) -> 벡터 저장소. 여러 스레드(적재 스레드 풀, 요청 처리)에서 함께 쓰므로 연결 하나를 락으로 보호합니다.
+    최대 항목 수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다. (한 번에 5%씩 여유를 두고 정리)
+    조회 경로에서는 쓰기/커밋을 하지 않도록 적중한 키의 사용 시각을 메모리에 모아 두었다가 주기적으로,
+    그리고 put_many/정리 직전에 반영합니다. (프로세스가 죽으면 마지막 몇 초의 LRU 순서만 잃음)
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 touch_flush_seconds: float = EMBEDDING_CACHE_TOUCH_FLUSH_SECONDS,
+                 touch_flush_size: int = EMBEDDING_CACHE_TOUCH_FLUSH_SIZE):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.touch_flush_seconds = touch_flush_seconds
+        self.touch_flush_size = max(1, touch_flush_size)
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}  # 아직 DB에 반영하지 않은 {키: 마지막 사용 시각}
+        self._touch_flushed_at = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _SQLITE_MAX_VARIABLES):
+                chunk = unique[i:i + _SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                for key in found:
+                    self._touched[key] = now
+                if (len(self._touched) >= self.touch_flush_size
+                        or time.monotonic() - self._touch_flushed_at >= self.touch_flush_seconds):
+                    self._flush_touches()
+                    self._conn.commit()
+            hits = sum(1 for k in keys if k in found)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, model, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            self._flush_touches()
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)", rows)
+            inserted = self._conn.total_changes - before
+            self._entries += inserted
+            self.stats["writes"] += inserted
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def flush(self):
+        """메모리에 모아 둔 사용 시각을 DB에 반영 (종료 시/테스트용)"""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        # self._lock 안에서 호출, 커밋은 호출자가 함께 처리
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+        self._touch_flushed_at = time.monotonic()
+
+    def _evict(self):
+        # 버퍼에 남은 사용 시각부터 반영해야 방금 적중한 항목이 지워지지 않음
+        self._flush_touches()
+        target = int(self.max_entries * 0.95)
+        excess = max(0, self._entries - target)
+        before = self._conn.total_changes
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        deleted = self._conn.total_changes - before
+        self.stats["evictions"] += deleted
+        if deleted < excess:
+            # 다른 프로세스가 같은 파일을 정리한 경우 등 카운터가 어긋났으면 다시 셈
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        else:
+            self._entries -= deleted
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "path": self.path,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 함수 래퍼: 캐시에 없는 텍스트만 내부 임베딩(OpenAIEmbeddings)에 한 번에 요청"""
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model: str = EMBEDDING_MODEL):
+        self.inner = inner
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            self._store(found, missing, self.inner.embed_documents(list(missing.values())))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._lookup([text])
+        if missing:
+            self._store(found, missing, [self.inner.embed_query(text)])
+        return found[keys[0]]
+
+    # 비동기 버전: 캐시에 없는 텍스트만 내부 임베딩의 비동기 클라이언트로 요청 (이벤트 루프를 막지 않음)
+    # SQLite 조회/쓰기(락 대기 포함)도 기본 스레드 풀에서 실행
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        keys, found, missing = await loop.run_in_executor(None, self._lookup, texts)
+        if missing:
+            vectors = await self.inner.aembed_documents(list(missing.values()))
+            await loop.run_in_executor(None, self._store, found, missing, vectors)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        keys, found, missing = await loop.run_in_executor(None, self._lookup, [text])
+        if missing:
+            vectors = [await self.inner.aembed_query(text)]
+            await loop.run_in_executor(None, self._store, found, missing, vectors)
+        return found[keys[0]]
+
+    def _lookup(self, texts: List[str]):
+        """(키 목록, 캐시에서 찾은 {키: 벡터}, 캐시에 없는 {키: 텍스트})"""
+        keys = [text_key(self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        return keys, found, missing
+
+    def _store(self, found: Dict[str, List[float]], missing: Dict[str, str], vectors: List[List[float]]):
+        fresh = dict(zip(missing.keys(), vectors))
+        self.cache.put_many(self.model, fresh)
+        found.update(fresh)
+
+
+_embeddings: Optional[Embeddings] = None
+_embeddings_lock = threading.Lock()
+embedding_cache: Optional[EmbeddingCache] = None
+embedding_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embeddings() -> Embeddings:
+    """음식/도구 벡터 저장소가 함께 쓰는 임베딩 함수: 디스크 캐시 -> 쿼리 배칭 -> OpenAIEmbeddings (각각 끌 수 있음)"""
+    global _embeddings, embedding_cache, embedding_batcher
+    with _embeddings_lock:
+        if _embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            # ★ GMS 환경 설정 적용
+            inner = OpenAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_API_BASE")
+            )
+            if EMBEDDING_BATCH_ENABLED:
+                # 캐시에 없는 쿼리 임베딩을 요청 간에 모아 한 번에 전송 (app/services/embedding_batcher.py)
+                embedding_batcher = EmbeddingBatcher(inner)
+                inner = embedding_batcher
+            if EMBEDDING_CACHE_ENABLED:
+                embedding_cache = EmbeddingCache()
+                _embeddings = CachedEmbeddings(inner, embedding_cache)
+            else:
+                _embeddings = inner
+        return _embeddings
+
+
+def embedding_cache_metrics() -> dict:
+    if embedding_cache is None:
+        return {"enabled": EMBEDDING_CACHE_ENABLED, "initialized": False}
+    return {"enabled": True, "initialized": True, **embedding_cache.snapshot()}
+
+
+def embedding_batcher_metrics() -> dict:
+    if embedding_batcher is None:
+        return {"enabled": EMBEDDING_BATCH_ENABLED, "initialized": False}
+    return {"enabled": True, "initialized": True, **embedding_batcher.snapshot()}
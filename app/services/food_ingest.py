@@ -0,0 +1,281 @@
+# 영양 성분 CSV -> 벡터 DB 적재/증분 동기화 파이프라인
+# - CSV를 스트리밍으로 읽으며 행마다 안정적인 ID + 내용 해시를 계산하고, 컬렉션에 저장된 해시와 비교
+#   -> 새 행/바뀐 행만 임베딩해 upsert, CSV에서 사라진 행은 삭제, 같은 행은 건너뜀
+# - 토큰 한도를 지키는 큰 임베딩 배치, 임베딩 요청 여러 개를 동시에 (스레드 풀)
+# - 중단 후 재시작하면 이미 저장된 행은 해시가 같아 건너뛰므로 자연스럽게 이어서 진행
+# - 삭제는 끝까지 읽은 CSV의 행에만 적용 (파일이 없거나 읽다 실패하면 그 파일의 기존 문서는 유지)
+# - 체크포인트: CSV 지문 + 마지막 동기화 결과 (CSV가 그대로면 비교 자체를 생략)
+# - 처리량 지표 (rows/s, tokens/s, 재시도 횟수)
+
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.core.food_data import FOOD_CSV_FILES, build_page_content, iter_food_records
+
+INGEST_BATCH_MAX_ITEMS = int(os.getenv("INGEST_BATCH_MAX_ITEMS", "512"))
+INGEST_BATCH_MAX_TOKENS = int(os.getenv("INGEST_BATCH_MAX_TOKENS", "60000"))  # 임베딩 요청 1회당 토큰 상한
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))  # 동시에 보내는 임베딩 요청 수
+INGEST_MAX_RETRIES = 5
+SYNC_PAGE_SIZE = 5000  # 컬렉션 조회/삭제 단위
+CHECKPOINT_FILE = "food_ingest_checkpoint.json"
+
+
+def token_counter() -> Callable[[str], int]:
+    """임베딩 모델(cl100k) 기준 토큰 수. tiktoken이 없으면 UTF-8 바이트 기반으로 넉넉하게 추정"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        return lambda text: len(text.encode("utf-8")) // 2 + 1
+
+
+def sources_fingerprint(sources: Optional[Sequence[str]] = None) -> str:
+    """CSV 파일 (경로, 크기, 수정시각) 해시 -> 파일이 바뀌면 체크포인트를 무효화"""
+    hasher = hashlib.sha1()
+    for config in FOOD_CSV_FILES:
+        if sources is not None and config["key"] not in sources:
+            continue
+        path = config["path"]
+        stat = os.stat(path) if os.path.exists(path) else None
+        hasher.update(f"{config['key']}|{path}|{stat.st_size if stat else 0}|{stat.st_mtime_ns if stat else 0}".encode())
+    return hasher.hexdigest()
+
+
+class IngestCheckpoint:
+    """적재 진행 상황 파일 (원자적 교체로 저장하므로 쓰는 도중 중단되어도 깨지지 않음)"""
+
+    def __init__(self, directory: str, filename: str = CHECKPOINT_FILE):
+        self.path = os.path.join(directory, filename)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, state: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
+
+
+@dataclass
+class IngestBatch:
+    index: int
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    metadatas: List[dict] = field(default_factory=list)
+    tokens: int = 0
+
+
+def iter_batches(records: Iterable[Tuple[str, dict]], count_tokens: Callable[[str], int],
+                 max_items: int = INGEST_BATCH_MAX_ITEMS, max_tokens: int = INGEST_BATCH_MAX_TOKENS) -> Iterator[IngestBatch]:
+    """(row_id, meta) 스트림 -> 항목 수/토큰 한도를 넘지 않는 배치"""
+    batch = IngestBatch(index=0)
+    for row_id, meta in records:
+        text = build_page_content(meta)
+        tokens = count_tokens(text)
+        if batch.ids and (len(batch.ids) >= max_items or batch.tokens + tokens > max_tokens):
+            yield batch
+            batch = IngestBatch(index=batch.index + 1)
+        batch.ids.append(row_id)
+        batch.texts.append(text)
+        batch.metadatas.append(meta)
+        batch.tokens += tokens
+    if batch.ids:
+        yield batch
+
+
+class IngestStats:
+    """동기화 결과(추가/수정/삭제/건너뜀) + 처리량 지표 (동기화를 조정하는 스레드에서만 갱신)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.added = 0
+        self.updated = 0
+        self.deleted = 0
+        self.skipped = 0
+        self.rows = 0  # 임베딩 후 저장한 행 (added + updated)
+        self.batches = 0
+        self.tokens = 0
+        self.retries = 0
+        self.embed_seconds = 0.0
+        self.incomplete_sources: List[str] = []  # 없거나 끝까지 읽지 못한 CSV key (삭제 대상에서 제외)
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "skipped": self.skipped,
+            "rows": self.rows,
+            "batches": self.batches,
+            "tokens": self.tokens,
+            "retries": self.retries,
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_s": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "tokens_per_s": round(self.tokens / elapsed, 1) if elapsed else 0.0,
+            "avg_embed_s": round(self.embed_seconds / self.batches, 3) if self.batches else 0.0,
+            "incomplete_sources": list(self.incomplete_sources),
+        }
+
+
+def _embed_with_retry(embeddings, texts: List[str]) -> Tuple[List[List[float]], float, int]:
+    """
+    임베딩 요청 (레이트 리밋 등 일시 오류는 지수 백오프로 재시도) -> (벡터, 성공한 요청 시간, 재시도 횟수)
+    워커 스레드에서 실행되므로 공유 지표를 직접 바꾸지 않고, 조정 스레드(_drain)가 결과를 합산합니다.
+    """
+    for attempt in range(INGEST_MAX_RETRIES):
+        started = time.perf_counter()
+        try:
+            vectors = embeddings.embed_documents(texts)
+            return vectors, time.perf_counter() - started, attempt
+        except Exception as e:
+            if attempt == INGEST_MAX_RETRIES - 1:
+                raise
+            delay = min(30, 2 ** attempt)
+            print(f"⚠️ 임베딩 요청 실패 ({e}), {delay}초 후 재시도 ({attempt + 1}/{INGEST_MAX_RETRIES})")
+            time.sleep(delay)
+
+
+def stored_hashes(collection) -> Dict[str, str]:
+    """컬렉션에 저장된 {id: content_hash} (해시가 없는 이전 방식 문서는 빈 문자열)"""
+    hashes, offset = {}, 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=SYNC_PAGE_SIZE, offset=offset)
+        for doc_id, meta in zip(page["ids"], page["metadatas"]):
+            hashes[doc_id] = (meta or {}).get("content_hash", "")
+        if len(page["ids"]) < SYNC_PAGE_SIZE:
+            return hashes
+        offset += SYNC_PAGE_SIZE
+
+
+def _changed_records(records: Iterable[Tuple[str, dict]], stored: Dict[str, str], stats: IngestStats,
+                     seen: set) -> Iterator[Tuple[str, dict]]:
+    """CSV 스트림 중 새로 생겼거나 내용이 바뀐 행만 통과"""
+    for row_id, meta in records:
+        seen.add(row_id)
+        previous = stored.get(row_id)
+        if previous == meta["content_hash"]:
+            stats.skipped += 1
+            continue
+        if previous is None:
+            stats.added += 1
+        else:
+            stats.updated += 1
+        yield row_id, meta
+
+
+def sync_food_collection(collection, embeddings, checkpoint: IngestCheckpoint, sources: Optional[Sequence[str]] = None,
+                         concurrency: int = INGEST_CONCURRENCY, force: bool = False, dry_run: bool = False) -> dict:
+    """
+    CSV와 collection(Chroma 컬렉션)을 비교해 바뀐 부분만 반영합니다. 반환: 추가/수정/삭제/건너뜀 수 + 처리량 지표
+    - 지난 동기화 이후 CSV 파일이 그대로면(체크포인트 지문 일치) 비교 없이 건너뜀 (force=True면 항상 비교)
+    - dry_run=True면 변경 건수만 계산하고 임베딩/저장/삭제는 하지 않음
+    """
+    stats = IngestStats()
+    fingerprint = sources_fingerprint(sources)
+    state = checkpoint.load()
+    if not force and not dry_run and state.get("fingerprint") == fingerprint and state.get("completed"):
+        print(f"✅ 음식 데이터가 CSV와 동기화되어 있습니다. ({state.get('report', {})}) 초기화를 건너뜁니다.")
+        return stats.snapshot()
+
+    print("🔍 CSV와 벡터 DB 비교 중...")
+    stored = stored_hashes(collection)
+    seen: set = set()
+    read_status: Dict[str, bool] = {}  # CSV key -> 끝까지 읽었는지 (스트림을 다 소비한 뒤에 확정)
+    changed = _changed_records(iter_food_records(sources, read_status), stored, stats, seen)
+
+    if dry_run:
+        for _ in changed:
+            pass
+    else:
+        checkpoint.save({"fingerprint": fingerprint, "completed": False})
+        _embed_and_upsert(collection, embeddings, changed, stats, concurrency)
+
+    # CSV에서 사라진 행 삭제 (sources로 일부 파일만 동기화할 때는 그 파일의 행만 대상)
+    # 없거나 읽다 실패한 파일은 "행이 사라진 것"과 구분할 수 없으므로 그 파일의 문서는 지우지 않음
+    stats.incomplete_sources = [key for key, complete in read_status.items() if not complete]
+    if stats.incomplete_sources:
+        print(f"⚠️ 끝까지 읽지 못한 CSV가 있어 해당 문서는 삭제하지 않습니다: {', '.join(stats.incomplete_sources)}")
+    removed = [doc_id for doc_id in stored if doc_id not in seen and _deletable(doc_id, sources, read_status)]
+    stats.deleted = len(removed)
+    if not dry_run:
+        for i in range(0, len(removed), SYNC_PAGE_SIZE):
+            collection.delete(ids=removed[i:i + SYNC_PAGE_SIZE])
+
+    snapshot = stats.snapshot()
+    if dry_run:
+        print(f"📋 동기화 미리보기: {snapshot}")
+        return snapshot
+    # 읽지 못한 파일이 있으면 완료로 기록하지 않음 -> 다음 시작 때 다시 비교
+    checkpoint.save({"fingerprint": fingerprint, "completed": not stats.incomplete_sources, "report": snapshot,
+                     "synced_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    print(f"✅ 음식 데이터 동기화 완료! 추가 {stats.added} / 수정 {stats.updated} / 삭제 {stats.deleted} / 건너뜀 {stats.skipped} "
+          f"({snapshot['elapsed_s']}s, {snapshot['rows_per_s']} rows/s)")
+    return snapshot
+
+
+def _deletable(doc_id: str, sources: Optional[Sequence[str]], read_status: Dict[str, bool]) -> bool:
+    """
+    이번에 끝까지 읽은 CSV의 행이면 True. ID 접두사가 CSV key가 아닌 문서(이전 방식 ID)는
+    전체 동기화에서 모든 파일을 끝까지 읽었을 때만 정리
+    """
+    source = doc_id.split(":", 1)[0]
+    if source in read_status:
+        return read_status[source]
+    if sources is not None or source in {config["key"] for config in FOOD_CSV_FILES}:
+        return False
+    return bool(read_status) and all(read_status.values())
+
+
+def _embed_and_upsert(collection, embeddings, records: Iterable[Tuple[str, dict]], stats: IngestStats, concurrency: int):
+    """배치 단위 동시 임베딩 -> 완료되는 대로 upsert (동시에 진행 중인 배치는 concurrency개까지만 메모리에 유지)"""
+    in_flight: Dict[Future, IngestBatch] = {}
+
+    def _drain(block_until_below: int):
+        while len(in_flight) > block_until_below:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                # 재시도 후에도 실패하면 예외 -> 다음 실행에서 남은 행부터 다시 동기화
+                vectors, embed_seconds, retries = future.result()
+                collection.upsert(ids=batch.ids, embeddings=vectors, metadatas=batch.metadatas, documents=batch.texts)
+                stats.rows += len(batch.ids)
+                stats.tokens += batch.tokens
+                stats.batches += 1
+                stats.embed_seconds += embed_seconds
+                stats.retries += retries
+                snap = stats.snapshot()
+                print(f"   -> {stats.rows}행 저장 ({snap['rows_per_s']} rows/s, {snap['tokens_per_s']} tokens/s)")
+
+    print(f"🔄 변경된 행 임베딩 시작... (동시 요청 {concurrency}, 배치 최대 {INGEST_BATCH_MAX_ITEMS}건/{INGEST_BATCH_MAX_TOKENS}토큰)")
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ingest")
+    try:
+        for batch in iter_batches(records, token_counter()):
+            _drain(block_until_below=max(1, concurrency) - 1)
+            in_flight[pool.submit(_embed_with_retry, embeddings, batch.texts)] = batch
+        _drain(block_until_below=0)
+    except BaseException:
+        for future in in_flight:
+            future.cancel()
+        print(f"❌ 동기화 중단 ({stats.rows}행 저장됨, 재시작 시 남은 행부터 이어서 진행)")
+        raise
+    finally:
+        pool.shutdown(wait=False)
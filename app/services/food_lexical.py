@@ -0,0 +1,114 @@
+# 음식 검색 어휘(lexical) 색인: 문자 n-gram BM25
+# 한국어 음식명은 짧고 정확해서, 임베딩 검색만으로는 의미가 비슷한 다른 음식이 먼저 나오는 경우가 많습니다.
+# 음식명 문자 2/3-gram + 검색 텍스트(page_content) 단어로 BM25 점수를 계산하고,
+# 벡터 검색 결과와 RRF(reciprocal rank fusion)로 합칩니다. (임베딩 API가 느리거나 죽어도 이 색인만으로 응답 가능)
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.food_data import build_page_content
+from app.services.food_name_index import normalize_name
+
+FOOD_BM25_K1 = float(os.getenv("FOOD_BM25_K1", "1.2"))
+FOOD_BM25_B = float(os.getenv("FOOD_BM25_B", "0.75"))
+FOOD_NAME_NGRAMS = (2, 3)
+
+_WORDS = re.compile(r"[0-9a-z가-힣]+")
+
+
+def lexical_terms(name: str, text: str = "") -> List[str]:
+    """음식명 문자 n-gram (+ 한 글자 이름은 그대로) + 텍스트 단어"""
+    key = normalize_name(name)
+    terms = [key] if len(key) < min(FOOD_NAME_NGRAMS) else []
+    for n in FOOD_NAME_NGRAMS:
+        terms.extend(f"{key[i:i + n]}" for i in range(len(key) - n + 1))
+    if text:
+        terms.extend(f"w:{word}" for word in _WORDS.findall(text.lower()))
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Tuple[float, Sequence[str]]], rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """[(가중치, 순위별 키 목록), ...] -> 융합 점수 내림차순 [(키, 점수)]"""
+    scores: Dict[str, float] = {}
+    for weight, keys in rankings:
+        for rank, key in enumerate(keys):
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class FoodLexicalIndex:
+    """
+    행 순서는 NutritionTable과 같으므로(같은 CSV 레코드 목록으로 구축) 영양 조건 마스크를 그대로 적용할 수 있습니다.
+    term -> (행 번호 배열, 빈도 배열) 역색인을 NumPy로 보관하고 질의마다 BM25 점수를 벡터 연산으로 누적합니다.
+    """
+
+    def __init__(self, k1: float = FOOD_BM25_K1, b: float = FOOD_BM25_B):
+        self.k1, self.b = k1, b
+        self.metas: List[dict] = []
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_norm = np.empty(0, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._built = False
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self.metas)
+
+    def build(self, records: Sequence[Tuple[str, dict]]):
+        metas: List[dict] = []
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths: List[int] = []
+        for i, (_, meta) in enumerate(records):
+            terms = Counter(lexical_terms(meta["name"], build_page_content(meta)))
+            for term, tf in terms.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(i)
+                tfs.append(tf)
+            metas.append(meta)
+            lengths.append(sum(terms.values()))
+
+        doc_len = np.asarray(lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if len(doc_len) else 1.0
+        # BM25 분모의 문서 길이 항은 질의와 무관하므로 미리 계산
+        doc_norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+        packed = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        with self._lock:
+            self.metas, self._postings, self._doc_norm = metas, packed, doc_norm
+            self._built = True
+        print(f"🔤 음식 어휘 색인 구축 완료: {len(metas)}행 / {len(packed)}개 term")
+
+    def search(self, query: str, k: int = 5, mask: Optional[np.ndarray] = None) -> List[Tuple[dict, float]]:
+        """BM25 상위 k개 [(메타데이터, 점수)]. mask(bool 배열)가 있으면 True인 행만 대상"""
+        metas, postings, doc_norm = self.metas, self._postings, self._doc_norm
+        n_docs = len(metas)
+        if not n_docs:
+            return []
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term, qtf in Counter(lexical_terms(query, query)).items():
+            posting = postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs = posting
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += qtf * idf * tfs * (self.k1 + 1) / (tfs + doc_norm[docs])
+        if mask is not None:
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(metas[i], float(scores[i])) for i in candidates]
+
+
+food_lexical_index = FoodLexicalIndex()
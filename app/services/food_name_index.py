@@ -0,0 +1,200 @@
+# 음식명 -> 영양 성분 메모리 색인 (벡터 검색 없이 이름으로 바로 찾기)
+# compare_foods 등 "이미 아는 음식 이름"을 찾는 경로는 대부분 문자열 일치이므로
+# 임베딩 API 호출 + ANN 검색 대신 이 색인을 먼저 조회하고, 찾지 못했을 때만 벡터 검색을 사용합니다.
+# 조회 순서: 정확히 일치 -> 정규화 일치(공백/괄호) -> 별칭(색인 쪽 이름에서 브랜드 접두어를 뗀 이름) -> 자모 n-gram 유사도
+# 정확/정규화 일치만 확정 결과이고, 별칭/유사 일치는 후보일 뿐이라 호출자가 벡터 검색으로 확인합니다.
+# (질의 쪽 앞 단어는 떼지 않음: "저염 김치찌개"를 "김치찌개" 행으로 확정하면 다른 영양 성분을 보여주게 됨)
+
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FOOD_NAME_FUZZY_THRESHOLD = float(os.getenv("FOOD_NAME_FUZZY_THRESHOLD", "0.6"))  # Dice 계수
+FOOD_NAME_NGRAM = 3
+ALIAS_SCORE = 0.9  # 별칭 일치 점수 (확정 일치 1.0보다 낮게)
+CONFIDENT_MATCHES = ("exact", "normalized")  # 벡터 검색 없이 그대로 써도 되는 일치 종류
+
+_BRACKETS = re.compile(r"[\(\[\{<（［【].*?[\)\]\}>）］】]")
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+_SEPARATORS = re.compile(r"[\s_/·]+")
+
+# 한글 음절 -> 초성/중성/종성 (유니코드 음절 = 0xAC00 + (초성*21 + 중성)*28 + 종성)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+
+def normalize_name(name: str) -> str:
+    """비교용 이름: 전각/반각 통일, 소문자, 괄호 내용 제거, 공백/기호 제거"""
+    text = unicodedata.normalize("NFKC", name).lower()
+    text = _BRACKETS.sub("", text)
+    return _NON_WORD.sub("", text)
+
+
+def name_aliases(name: str) -> List[str]:
+    """
+    정규화 이름 + 앞 단어(브랜드/제조사 접두어)를 뗀 이름들. 색인 구축에만 사용 (질의에는 normalize_name만)
+    예: "농심 신라면(봉지)" -> ["농심신라면", "신라면"]
+    """
+    aliases = [normalize_name(name)]
+    words = [w for w in _SEPARATORS.split(_BRACKETS.sub(" ", unicodedata.normalize("NFKC", name))) if w]
+    for i in range(1, len(words)):
+        alias = normalize_name("".join(words[i:]))
+        if len(alias) >= 2:
+            aliases.append(alias)
+    return [a for a in dict.fromkeys(aliases) if a]
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 자모로 분해 (오타/받침 차이에도 n-gram이 겹치도록). 그 외 문자는 그대로"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHOSEONG[code // 588])
+            out.append(_JUNGSEONG[(code % 588) // 28])
+            if code % 28:
+                out.append(_JONGSEONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def ngrams(text: str, n: int = FOOD_NAME_NGRAM) -> set:
+    padded = f"^{text}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FoodNameIndex:
+    """
+    CSV 행 메타데이터를 이름별로 보관합니다. (같은 이름이 여러 번 나오면 먼저 읽은 행 = 일반 음식 DB 우선)
+    build()는 새 색인을 만든 뒤 한 번에 교체하므로 조회와 동시에 다시 만들어도 안전합니다.
+    """
+
+    def __init__(self, fuzzy_threshold: float = FOOD_NAME_FUZZY_THRESHOLD):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._exact: Dict[str, dict] = {}
+        self._normalized: Dict[str, dict] = {}
+        self._aliases: Dict[str, dict] = {}  # 앞 단어를 뗀 이름 -> 행 (확정이 아닌 후보)
+        self._grams: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+        self._built = False
+        self.stats = {"exact": 0, "normalized": 0, "alias": 0, "fuzzy": 0, "misses": 0}
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def build(self, rows: Iterable[dict]):
+        exact: Dict[str, dict] = {}
+        normalized: Dict[str, dict] = {}
+        aliases: Dict[str, dict] = {}
+        for meta in rows:
+            exact.setdefault(meta["name"], meta)
+            key, *stripped = name_aliases(meta["name"])
+            normalized.setdefault(key, meta)
+            for alias in stripped:
+                aliases.setdefault(alias, meta)
+        self._install(exact, normalized, aliases)
+
+    def export(self) -> dict:
+        """스냅샷 저장용 {"exact": {이름: row_id}, "normalized": {정규화 키: row_id}, "aliases": {별칭: row_id}}"""
+        return {
+            "exact": {name: meta["row_id"] for name, meta in self._exact.items()},
+            "normalized": {key: meta["row_id"] for key, meta in self._normalized.items()},
+            "aliases": {key: meta["row_id"] for key, meta in self._aliases.items()},
+        }
+
+    def restore(self, data: dict, metas_by_id: Dict[str, dict]):
+        """export() 결과 + 행 메타데이터로 복원 (별칭 계산 생략)"""
+        exact = {name: metas_by_id[row_id] for name, row_id in data["exact"].items()}
+        if "aliases" not in data:
+            # 이전 형식 스냅샷은 정규화 키와 별칭이 섞여 있으므로 이름에서 다시 계산
+            self.build(exact.values())
+            return
+        normalized = {key: metas_by_id[row_id] for key, row_id in data["normalized"].items()}
+        aliases = {key: metas_by_id[row_id] for key, row_id in data["aliases"].items()}
+        self._install(exact, normalized, aliases)
+
+    def _install(self, exact: Dict[str, dict], normalized: Dict[str, dict], aliases: Dict[str, dict]):
+        keys = list(normalized)
+        grams: Dict[str, List[int]] = {}
+        gram_counts = []
+        for i, key in enumerate(keys):
+            key_grams = ngrams(to_jamo(key))
+            gram_counts.append(len(key_grams))
+            for gram in key_grams:
+                grams.setdefault(gram, []).append(i)
+
+        with self._lock:
+            self._exact, self._normalized, self._aliases = exact, normalized, aliases
+            self._keys, self._grams, self._gram_counts = keys, grams, gram_counts
+            self._built = True
+        print(f"📇 음식명 색인 구축 완료: {len(exact)}개 이름 / {len(keys)}개 정규화 키 / {len(aliases)}개 별칭")
+
+    def lookup(self, name: str) -> Optional[Tuple[dict, str, float]]:
+        """
+        (메타데이터, 일치 종류 exact|normalized|alias|fuzzy, 점수) 또는 None
+        CONFIDENT_MATCHES(exact/normalized)가 아니면 후보이므로 호출자가 벡터 검색으로 확인해야 합니다.
+        """
+        meta = self._exact.get(name) or self._exact.get(name.strip())
+        if meta is not None:
+            self.stats["exact"] += 1
+            return meta, "exact", 1.0
+
+        key = normalize_name(name)
+        meta = self._normalized.get(key)
+        if meta is not None:
+            self.stats["normalized"] += 1
+            return meta, "normalized", 1.0
+        meta = self._aliases.get(key)
+        if meta is not None:
+            self.stats["alias"] += 1
+            return meta, "alias", ALIAS_SCORE
+
+        match = self._fuzzy(key)
+        if match is not None:
+            self.stats["fuzzy"] += 1
+            return match
+        self.stats["misses"] += 1
+        return None
+
+    def _fuzzy(self, key: str) -> Optional[Tuple[dict, str, float]]:
+        if not key:
+            return None
+        keys, grams, gram_counts = self._keys, self._grams, self._gram_counts
+        query = ngrams(to_jamo(key))
+        overlaps: Counter = Counter()
+        for gram in query:
+            overlaps.update(grams.get(gram, ()))
+        best, best_score = None, 0.0
+        for i, shared in overlaps.items():
+            score = 2 * shared / (len(query) + gram_counts[i])
+            # 점수가 같으면 더 짧은(덜 구체적인) 이름 우선
+            if score > best_score or (score == best_score and len(keys[i]) < len(keys[best])):
+                best, best_score = i, score
+        if best is None or best_score < self.fuzzy_threshold:
+            return None
+        return self._normalized[keys[best]], "fuzzy", round(best_score, 3)
+
+    def snapshot(self) -> dict:
+        lookups = sum(self.stats.values())
+        return {
+            **self.stats,
+            "names": len(self._exact),
+            "keys": len(self._keys),
+            "hit_rate": round((lookups - self.stats["misses"]) / lookups, 4) if lookups else 0.0,
+        }
+
+
+food_name_index = FoodNameIndex()
@@ -0,0 +1,150 @@
+# 음식 검색 색인 스냅샷 (버전이 붙은 자체 완결 빌드 산출물)
+# 새 컨테이너가 ./chroma_db를 다시 만들거나 CSV를 재임베딩하지 않고, 미리 만든 스냅샷을 검증 후 mmap으로 열어 바로 서비스합니다.
+# 모든 레플리카가 같은 스냅샷을 쓰면 같은 데이터를 응답합니다.
+#
+# 디렉터리 구조 (snapshots/<version>/):
+#   manifest.json   버전, 원본 CSV 내용 해시, 임베딩 모델, 벡터 차원/형식, 파일별 SHA-256
+#   records.jsonl   행 메타데이터 (영양 성분, row_id, content_hash) - 영양 테이블/어휘 색인은 로드 시 구축
+#   names.json      음식명 색인 (정확/정규화 키 -> row_id)
+#   vectors/        줄인 차원 + 양자화 벡터 (app/services/food_vector_index.py 형식)
+# snapshots/CURRENT 파일에 현재 버전 이름을 적어 두면 상위 디렉터리만 지정해도 됩니다.
+# 빌드: python -m scripts.build_food_snapshot --out ./snapshots
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.food_data import FOOD_CSV_FILES
+from app.services.embedding_cache import EMBEDDING_MODEL
+from app.services.food_vector_index import FOOD_VECTOR_DIM, FOOD_VECTOR_DTYPE, write_index
+
+FOOD_SNAPSHOT_DIR = os.getenv("FOOD_SNAPSHOT_DIR", "")  # 비어 있으면 스냅샷 미사용 (CSV -> Chroma 동기화)
+SNAPSHOT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+
+
+class SnapshotError(ValueError):
+    """스냅샷이 없거나, 손상되었거나, 이 서버와 호환되지 않음"""
+
+
+def _file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def source_content_hash() -> str:
+    """원본 CSV 파일 내용 해시 (수정 시각이 아닌 내용 기준 -> 어느 머신에서 빌드해도 같은 값)"""
+    hasher = hashlib.sha256()
+    for config in FOOD_CSV_FILES:
+        hasher.update(f"{config['key']}|".encode())
+        if os.path.exists(config["path"]):
+            hasher.update(_file_sha256(config["path"]).encode())
+    return hasher.hexdigest()
+
+
+def _snapshot_files(directory: str) -> List[str]:
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), directory)
+            if path != "manifest.json":
+                files.append(path)
+    return sorted(files)
+
+
+def build_snapshot(out_root: str, records: Sequence[Tuple[str, dict]], vectors: np.ndarray, present: np.ndarray,
+                   names: dict, dim: int = FOOD_VECTOR_DIM, dtype: str = FOOD_VECTOR_DTYPE,
+                   make_current: bool = True) -> Tuple[str, dict]:
+    """스냅샷 디렉터리를 만들고 (경로, manifest)를 반환합니다. 임시 디렉터리에 모두 쓴 뒤 이름을 바꿔 공개"""
+    source_hash = source_content_hash()
+    version = f"{time.strftime('%Y%m%d%H%M%S')}-{source_hash[:8]}"
+    directory = os.path.join(out_root, version)
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    with open(os.path.join(tmp_dir, "records.jsonl"), "w", encoding="utf-8") as f:
+        for _, meta in records:
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+    with open(os.path.join(tmp_dir, "names.json"), "w", encoding="utf-8") as f:
+        json.dump(names, f, ensure_ascii=False)
+    vector_manifest = write_index(os.path.join(tmp_dir, "vectors"), [row_id for row_id, _ in records],
+                                  vectors, present, dim=dim, dtype=dtype)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source_hash": source_hash,
+        "embedding_model": EMBEDDING_MODEL,
+        "rows": len(records),
+        "vectors": vector_manifest,
+        "files": {path: _file_sha256(os.path.join(tmp_dir, path)) for path in _snapshot_files(tmp_dir)},
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_dir, directory)
+
+    if make_current:
+        current_tmp = os.path.join(out_root, f"{CURRENT_FILE}.tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(current_tmp, os.path.join(out_root, CURRENT_FILE))
+    return directory, manifest
+
+
+def resolve_snapshot(path: str) -> str:
+    """스냅샷 디렉터리 또는 CURRENT 파일이 있는 상위 디렉터리 -> 스냅샷 디렉터리"""
+    if os.path.exists(os.path.join(path, "manifest.json")):
+        return path
+    current = os.path.join(path, CURRENT_FILE)
+    if os.path.exists(current):
+        with open(current, "r", encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    raise SnapshotError(f"스냅샷을 찾을 수 없습니다: {path}")
+
+
+def validate_snapshot(directory: str, verify_checksums: bool = True) -> dict:
+    """manifest 형식/임베딩 모델/파일 해시 검증 후 manifest 반환 (실패 시 SnapshotError)"""
+    try:
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"manifest를 읽을 수 없습니다: {directory} ({e})")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"지원하지 않는 스냅샷 형식입니다: {manifest.get('format')} (지원: {SNAPSHOT_FORMAT})")
+    if manifest.get("embedding_model") != EMBEDDING_MODEL:
+        raise SnapshotError(f"임베딩 모델이 다릅니다: 스냅샷 {manifest.get('embedding_model')} / 서버 {EMBEDDING_MODEL}")
+    for path, expected in manifest.get("files", {}).items():
+        full_path = os.path.join(directory, path)
+        if not os.path.exists(full_path):
+            raise SnapshotError(f"스냅샷 파일이 없습니다: {path}")
+        if verify_checksums and _file_sha256(full_path) != expected:
+            raise SnapshotError(f"스냅샷 파일 해시가 다릅니다 (손상): {path}")
+    return manifest
+
+
+def load_snapshot_records(directory: str) -> Tuple[List[Tuple[str, dict]], dict]:
+    """(행 레코드 [(row_id, meta)], 음식명 색인 export 데이터)"""
+    records = []
+    with open(os.path.join(directory, "records.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                meta = json.loads(line)
+                records.append((meta["row_id"], meta))
+    with open(os.path.join(directory, "names.json"), "r", encoding="utf-8") as f:
+        names = json.load(f)
+    return records, names
+
+
+def snapshot_is_stale(manifest: dict) -> Optional[bool]:
+    """이 머신의 CSV와 스냅샷 원본이 다르면 True (CSV가 없으면 판단 불가 -> None)"""
+    if not any(os.path.exists(config["path"]) for config in FOOD_CSV_FILES):
+        return None
+    return source_content_hash() != manifest.get("source_hash")
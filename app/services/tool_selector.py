@@ -1,6 +1,7 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from app.services.vector_store import tool_store
+from app.core.lazy import LazyProxy
 import json
 import os
 from dotenv import load_dotenv
@@ -59,8 +60,41 @@ class ToolSelector:
             # Fallback: 검색 실패 시 빈 리스트
             return []
 
-        if not candidates:
+        prompt_input = self._prompt_input(query, candidates, tools_map)
+        if prompt_input is None:
+            return []
+        chain = self.prompt | self.llm
+        try:
+            res = chain.invoke(prompt_input)
+        except Exception as e:
+            print(f"Tool Selection LLM Error: {e}")
+            return []
+        return self._parse_selection(res, query, candidates, tools_map)
+
+    async def aselect_tools(self, query: str, tools_map: dict) -> list[str]:
+        """select_tools의 비동기 버전 (요청 이벤트 루프에서 도구 검색/LLM 호출을 기다리는 동안 다른 요청 처리)"""
+        try:
+            candidates = await tool_store.aall_tools_docs()
+            if len(candidates) > 20:
+                candidates = await tool_store.asearch_tools(query, k=10)
+        except Exception as e:
+            print(f"Tool Selection Error: {e}")
+            return []
+
+        prompt_input = self._prompt_input(query, candidates, tools_map)
+        if prompt_input is None:
             return []
+        chain = self.prompt | self.llm
+        try:
+            res = await chain.ainvoke(prompt_input)
+        except Exception as e:
+            print(f"Tool Selection LLM Error: {e}")
+            return []
+        return self._parse_selection(res, query, candidates, tools_map)
+
+    def _prompt_input(self, query: str, candidates: list, tools_map: dict):
+        if not candidates:
+            return None
             
         # 후보군 텍스트 생성
         candidates_text = ""
@@ -73,18 +107,19 @@ class ToolSelector:
                 filtered_candidates.append(f"- {name}: {doc.page_content}")
         
         if not filtered_candidates:
-            return []
+            return None
             
         candidates_str = "\n".join(filtered_candidates)
         
         # 2. LLM Select (Precision)
-        chain = self.prompt | self.llm
+        return {
+            "candidate_tools": candidates_str,
+            "question": query
+        }
+
+    def _parse_selection(self, res, query: str, candidates: list, tools_map: dict) -> list[str]:
+        valid_tool_names = set(tools_map.keys())
         try:
-            res = chain.invoke({
-                "candidate_tools": candidates_str,
-                "question": query
-            })
-            
             # JSON Parsing
             content = res.content
             # Markdown code block 제거
@@ -109,4 +144,4 @@ class ToolSelector:
             print(f"Tool Selection LLM Error: {e}")
             return []
 
-tool_selector = ToolSelector()
+tool_selector = LazyProxy(ToolSelector)
@@ -1,7 +1,10 @@
-from langchain.tools import tool
+import asyncio
+from langchain.tools import StructuredTool, tool
 from app.core.standards import get_recommended_ratio
 from app.services.vector_store import food_store 
+from app.services.nutrition_table import HEALTH_CONDITIONS, parse_conditions, unknown_conditions
 from datetime import datetime
+from typing import List
 
 # ==================================================================================
 # [기존 도구]
@@ -31,36 +34,99 @@ def analyze_health_and_nutrition(age: int = 30, gender: str = "MALE", height_cm:
     """
 
 # [Tool 2] 조건부 음식 추천 (RAG + Filter)
-@tool
-def recommend_food_from_db(query: str, health_condition: str = "general") -> str:
+def _recommend_food_from_db(query: str, health_condition: str = "general", sort_by: str = "") -> str:
     """
     음식을 검색합니다. health_condition에 따라 필터링합니다.
     옵션: 'general', 'high_bp'(고혈압), 'diabetes'(당뇨), 'diet'(다이어트), 'muscle'(근성장)
+    여러 조건은 쉼표로 함께 지정할 수 있습니다. 예: 'diabetes,high_bp'
+    sort_by: 결과 정렬 기준 영양소 ('protein'은 많은 순, 그 외 'calories', 'sodium', 'sugar' 등은 적은 순)
     """
-    filter_dict = {}
-    if health_condition == "high_bp": filter_dict = {"sodium": {"$lt": 600}}
-    elif health_condition == "diabetes": filter_dict = {"sugar": {"$lt": 5}}
-    elif health_condition == "diet": filter_dict = {"calories": {"$lt": 400}}
-    elif health_condition == "muscle": filter_dict = {"protein": {"$gte": 20}}
+    try:
+        predicates = parse_conditions(health_condition)
+        results = food_store.search_food_where(
+            query, predicates, k=5, sort_by=sort_by or None, descending=sort_by == "protein"
+        )
+    except Exception as e:
+        return f"검색 오류: {str(e)}"
+    return _format_recommendations(results, health_condition, predicates, sort_by)
 
+async def _arecommend_food_from_db(query: str, health_condition: str = "general", sort_by: str = "") -> str:
+    # 에이전트(astream_events)에서는 이 비동기 구현이 호출됨 -> 검색 중에도 이벤트 루프가 다른 스트림을 처리
     try:
-        results = food_store.search_food(query, k=5, filter=filter_dict)
+        predicates = parse_conditions(health_condition)
+        results = await food_store.asearch_food_where(
+            query, predicates, k=5, sort_by=sort_by or None, descending=sort_by == "protein"
+        )
     except Exception as e:
         return f"검색 오류: {str(e)}"
-    
+    return _format_recommendations(results, health_condition, predicates, sort_by)
+
+def _condition_notice(health_condition: str) -> str:
+    # 알 수 없는 조건은 검색에서 빼고, 에이전트가 다시 고를 수 있도록 지원 목록을 함께 알려줌
+    unknown = unknown_conditions(health_condition)
+    if not unknown:
+        return ""
+    return f"(알 수 없는 조건 {', '.join(unknown)}은(는) 무시했습니다. 지원: {', '.join(HEALTH_CONDITIONS)})\n"
+
+def _format_recommendations(results, health_condition: str, predicates, sort_by: str, notice: bool = True) -> str:
     response = f"[검색 결과 (조건: {health_condition})]\n"
+    if notice: response += _condition_notice(health_condition)
     if not results: return response + "조건에 맞는 메뉴가 없습니다."
     
+    columns = {name for name, _, _ in predicates} | ({sort_by} if sort_by else set())
     for doc in results:
         m = doc.metadata
         name = m.get('name', '이름없음')
         cal = m.get('calories', 0)
         detail = ""
-        if health_condition == "high_bp": detail = f", 나트륨 {m.get('sodium',0)}mg"
-        if health_condition == "diabetes": detail = f", 당류 {m.get('sugar',0)}g"
+        if "sodium" in columns: detail += f", 나트륨 {m.get('sodium',0)}mg"
+        if "sugar" in columns: detail += f", 당류 {m.get('sugar',0)}g"
+        if "protein" in columns: detail += f", 단백질 {m.get('protein',0)}g"
         response += f"- {name} ({cal}kcal{detail})\n"
     return response
 
+recommend_food_from_db = StructuredTool.from_function(
+    func=_recommend_food_from_db, coroutine=_arecommend_food_from_db, name="recommend_food_from_db"
+)
+
+# [Tool 2-1] 여러 끼니 일괄 음식 추천 (식단표용: 임베딩 1회 + 일괄 검색)
+def _recommend_foods_for_meals(queries: List[str], health_condition: str = "general", sort_by: str = "", k: int = 3) -> str:
+    """
+    여러 끼니의 메뉴를 한 번에 검색합니다. 식단표처럼 검색할 끼니가 많을 때 recommend_food_from_db를 반복 호출하지 말고 이 도구를 사용하세요.
+    queries: 끼니별 검색어 목록. 예: ['월요일 아침 현미밥 정식', '월요일 점심 닭가슴살 샐러드', ...]
+    health_condition, sort_by: recommend_food_from_db와 같으며 모든 검색어에 공통 적용
+    k: 검색어마다 보여줄 후보 수
+    """
+    try:
+        predicates = parse_conditions(health_condition)
+        results = food_store.search_food_many(
+            queries, [predicates], k=k, sort_by=sort_by or None, descending=sort_by == "protein"
+        )
+    except Exception as e:
+        return f"검색 오류: {str(e)}"
+    return _format_meal_candidates(queries, results, health_condition, predicates, sort_by)
+
+async def _arecommend_foods_for_meals(queries: List[str], health_condition: str = "general", sort_by: str = "", k: int = 3) -> str:
+    try:
+        predicates = parse_conditions(health_condition)
+        results = await food_store.asearch_food_many(
+            queries, [predicates], k=k, sort_by=sort_by or None, descending=sort_by == "protein"
+        )
+    except Exception as e:
+        return f"검색 오류: {str(e)}"
+    return _format_meal_candidates(queries, results, health_condition, predicates, sort_by)
+
+def _format_meal_candidates(queries, results, health_condition: str, predicates, sort_by: str) -> str:
+    sections = []
+    for query, docs in zip(queries, results):
+        body = _format_recommendations(docs, health_condition, predicates, sort_by, notice=False).split("\n", 1)[1]
+        sections.append(f"[{query}]\n{body.rstrip()}")
+    return f"[일괄 검색 결과 (조건: {health_condition})]\n" + _condition_notice(health_condition) + "\n".join(sections)
+
+recommend_foods_for_meals = StructuredTool.from_function(
+    func=_recommend_foods_for_meals, coroutine=_arecommend_foods_for_meals, name="recommend_foods_for_meals"
+)
+
 # [Tool 3] 운동 칼로리 계산 (METs)
 @tool
 def calculate_exercise_burn(weight_kg: float, exercise_type: str, duration_minutes: int) -> str:
@@ -77,20 +143,29 @@ def calculate_exercise_burn(weight_kg: float, exercise_type: str, duration_minut
     return f"[운동 분석] {exercise_type} {duration_minutes}분 -> 약 {int(burned)}kcal 소모 (METs {met})"
 
 # [Tool 4] 영양 성분 비교
-@tool
-def compare_foods(food_a: str, food_b: str) -> str:
+def _compare_foods(food_a: str, food_b: str) -> str:
     """
     두 가지 음식의 영양 성분을 비교합니다.
     """
     try:
-        res_a = food_store.search_food(food_a, k=1)
-        res_b = food_store.search_food(food_b, k=1)
+        # 이름 색인 우선 (대부분 임베딩 호출 없이 끝남)
+        doc_a = food_store.lookup_food(food_a)
+        doc_b = food_store.lookup_food(food_b)
     except Exception as e:
         return f"비교 중 오류 발생: {str(e)}"
-        
-    if not res_a or not res_b: return "비교할 음식을 찾을 수 없습니다."
-    meta_a = res_a[0].metadata
-    meta_b = res_b[0].metadata
+    return _format_comparison(doc_a, doc_b)
+
+async def _acompare_foods(food_a: str, food_b: str) -> str:
+    try:
+        doc_a, doc_b = await asyncio.gather(food_store.alookup_food(food_a), food_store.alookup_food(food_b))
+    except Exception as e:
+        return f"비교 중 오류 발생: {str(e)}"
+    return _format_comparison(doc_a, doc_b)
+
+def _format_comparison(doc_a, doc_b) -> str:
+    if not doc_a or not doc_b: return "비교할 음식을 찾을 수 없습니다."
+    meta_a = doc_a.metadata
+    meta_b = doc_b.metadata
     return f"""
     [영양 비교: {meta_a.get('name')} vs {meta_b.get('name')}]
     칼로리: {meta_a.get('calories')} vs {meta_b.get('calories')} kcal
@@ -98,6 +173,8 @@ def compare_foods(food_a: str, food_b: str) -> str:
     나트륨: {meta_a.get('sodium')} vs {meta_b.get('sodium')} mg
     """
 
+compare_foods = StructuredTool.from_function(func=_compare_foods, coroutine=_acompare_foods, name="compare_foods")
+
 # [Tool 5] 장보기 리스트 생성
 @tool
 def generate_shopping_list(meal_plan_text: str) -> str:
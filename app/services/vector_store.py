@@ -1,117 +1,167 @@
 import os
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Sequence, Tuple
 from langchain_core.documents import Document
 from dotenv import load_dotenv
+from app.services.embedding_cache import get_embeddings
+from app.core.food_data import build_page_content, iter_food_records
+from app.services.food_ingest import INGEST_CONCURRENCY, IngestCheckpoint, sync_food_collection
+from app.services.food_lexical import food_lexical_index, reciprocal_rank_fusion
+from app.services.food_name_index import CONFIDENT_MATCHES, food_name_index
+from app.services.food_snapshot import (
+    FOOD_SNAPSHOT_DIR, load_snapshot_records, resolve_snapshot, snapshot_is_stale, validate_snapshot,
+)
+from app.services.food_vector_index import FOOD_VECTOR_BACKEND, food_vector_index
+from app.services.nutrition_table import NUTRIENT_COLUMNS, Predicate, nutrition_table, to_chroma_where
+from app.core.lazy import LazyProxy
 
 load_dotenv()
 
 PERSIST_DIRECTORY = "./chroma_db"
+NUTRITION_ID_FILTER_MAX = int(os.getenv("NUTRITION_ID_FILTER_MAX", "2000"))  # 이 이하면 row_id $in 필터 사용
+
+# 음식 검색 방식: hybrid(BM25 + 벡터, RRF 융합) | vector | lexical
+FOOD_SEARCH_MODE = os.getenv("FOOD_SEARCH_MODE", "hybrid").lower()
+FOOD_HYBRID_LEXICAL_WEIGHT = float(os.getenv("FOOD_HYBRID_LEXICAL_WEIGHT", "1.0"))
+FOOD_HYBRID_VECTOR_WEIGHT = float(os.getenv("FOOD_HYBRID_VECTOR_WEIGHT", "1.0"))
+FOOD_HYBRID_RRF_K = int(os.getenv("FOOD_HYBRID_RRF_K", "60"))
+# hybrid에서 벡터 검색(임베딩 API 포함)을 기다리는 최대 시간. 넘으면 어휘 검색 결과만으로 응답
+# (vector 모드는 대체할 결과가 없으므로 동기/비동기 모두 기다림)
+FOOD_VECTOR_TIMEOUT = float(os.getenv("FOOD_VECTOR_TIMEOUT", "3.0"))
+FOOD_SEARCH_MODES = ("hybrid", "vector", "lexical")
+FOOD_EMPTY_RECHECK_S = 5.0  # 컬렉션이 비어 있을 때 count() 재확인 간격
+
+_vector_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="food-vector")
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.metadata.get("row_id") or doc.metadata.get("name", "")
+
+
+def _fuse(vector: List[Document], lexical: List[Document], k: int) -> List[Document]:
+    docs = {}
+    for doc in vector + lexical:
+        docs.setdefault(_doc_key(doc), doc)
+    fused = reciprocal_rank_fusion(
+        [
+            (FOOD_HYBRID_LEXICAL_WEIGHT, [_doc_key(doc) for doc in lexical]),
+            (FOOD_HYBRID_VECTOR_WEIGHT, [_doc_key(doc) for doc in vector]),
+        ],
+        rrf_k=FOOD_HYBRID_RRF_K,
+    )
+    return [docs[key] for key, _ in fused[:k]]
+
+
+def _sorted_by(results: List[Document], k: int, sort_by: Optional[str], descending: bool) -> List[Document]:
+    if sort_by:
+        results.sort(key=lambda doc: doc.metadata.get(sort_by, 0.0), reverse=descending)
+    return results[:k]
+
 
 class FoodVectorStore:
     def __init__(self):
-        # ★ GMS 환경 설정 적용
-        self.embedding_function = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_API_BASE")
-        )
+        # chromadb/openai는 import 비용이 커서 실제 생성 시점에 로드
+        from langchain_chroma import Chroma
+
+        # OpenAI 임베딩 + 디스크 캐시 (app/services/embedding_cache.py)
+        self.embedding_function = get_embeddings()
         
         self.db = Chroma(
             persist_directory=PERSIST_DIRECTORY,
             embedding_function=self.embedding_function,
             collection_name="food_collection"
         )
+        self.ingest_stats: dict = {}
+        self.snapshot_manifest: Optional[dict] = None
+        self._ready: Optional[bool] = None  # 컬렉션에 문서가 있는지 (None: 아직 확인 안 함)
+        self._ready_checked_at = 0.0
+        self._vector_index_checked = False
+        self._vector_index_lock = threading.Lock()
+        self._lookup_lock = threading.RLock()  # 조회 색인 구축은 한 번에 하나만 (지연 구축/재적재)
 
-    # ★ CSV 파일 로드 및 적재
-    def load_from_csvs(self):
-        # 이미 데이터가 있는지 확인 (중복 적재 방지)
-        try:
-            if self.db._collection.count() > 0:
-                print(f"✅ ChromaDB에 이미 {self.db._collection.count()}개의 데이터가 있습니다. 초기화를 건너뜁니다.")
-                return
-        except Exception as e:
-            print(f"⚠️ DB 확인 중 오류 (무시): {e}")
-
-        import csv
-        documents = []
-        
-        # 파일별 매핑 설정 [파일경로, 헤더행인덱스, 인코딩, {필드명: 인덱스}]
-        files_config = [
-            {
-                "path": "app/400_Food_DB.csv", "header_row": 0, "encoding": "utf-8",
-                "map": {"name": 0, "kcal": 2, "carb": 3, "sugar": 4, "fat": 5, "prot": 6, "sodium": 9},
-                "desc": "일반 음식"
-            },
-            {
-                "path": "app/50000_Food_DB.csv", "header_row": 3, "encoding": "utf-8", # utf-8로 읽히는지 재확인 필요하지만 get_columns 성공했으므로 utf-8
-                "map": {"name": 5, "kcal": 15, "carb": 21, "sugar": 22, "fat": 20, "prot": 19, "sodium": 45},
-                "desc": "가공 식품"
-            }
-        ]
-
-        print("🔄 CSV 데이터 적재 시작...")
-        
-        for config in files_config:
-            fpath = config["path"]
-            if not os.path.exists(fpath):
-                print(f"⚠️ 파일 없음: {fpath}")
-                continue
-                
+    # ★ 서버 시작 시 음식 데이터 준비: 스냅샷이 지정되어 있으면 검증 후 mmap, 아니면 CSV -> Chroma 동기화
+    def initialize(self) -> dict:
+        if FOOD_SNAPSHOT_DIR:
             try:
-                # 50k DB가 utf-8로 성공했는지 확인 필요. Step 764 결과는 utf-8로 성공함.
-                with open(fpath, 'r', encoding=config["encoding"]) as csvfile:
-                    reader = csv.reader(csvfile)
-                    # 헤더 건너뛰기
-                    for _ in range(config["header_row"] + 1):
-                        next(reader)
-                    
-                    for row in reader:
-                        try:
-                            # 인덱스 접근 안전 장치
-                            m = config["map"]
-                            if len(row) <= max(m.values()): continue
-                            
-                            name = row[m["name"]].strip()
-                            if not name: continue
-                            
-                            def safe_float(val):
-                                try: return float(val.replace(',', ''))
-                                except: return 0.0
-
-                            meta = {
-                                "name": name,
-                                "calories": safe_float(row[m["kcal"]]),
-                                "carbohydrate": safe_float(row[m["carb"]]),
-                                "sugar": safe_float(row[m["sugar"]]),
-                                "fat": safe_float(row[m["fat"]]),
-                                "protein": safe_float(row[m["prot"]]),
-                                "sodium": safe_float(row[m["sodium"]])
-                            }
-                            
-                            # 검색용 텍스트 생성
-                            content = (f"음식명: {name}, 칼로리: {meta['calories']}kcal, "
-                                       f"탄수: {meta['carbohydrate']}g, 단백: {meta['protein']}g, "
-                                       f"지방: {meta['fat']}g, 당류: {meta['sugar']}g")
-                                       
-                            documents.append(Document(page_content=content, metadata=meta))
-                            
-                        except Exception as e:
-                            continue # 개별 행 오류 무시
-                            
+                return self.load_snapshot(FOOD_SNAPSHOT_DIR)
             except Exception as e:
-                print(f"❌ {fpath} 로드 실패: {e}")
+                print(f"⚠️ 음식 색인 스냅샷을 사용할 수 없어 CSV 동기화로 대체합니다: {e}")
+        return self.load_from_csvs()
 
-        if documents:
-            # 배치 단위로 추가 (너무 많으면 에러 가능성)
-            batch_size = 100
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i+batch_size]
-                self.db.add_documents(batch)
-                print(f"   -> {i+len(batch)} / {len(documents)} 저장 완료")
-            print("✅ 모든 데이터 적재 완료!")
-        else:
-            print("⚠️ 적재할 데이터가 없습니다.")
+    def load_snapshot(self, path: str) -> dict:
+        """빌드된 스냅샷(app/services/food_snapshot.py)을 검증하고 조회 색인 + mmap 벡터 색인으로 엽니다. 재임베딩 없음"""
+        directory = resolve_snapshot(path)
+        manifest = validate_snapshot(directory)
+        records, names = load_snapshot_records(directory)
+        self.build_lookup_indexes(records, names)
+        with self._vector_index_lock:
+            food_vector_index.directory = os.path.join(directory, "vectors")
+            food_vector_index.load()
+            food_vector_index.align(nutrition_table.ids)
+            self._vector_index_checked = True
+        self.snapshot_manifest = {**manifest, "path": directory, "stale": snapshot_is_stale(manifest)}
+        if self.snapshot_manifest["stale"]:
+            print(f"⚠️ 스냅샷 {manifest['version']}이 이 머신의 CSV와 다릅니다. (스냅샷 데이터로 서비스)")
+        print(f"✅ 음식 색인 스냅샷 로드: {manifest['version']} ({manifest['rows']}행)")
+        return {"snapshot": manifest["version"], "rows": manifest["rows"]}
+
+    # ★ CSV 파일 로드 및 적재 (증분 동기화 + 동시 임베딩, app/services/food_ingest.py)
+    def load_from_csvs(self, concurrency: int = INGEST_CONCURRENCY, force: bool = False, dry_run: bool = False) -> dict:
+        """
+        CSV와 컬렉션을 비교해 추가/수정된 행만 임베딩하고, 사라진 행은 삭제합니다.
+        (ID/해시가 없는 이전 방식의 컬렉션은 처음 한 번 전체가 새 ID로 교체됩니다)
+        """
+        report = sync_food_collection(
+            self.db._collection, self.embedding_function, IngestCheckpoint(PERSIST_DIRECTORY),
+            concurrency=concurrency, force=force, dry_run=dry_run,
+        )
+        if not dry_run:
+            self.ingest_stats = report
+            self._ready = None
+            self.build_lookup_indexes()
+        return report
+
+    def build_lookup_indexes(self, records=None, names: Optional[dict] = None):
+        """
+        음식명 색인 + 영양 성분 테이블 + 어휘 색인 구축 (이름 조회/조건 필터/BM25가 벡터 DB 없이 끝나도록)
+        records가 없으면 CSV를 한 번 읽고, names(스냅샷의 음식명 색인)가 있으면 별칭 계산 없이 복원
+        """
+        with self._lookup_lock:
+            records = list(iter_food_records()) if records is None else records
+            if names is not None:
+                food_name_index.restore(names, {row_id: meta for row_id, meta in records})
+            else:
+                food_name_index.build(meta for _, meta in records)
+            nutrition_table.build(records)
+            food_lexical_index.build(records)  # 행 순서가 nutrition_table과 같아야 함 (조건 마스크 공유)
+            if food_vector_index.loaded:
+                food_vector_index.align(nutrition_table.ids)
+
+    def _lookup_indexes_built(self) -> bool:
+        return food_name_index.built and nutrition_table.built and food_lexical_index.built
+
+    def ensure_lookup_indexes(self):
+        """시작 시 initialize()가 만들지 못했을 때만 처음 한 번 구축 (동시 호출은 락에서 기다렸다가 결과 공유)"""
+        if self._lookup_indexes_built():
+            return
+        with self._lookup_lock:
+            if not self._lookup_indexes_built():
+                self.build_lookup_indexes()
+
+    async def _aensure_lookup_indexes(self):
+        # 비동기 경로: CSV 읽기/색인 구축이 이벤트 루프에서 돌지 않도록 스레드 풀에서 기다림
+        if not self._lookup_indexes_built():
+            await asyncio.get_running_loop().run_in_executor(_vector_pool, self.ensure_lookup_indexes)
+
+    def reset(self):
+        """컬렉션과 적재 체크포인트를 비웁니다. (전체 재적재용)"""
+        self.db.reset_collection()
+        IngestCheckpoint(PERSIST_DIRECTORY).clear()
+        self._ready = None
 
     # 데이터 적재 (수동 추가용)
     def add_foods(self, food_list: list):
@@ -131,27 +181,340 @@ class FoodVectorStore:
         
         if documents:
             self.db.add_documents(documents)
+            self._ready = None
+
+    # ★ 이름으로 음식 찾기: 이름 색인 확정 일치(정확/정규화) -> 아니면 벡터 검색 (별칭/유사 일치는 검색 실패 시 대체)
+    def lookup_food(self, name: str) -> Optional[Document]:
+        doc, confident = self._lookup_name(name)
+        if confident:
+            return doc
+        results = self.search_food(name, k=1)
+        return results[0] if results else doc
+
+    async def alookup_food(self, name: str) -> Optional[Document]:
+        await self._aensure_lookup_indexes()
+        doc, confident = self._lookup_name(name)
+        if confident:
+            return doc
+        results = await self.asearch_food(name, k=1)
+        return results[0] if results else doc
+
+    def _lookup_name(self, name: str) -> Tuple[Optional[Document], bool]:
+        """(이름 색인 결과, 확정 일치 여부)"""
+        self.ensure_lookup_indexes()
+        match = food_name_index.lookup(name)
+        if match is None:
+            return None, False
+        return Document(page_content=build_page_content(match[0]), metadata=match[0]), match[1] in CONFIDENT_MATCHES
+
+    # ★ 영양 조건 검색: 조건은 영양 성분 테이블에서 먼저 평가하고, 통과한 행 안에서만 유사도 검색
+    def search_food_where(self, query: str, predicates: Sequence[Predicate], k: int = 5,
+                          sort_by: Optional[str] = None, descending: bool = False) -> List[Document]:
+        """
+        predicates: [("sodium", "<", 600), ("sugar", "<", 5)] 처럼 AND로 결합할 조건
+        sort_by: 유사도 상위 후보(k * 4)를 해당 영양소 순으로 다시 정렬
+        """
+        plan = self._plan_where(predicates, sort_by)
+        if plan is None:
+            return []
+        where, mask = plan
+        results = self.search_food(query, k=k * 4 if sort_by else k, filter=where, mask=mask)
+        return _sorted_by(results, k, sort_by, descending)
+
+    async def asearch_food_where(self, query: str, predicates: Sequence[Predicate], k: int = 5,
+                                 sort_by: Optional[str] = None, descending: bool = False) -> List[Document]:
+        await self._aensure_lookup_indexes()
+        plan = self._plan_where(predicates, sort_by)
+        if plan is None:
+            return []
+        where, mask = plan
+        results = await self.asearch_food(query, k=k * 4 if sort_by else k, filter=where, mask=mask)
+        return _sorted_by(results, k, sort_by, descending)
 
-    # ★ 검색 (필터 기능 포함)
-    def search_food(self, query: str, k=5, filter=None):
+    def _plan_where(self, predicates: Sequence[Predicate], sort_by: Optional[str]):
+        """(Chroma 필터, 테이블 마스크) 또는 조건을 만족하는 행이 없으면 None (임베딩/검색 생략)"""
+        if sort_by and sort_by not in NUTRIENT_COLUMNS:
+            raise ValueError(f"알 수 없는 영양소입니다: {sort_by}")
+        self.ensure_lookup_indexes()
+        where, mask = to_chroma_where(predicates), None
+        table = nutrition_table.snapshot()  # 마스크와 행 ID를 같은 빌드에서 (재구축 중 교체와 섞이지 않도록)
+        if nutrition_table.built and len(table.ids) and predicates:
+            mask = table.mask(predicates)  # 어휘 검색 쪽에도 같은 조건으로 적용
+            ids = table.ids[mask].tolist()
+            if not ids:
+                return None
+            # 통과 행이 적으면 ID 목록으로 정확히 제한 (많으면 같은 조건을 Chroma 필터로 전달)
+            if len(ids) <= NUTRITION_ID_FILTER_MAX:
+                where = {"row_id": {"$in": ids}}
+        return where, mask
+
+    # ★ 검색 (필터 기능 포함): 어휘(BM25) + 벡터 결과를 RRF로 융합
+    def search_food(self, query: str, k=5, filter=None, mask=None, mode: Optional[str] = None) -> List[Document]:
+        """
+        filter: Chroma 메타데이터 필터 (벡터 검색 쪽)
+        mask: 영양 성분 테이블 행 마스크 (어휘 검색 쪽, search_food_where가 filter와 같은 조건으로 전달)
+        mode: hybrid | vector | lexical (기본 FOOD_SEARCH_MODE)
+        Chroma 필터만 있고 mask가 없으면 어휘 검색은 조건을 알 수 없으므로 벡터 검색만 사용합니다.
+        """
+        mode = self._resolve_mode(mode, filter, mask)
+        if mode == "lexical":
+            return self._lexical_search(query, k, mask)
+        if mode == "vector":
+            try:
+                return self._vector_search(query, k, filter, mask)
+            except Exception as e:
+                print(f"Food Search Error: {e}")
+                return []
+
+        fetch_k = max(k * 4, 20)
+        vector_future = _vector_pool.submit(self._vector_search, query, fetch_k, filter, mask)
+        lexical = self._lexical_search(query, fetch_k, mask)
         try:
-            # 데이터가 없는 경우 검색 생략 (에러 방지)
-            if self.db._collection.count() == 0: return []
-            
-            if filter:
-                return self.db.similarity_search(query, k=k, filter=filter)
-            return self.db.similarity_search(query, k=k)
+            vector = vector_future.result(timeout=FOOD_VECTOR_TIMEOUT)
+        except FutureTimeoutError:
+            # 임베딩 API 지연 -> 어휘 결과로 응답 (백그라운드 요청이 끝나면 쿼리 임베딩은 캐시에 남음)
+            print(f"⚠️ 벡터 검색 {FOOD_VECTOR_TIMEOUT}s 초과, 어휘 검색 결과만 사용합니다.")
+            return lexical[:k]
         except Exception as e:
-            print(f"Food Search Error: {e}")
+            print(f"Food Search Error (어휘 검색 결과만 사용): {e}")
+            return lexical[:k]
+        return _fuse(vector, lexical, k)
+
+    async def asearch_food(self, query: str, k=5, filter=None, mask=None, mode: Optional[str] = None) -> List[Document]:
+        """
+        search_food의 비동기 버전: 쿼리 임베딩은 비동기 클라이언트로, ANN/행렬 검색은 스레드 풀에서 실행
+        (채팅 스트림 여러 개가 동시에 검색해도 이벤트 루프를 막지 않음)
+        """
+        if (mode or FOOD_SEARCH_MODE) != "vector":
+            await self._aensure_lookup_indexes()
+        mode = self._resolve_mode(mode, filter, mask)
+        loop = asyncio.get_running_loop()
+        if mode == "lexical":
+            return await loop.run_in_executor(_vector_pool, self._lexical_search, query, k, mask)
+        fetch_k = k if mode == "vector" else max(k * 4, 20)
+        # BM25 점수 계산도 CPU 작업이므로 벡터 검색과 함께 스레드 풀에서 (search_food처럼 동시에 진행)
+        lexical = None
+        if mode == "hybrid":
+            lexical = loop.run_in_executor(_vector_pool, self._lexical_search, query, fetch_k, mask)
+        try:
+            # 시간 제한은 어휘 결과로 대신 응답할 수 있는 hybrid에서만 (search_food와 같음)
+            timeout = FOOD_VECTOR_TIMEOUT if mode == "hybrid" else None
+            vector = await asyncio.wait_for(self._avector_search(query, fetch_k, filter, mask), timeout=timeout)
+        except Exception as e:
+            if mode == "vector":
+                print(f"Food Search Error: {e!r}")
+                return []
+            print(f"⚠️ 벡터 검색 실패/지연, 어휘 검색 결과만 사용합니다: {e!r}")
+            return (await lexical)[:k]
+        if mode == "vector":
+            return vector
+        return _fuse(vector, await lexical, k)
+
+    # ★ 여러 검색어 일괄 검색 (식단표 등): 임베딩 요청 1회 + 행렬 검색 1회로 모든 검색어에 응답
+    def search_food_many(self, queries: Sequence[str], filters: Optional[Sequence[Sequence[Predicate]]] = None,
+                         k: int = 5, sort_by: Optional[str] = None, descending: bool = False,
+                         mode: Optional[str] = None) -> List[List[Document]]:
+        """
+        결과[i]는 search_food_where(queries[i], filters[i], k, sort_by, descending)와 같은 방식으로 구한 목록
+        filters: 검색어별 조건 목록 (None이면 조건 없음, 하나만 주면 모든 검색어에 공통 적용)
+        """
+        plans = self._plan_many(queries, filters, k, sort_by, mode)
+        pending = [i for i, plan in enumerate(plans) if plan is not None and plan[2] != "lexical"]
+        vectors: dict = {}
+        if pending:
+            try:
+                embedded = self.embedding_function.embed_documents([queries[i] for i in pending])
+                vectors = dict(zip(pending, self._search_many_by_vector(embedded, [plans[i] for i in pending])))
+            except Exception as e:
+                print(f"Food Search Error (일괄 검색, 어휘 검색 결과만 사용): {e}")
+        return self._finish_many(queries, plans, vectors, k, sort_by, descending)
+
+    async def asearch_food_many(self, queries: Sequence[str], filters: Optional[Sequence[Sequence[Predicate]]] = None,
+                                k: int = 5, sort_by: Optional[str] = None, descending: bool = False,
+                                mode: Optional[str] = None) -> List[List[Document]]:
+        """search_food_many의 비동기 버전 (임베딩은 비동기 클라이언트, 행렬 검색은 스레드 풀)"""
+        await self._aensure_lookup_indexes()
+        plans = self._plan_many(queries, filters, k, sort_by, mode)
+        pending = [i for i, plan in enumerate(plans) if plan is not None and plan[2] != "lexical"]
+        vectors: dict = {}
+        if pending:
+            async def run():
+                embedded = await self.embedding_function.aembed_documents([queries[i] for i in pending])
+                return await asyncio.get_running_loop().run_in_executor(
+                    _vector_pool, self._search_many_by_vector, embedded, [plans[i] for i in pending]
+                )
+            # 모두 hybrid일 때만 시간 제한 (vector 모드 검색어는 대신할 어휘 결과가 없음)
+            hybrid = all(plans[i][2] == "hybrid" for i in pending)
+            try:
+                vectors = dict(zip(pending, await asyncio.wait_for(run(), timeout=FOOD_VECTOR_TIMEOUT if hybrid else None)))
+            except Exception as e:
+                print(f"⚠️ 일괄 벡터 검색 실패/지연, 어휘 검색 결과만 사용합니다: {e!r}")
+        # 어휘 검색/결합/정렬도 루프 밖에서
+        return await asyncio.get_running_loop().run_in_executor(
+            _vector_pool, self._finish_many, queries, plans, vectors, k, sort_by, descending
+        )
+
+    def _plan_many(self, queries: Sequence[str], filters, k: int, sort_by: Optional[str], mode: Optional[str]) -> list:
+        """검색어별 (Chroma 필터, 테이블 마스크, 검색 방식, 벡터 후보 수) 또는 조건을 만족하는 행이 없으면 None"""
+        filters = list(filters) if filters else [[]]
+        if len(filters) == 1:
+            filters = filters * len(queries)
+        if len(filters) != len(queries):
+            raise ValueError(f"검색어({len(queries)}개)와 조건({len(filters)}개)의 개수가 다릅니다.")
+        fetch_k = k * 4 if sort_by else k
+        plans = []
+        for predicates in filters:
+            plan = self._plan_where(predicates or [], sort_by)
+            if plan is None:
+                plans.append(None)
+                continue
+            where, mask = plan
+            search_mode = self._resolve_mode(mode, where, mask)
+            plans.append((where, mask, search_mode, fetch_k if search_mode == "vector" else max(fetch_k * 4, 20)))
+        return plans
+
+    def _finish_many(self, queries: Sequence[str], plans: list, vectors: dict, k: int,
+                     sort_by: Optional[str], descending: bool) -> List[List[Document]]:
+        """벡터 결과와 어휘 결과를 검색어별로 합치고 (hybrid: RRF) 정렬/자르기"""
+        fetch_k = k * 4 if sort_by else k
+        results = []
+        for i, plan in enumerate(plans):
+            if plan is None:
+                results.append([])
+                continue
+            _, mask, search_mode, candidates = plan
+            if search_mode == "vector":
+                found = vectors.get(i, [])
+            elif search_mode == "lexical" or i not in vectors:
+                found = self._lexical_search(queries[i], fetch_k, mask)
+            else:
+                found = _fuse(vectors[i], self._lexical_search(queries[i], candidates, mask), fetch_k)
+            results.append(_sorted_by(found, k, sort_by, descending))
+        return results
+
+    def _search_many_by_vector(self, vectors: List[List[float]], plans: list) -> List[List[Document]]:
+        """
+        plans[i] = (Chroma 필터, 마스크, 방식, 후보 수). mmap: 모든 질의를 한 번의 행렬곱으로,
+        Chroma: 같은 필터끼리 묶어 query(query_embeddings=[...]) 한 번씩
+        """
+        results: List[Optional[List[Document]]] = [None] * len(plans)
+        mmap_rows = [i for i, (where, mask, _, _) in enumerate(plans) if self._use_mmap(where, mask)]
+        if mmap_rows:
+            metas = food_lexical_index.metas
+            hits = food_vector_index.search_many(
+                [vectors[i] for i in mmap_rows], max(plans[i][3] for i in mmap_rows),
+                masks=[plans[i][1] for i in mmap_rows],
+            )
+            for i, rows in zip(mmap_rows, hits):
+                results[i] = [
+                    Document(page_content=build_page_content(metas[row]), metadata=metas[row])
+                    for row, _ in rows[:plans[i][3]]
+                ]
+
+        rest = [i for i, found in enumerate(results) if found is None]
+        if rest and self._has_documents():
+            groups: dict = {}
+            for i in rest:
+                groups.setdefault(json.dumps(plans[i][0], sort_keys=True, ensure_ascii=False), []).append(i)
+            for rows in groups.values():
+                where = plans[rows[0]][0]
+                res = self.db._collection.query(
+                    query_embeddings=[vectors[i] for i in rows],
+                    n_results=max(plans[i][3] for i in rows),
+                    include=["documents", "metadatas"],
+                    **({"where": where} if where else {}),
+                )
+                for i, documents, metadatas in zip(rows, res["documents"], res["metadatas"]):
+                    results[i] = [
+                        Document(page_content=content, metadata=meta) for content, meta in zip(documents, metadatas)
+                    ][:plans[i][3]]
+        return [found or [] for found in results]
+
+    def _resolve_mode(self, mode: Optional[str], filter, mask) -> str:
+        mode = mode or FOOD_SEARCH_MODE
+        if mode not in FOOD_SEARCH_MODES:
+            raise ValueError(f"알 수 없는 검색 방식입니다: {mode}")
+        if mode != "vector":
+            self.ensure_lookup_indexes()
+        lexical_ok = mode != "vector" and len(food_lexical_index) > 0 and (filter is None or mask is not None)
+        if mode == "lexical" or (mode == "hybrid" and not lexical_ok):
+            mode = "lexical" if lexical_ok else "vector"
+        return mode
+
+    def _vector_search(self, query: str, k: int, filter=None, mask=None) -> List[Document]:
+        if not self._use_mmap(filter, mask) and not self._has_documents():
+            return []  # 데이터가 없는 경우 검색 생략 (에러 방지)
+        return self._search_by_vector(self.embedding_function.embed_query(query), k, filter, mask)
+
+    async def _avector_search(self, query: str, k: int, filter=None, mask=None) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        if self._wants_mmap() and not self._vector_index_checked:
+            await loop.run_in_executor(_vector_pool, self._ensure_vector_index)  # 첫 로드는 루프 밖에서
+        if not self._use_mmap(filter, mask) and not await loop.run_in_executor(_vector_pool, self._has_documents):
             return []
+        vector = await self.embedding_function.aembed_query(query)
+        return await loop.run_in_executor(_vector_pool, self._search_by_vector, vector, k, filter, mask)
+
+    def _search_by_vector(self, vector: List[float], k: int, filter=None, mask=None) -> List[Document]:
+        # mmap 백엔드(또는 스냅샷): 조건은 mask로만 적용 가능 (Chroma 필터만 있으면 Chroma로 검색)
+        if self._use_mmap(filter, mask):
+            metas = food_lexical_index.metas
+            return [
+                Document(page_content=build_page_content(metas[row]), metadata=metas[row])
+                for row, _ in food_vector_index.search(vector, k, mask=mask)
+            ]
+        if filter:
+            return self.db.similarity_search_by_vector(vector, k=k, filter=filter)
+        return self.db.similarity_search_by_vector(vector, k=k)
+
+    def _wants_mmap(self) -> bool:
+        return FOOD_VECTOR_BACKEND == "mmap" or self.snapshot_manifest is not None
+
+    def _use_mmap(self, filter, mask) -> bool:
+        return self._wants_mmap() and (filter is None or mask is not None) and self._ensure_vector_index()
+
+    def _has_documents(self) -> bool:
+        """
+        컬렉션에 문서가 있는지 (검색마다 count()를 호출하지 않도록 캐시)
+        한 번 있으면 계속 True, 비어 있으면 FOOD_EMPTY_RECHECK_S마다 다시 확인. 적재/초기화 시 무효화
+        """
+        if self._ready is True:
+            return True
+        now = time.monotonic()
+        if self._ready is False and now - self._ready_checked_at < FOOD_EMPTY_RECHECK_S:
+            return False
+        self._ready = self.db._collection.count() > 0
+        self._ready_checked_at = now
+        return self._ready
+
+    def _ensure_vector_index(self) -> bool:
+        """mmap 색인을 처음 한 번 로드 (없거나 실패하면 Chroma로 검색)"""
+        if self._vector_index_checked:
+            return food_vector_index.loaded
+        with self._vector_index_lock:
+            if not self._vector_index_checked:
+                try:
+                    self.ensure_lookup_indexes()
+                    if food_vector_index.load():
+                        food_vector_index.align(nutrition_table.ids)
+                    else:
+                        print(f"⚠️ mmap 벡터 색인이 없습니다 ({food_vector_index.directory}). Chroma로 검색합니다.")
+                except Exception as e:
+                    print(f"⚠️ mmap 벡터 색인 로드 실패, Chroma로 검색합니다: {e}")
+                self._vector_index_checked = True
+        return food_vector_index.loaded
+
+    def _lexical_search(self, query: str, k: int, mask=None) -> List[Document]:
+        return [
+            Document(page_content=build_page_content(meta), metadata=meta)
+            for meta, _ in food_lexical_index.search(query, k=k, mask=mask)
+        ]
 
 class ToolVectorStore:
     def __init__(self):
-        self.embedding_function = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_API_BASE")
-        )
+        from langchain_chroma import Chroma
+
+        self.embedding_function = get_embeddings()
         
         self.db = Chroma(
             persist_directory=PERSIST_DIRECTORY,
@@ -201,6 +564,16 @@ class ToolVectorStore:
     def search_tools(self, query: str, k=3):
         return self.db.similarity_search(query, k=k)
 
+    async def asearch_tools(self, query: str, k=3):
+        """쿼리 임베딩은 비동기 클라이언트로, ANN 검색은 스레드 풀에서 실행"""
+        vector = await self.embedding_function.aembed_query(query)
+        return await asyncio.get_running_loop().run_in_executor(
+            _vector_pool, lambda: self.db.similarity_search_by_vector(vector, k=k)
+        )
+
+    async def aall_tools_docs(self):
+        return await asyncio.get_running_loop().run_in_executor(_vector_pool, self.all_tools_docs)
+
     def all_tools_docs(self):
         """저장된 모든 도구 문서를 반환합니다."""
         res = self.db.get()
@@ -213,5 +586,6 @@ class ToolVectorStore:
             ))
         return docs
 
-food_store = FoodVectorStore()
-tool_store = ToolVectorStore()
+# 첫 사용 시 생성 (import만으로 Chroma/OpenAI 클라이언트를 만들지 않음)
+food_store = LazyProxy(FoodVectorStore)
+tool_store = LazyProxy(ToolVectorStore)
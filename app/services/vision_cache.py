@@ -0,0 +1,188 @@
+# 이미지 분석 결과 캐시 (콘텐츠 주소 기반)
+# 같은 사진이 재업로드(재시도, 백엔드 재전송 등)되면 모델을 다시 돌리지 않고 즉시 반환합니다.
+
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from PIL import Image
+from app.schemas.dtos import FoodAnalysisResponse
+
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "1") == "1"
+VISION_CACHE_MAX_ENTRIES = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "1024"))
+VISION_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL", "86400"))  # 초
+VISION_CACHE_DIR = os.getenv("VISION_CACHE_DIR", "")  # 비어 있으면 디스크 캐시 미사용
+# 지각 해시(dHash) 허용 해밍 거리. 음수면 유사 이미지 매칭 비활성화
+VISION_CACHE_PHASH_DISTANCE = int(os.getenv("VISION_CACHE_PHASH_DISTANCE", "-1"))
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64비트 dHash: 9x8 흑백 축소 후 인접 픽셀 밝기 비교"""
+    small = image.convert("L").resize((9, 8), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()  # "L" 모드: 픽셀당 1바이트, 행 우선
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+@dataclass
+class CacheKey:
+    digest: str
+    phash: Optional[int] = None
+    variant: str = ""
+
+
+class VisionResultCache:
+    """
+    2단 캐시 (메모리 LRU + 선택적 디스크)
+    - 키: 전처리된 이미지 픽셀의 SHA-256 (+ variant: 프롬프트/모델 버전 등)
+    - 선택적으로 dHash 해밍 거리로 거의 같은 이미지도 매칭 (메모리 계층만, 같은 variant의 항목끼리만)
+    - LRU 용량 제한 + TTL 만료
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VISION_CACHE_MAX_ENTRIES,
+        ttl: float = VISION_CACHE_TTL,
+        cache_dir: str = VISION_CACHE_DIR,
+        phash_distance: int = VISION_CACHE_PHASH_DISTANCE,
+        enabled: bool = VISION_CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.phash_distance = phash_distance
+        # digest -> (만료 시각, variant, phash, 결과)
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[int], dict]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+        if self.enabled and self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, image: Image.Image, variant: str = "") -> CacheKey:
+        hasher = hashlib.sha256()
+        hasher.update(f"{variant}|{image.mode}|{image.size[0]}x{image.size[1]}|".encode())
+        hasher.update(image.tobytes())
+        phash = perceptual_hash(image) if self.phash_distance >= 0 else None
+        return CacheKey(digest=hasher.hexdigest(), phash=phash, variant=variant)
+
+    def lookup(self, image: Image.Image, variant: str = "") -> Tuple[CacheKey, Optional[FoodAnalysisResponse]]:
+        """(키, 캐시된 결과 또는 None)을 반환합니다. 키는 miss 시 store()에 다시 넘겨주세요."""
+        if not self.enabled:
+            return CacheKey(digest=""), None
+
+        key = self.make_key(image, variant)
+        value = self._get_memory(key.digest)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return key, FoodAnalysisResponse(**value)
+
+        value = self._get_disk(key.digest)
+        if value is not None:
+            self.stats["disk_hits"] += 1
+            self._put_memory(key, value)
+            return key, FoodAnalysisResponse(**value)
+
+        value = self._get_near(key)
+        if value is not None:
+            self.stats["near_hits"] += 1
+            return key, FoodAnalysisResponse(**value)
+
+        self.stats["misses"] += 1
+        return key, None
+
+    def store(self, key: CacheKey, result: FoodAnalysisResponse):
+        if not self.enabled or not key.digest:
+            return
+        value = result.model_dump()
+        self._put_memory(key, value)
+        self._put_disk(key.digest, value)
+
+    # --- 메모리 계층 ---
+    def _get_memory(self, digest: str) -> Optional[dict]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, _, _, value = entry
+        if expires_at < time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return value
+
+    def _get_near(self, key: CacheKey) -> Optional[dict]:
+        if key.phash is None:
+            return None
+        now = time.time()
+        best, best_distance = None, self.phash_distance + 1
+        for digest, (expires_at, variant, phash, _) in self._entries.items():
+            # 모드/라벨/어댑터/프롬프트가 다른 결과는 이미지가 비슷해도 재사용하지 않음
+            if variant != key.variant or phash is None or expires_at < now:
+                continue
+            distance = (phash ^ key.phash).bit_count()
+            if distance < best_distance:
+                best, best_distance = digest, distance
+        if best is None:
+            return None
+        self._entries.move_to_end(best)
+        return self._entries[best][3]
+
+    def _put_memory(self, key: CacheKey, value: dict):
+        self._entries[key.digest] = (time.time() + self.ttl, key.variant, key.phash, value)
+        self._entries.move_to_end(key.digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # --- 디스크 계층 ---
+    def _disk_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _get_disk(self, digest: str) -> Optional[dict]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("result")
+
+    def _put_disk(self, digest: str, value: dict):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": time.time() + self.ttl, "result": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 비전 캐시 디스크 저장 실패 (무시): {e}")
+
+    def snapshot(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["near_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+vision_cache = VisionResultCache()
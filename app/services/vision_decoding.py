@@ -0,0 +1,282 @@
+# 음식명 JSON 제약 디코딩 (Constrained Decoding)
+# 모델이 {"best_candidate": ..., "candidates": [...]} 구조 밖의 토큰을 만들지 못하게 막고,
+# 닫는 괄호가 나오면 바로 종료시켜 불필요한 디코딩 스텝과 JSON 파싱 실패를 없앱니다.
+
+import os
+import threading
+import torch
+from typing import Dict, Iterator, List, Optional
+from transformers import LogitsProcessor, LogitsProcessorList
+from app.core.food_data import load_food_names
+
+# free(기존 자유 생성) | json(구조만 강제) | trie(구조 + 음식명을 CSV 사전으로 제한)
+VISION_DECODING = os.getenv("VISION_DECODING", "free").lower()
+# trie 모드에서 사용할 CSV (기본: 일반 음식 400종)
+VISION_TRIE_SOURCES = [s.strip() for s in os.getenv("VISION_TRIE_SOURCES", "general").split(",") if s.strip()]
+CONSTRAINED_MAX_NEW_TOKENS = int(os.getenv("VISION_CONSTRAINED_MAX_NEW_TOKENS", "96"))
+MAX_NAME_BYTES = 60  # 음식명 최대 길이 (한글 약 20자)
+NUM_CANDIDATES = 3
+
+NAME = None  # 템플릿에서 음식명이 들어갈 자리
+_TRIE_END = -1
+# 음식명 안에 들어갈 수 없는 바이트 (따옴표, 역슬래시, 괄호, 제어문자)
+_FORBIDDEN_NAME_BYTES = frozenset(b'"\\{}[]') | frozenset(range(0x20))
+
+
+def _build_template(num_candidates: int) -> list:
+    parts = [b'{"best_candidate": "', NAME, b'", "candidates": ["', NAME]
+    for _ in range(num_candidates - 1):
+        parts += [b'", "', NAME]
+    parts.append(b'"]}')
+    return parts
+
+JSON_TEMPLATE = _build_template(NUM_CANDIDATES)
+
+
+def _is_name_safe(data: bytes) -> bool:
+    return not any(b in _FORBIDDEN_NAME_BYTES for b in data)
+
+
+def _utf8_pending(data: bytes) -> int:
+    """마지막 글자를 완성하려면 더 필요한 바이트 수 (0: 완성, -1: 잘못된 UTF-8)"""
+    try:
+        data.decode("utf-8")
+        return 0
+    except UnicodeDecodeError as e:
+        if e.reason != "unexpected end of data":
+            return -1
+        lead = data[e.start]
+        return (2 if lead < 0xE0 else 3 if lead < 0xF0 else 4) - (len(data) - e.start)
+
+
+class TokenVocabulary:
+    """토크나이저의 각 토큰을 실제 바이트열로 변환한 테이블 (byte-level BPE 기준)"""
+
+    def __init__(self, tokenizer):
+        from transformers.models.gpt2.tokenization_gpt2 import bytes_to_unicode
+        byte_decoder = {ch: b for b, ch in bytes_to_unicode().items()}
+        special_ids = set(tokenizer.all_special_ids) | set(tokenizer.get_added_vocab().values())
+
+        token_bytes: List[Optional[bytes]] = []
+        tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+        for token_id, token in enumerate(tokens):
+            data = None
+            if token is not None and token_id not in special_ids:
+                try:
+                    data = bytes(byte_decoder[ch] for ch in token)
+                except KeyError:
+                    data = None
+            token_bytes.append(data)
+        self._index_tokens(token_bytes)
+
+    def _index_tokens(self, token_bytes: List[Optional[bytes]]):
+        self.token_bytes = token_bytes
+        self.bytes_to_ids: Dict[bytes, List[int]] = {}
+        name_ids, name_start_ids, whole_ids, whole_lengths = [], [], [], []
+        self.continuation_ids: List[int] = []
+        for token_id, data in enumerate(token_bytes):
+            if not data:
+                continue
+            self.bytes_to_ids.setdefault(data, []).append(token_id)
+            if _is_name_safe(data):
+                name_ids.append(token_id)
+                if not data.startswith(b" "):
+                    name_start_ids.append(token_id)
+                if _utf8_pending(data) == 0:
+                    whole_ids.append(token_id)  # 글자 경계에서 시작해 글자 경계에서 끝나는 토큰
+                    whole_lengths.append(len(data))
+                if 0x80 <= data[0] < 0xC0:
+                    self.continuation_ids.append(token_id)  # 앞 토큰의 글자를 이어서 완성하는 토큰
+
+        self.name_ids = torch.tensor(name_ids, dtype=torch.long)
+        self.name_start_ids = torch.tensor(name_start_ids, dtype=torch.long)
+        self.whole_char_ids = torch.tensor(whole_ids, dtype=torch.long)
+        self.whole_char_lengths = torch.tensor(whole_lengths, dtype=torch.long)
+        self.max_token_bytes = max(len(data) for data in self.bytes_to_ids)
+
+    def prefix_ids(self, text: bytes) -> List[int]:
+        """text의 접두사(1바이트 이상)와 정확히 일치하는 토큰 id 목록"""
+        ids = []
+        for end in range(1, min(len(text), self.max_token_bytes) + 1):
+            ids.extend(self.bytes_to_ids.get(text[:end], ()))
+        return ids
+
+
+class NameTrie:
+    """음식명 바이트 트라이 (UTF-8 기준)"""
+
+    def __init__(self, names: List[str]):
+        self.root: dict = {}
+        self.size = 0
+        for name in names:
+            data = name.encode("utf-8")
+            if not data or len(data) > MAX_NAME_BYTES or not _is_name_safe(data):
+                continue
+            node = self.root
+            for b in data:
+                node = node.setdefault(b, {})
+            node[_TRIE_END] = True
+            self.size += 1
+
+    def walk(self, prefix: bytes) -> Optional[dict]:
+        node = self.root
+        for b in prefix:
+            node = node.get(b)
+            if node is None:
+                return None
+        return node
+
+    def continuations(self, node: dict, closing: bytes, max_len: int) -> Iterator[bytes]:
+        """node에서 이어질 수 있는 바이트열 (이름이 끝나는 지점에서는 closing 리터럴까지 포함)"""
+        stack = [(node, b"")]
+        while stack:
+            current, path = stack.pop()
+            if path:
+                yield path
+            if _TRIE_END in current:
+                for end in range(1, min(len(closing), max_len - len(path)) + 1):
+                    yield path + closing[:end]
+            if len(path) >= max_len:
+                continue
+            for b, child in current.items():
+                if b != _TRIE_END:
+                    stack.append((child, path + bytes([b])))
+
+
+class FoodJsonLogitsProcessor(LogitsProcessor):
+    """
+    생성된 바이트열을 JSON 템플릿에 맞춰 보고, 다음에 올 수 있는 토큰만 남깁니다.
+    - 고정 리터럴 구간: 리터럴의 접두사와 일치하는 토큰만 허용
+    - 음식명 구간: 따옴표/괄호가 없는 토큰 (trie가 있으면 사전에 있는 이름으로만)
+    - 템플릿 완료 후: EOS만 허용 -> 즉시 종료
+    """
+
+    def __init__(self, vocab: TokenVocabulary, prompt_length: int, eos_token_ids: List[int],
+                 trie: Optional[NameTrie] = None, template: list = JSON_TEMPLATE):
+        self.vocab = vocab
+        self.prompt_length = prompt_length
+        self.eos_token_ids = eos_token_ids
+        self.trie = trie
+        self.template = template
+        self._device_ids = {}
+
+    def _on_device(self, name: str, device) -> torch.Tensor:
+        key = (name, str(device))
+        if key not in self._device_ids:
+            self._device_ids[key] = getattr(self.vocab, name).to(device)
+        return self._device_ids[key]
+
+    def _locate(self, data: bytes):
+        """템플릿에서 현재 위치: ("lit", 남은 리터럴) | ("name", 작성 중인 이름, 다음 리터럴) | ("done",)"""
+        pos = 0
+        for index, segment in enumerate(self.template):
+            if segment is NAME:
+                end = data.find(b'"', pos)
+                if end == -1:
+                    return ("name", data[pos:], self.template[index + 1])
+                pos = end  # 닫는 따옴표는 다음 리터럴의 시작
+            else:
+                consumed = data[pos:pos + len(segment)]
+                if len(consumed) < len(segment):
+                    return ("lit", segment[len(consumed):])
+                pos += len(segment)
+        return ("done",)
+
+    def _allowed(self, generated: List[int], device):
+        token_bytes = [self.vocab.token_bytes[i] if i < len(self.vocab.token_bytes) else None for i in generated]
+        if any(data is None for data in token_bytes):
+            # EOS 등 특수 토큰이 이미 나왔으면 종료 상태
+            return self.eos_token_ids
+        state = self._locate(b"".join(token_bytes))
+
+        if state[0] == "done":
+            return self.eos_token_ids
+        if state[0] == "lit":
+            return self.vocab.prefix_ids(state[1]) or self.eos_token_ids
+
+        partial, closing = state[1], state[2]
+        if self.trie is not None:
+            node = self.trie.walk(partial)
+            if node is None:
+                return self.vocab.prefix_ids(closing)
+            ids = []
+            for text in self.trie.continuations(node, closing, self.vocab.max_token_bytes):
+                ids.extend(self.vocab.bytes_to_ids.get(text, ()))
+            return ids or self.vocab.prefix_ids(closing)
+
+        if not partial:
+            return self._on_device("name_start_ids", device)
+        pending = _utf8_pending(partial)
+        remaining = MAX_NAME_BYTES - len(partial)
+        # 글자가 완성된 경우에만 닫기 허용 (이미 깨진 바이트열은 이어 가도 복구되지 않으므로 닫기도 허용)
+        closing_ids = self.vocab.prefix_ids(closing) if pending <= 0 else []
+        if remaining <= 0 or (pending < 0 and remaining < self.vocab.max_token_bytes):
+            return closing_ids or self.vocab.prefix_ids(closing)
+        if remaining >= self.vocab.max_token_bytes + 3:
+            # 어떤 토큰 뒤에도 글자를 완성할 3바이트가 남음 -> 길이 제한 불필요
+            name_ids = self._on_device("name_ids", device)
+        elif pending == 0:
+            # 최대 길이 근처: 상한 안에 들어가는 완성된 글자 토큰만 (닫는 따옴표가 글자 중간에 오지 않도록)
+            lengths = self._on_device("whole_char_lengths", device)
+            name_ids = self._on_device("whole_char_ids", device)[lengths <= remaining]
+        else:
+            # 글자 중간: 상한 안에서 그 글자를 완성할 수 있는 이어지는 토큰만
+            token_bytes = self.vocab.token_bytes
+            name_ids = torch.tensor([
+                token_id for token_id in self.vocab.continuation_ids
+                if len(token_bytes[token_id]) <= remaining
+                and 0 <= _utf8_pending(partial + token_bytes[token_id]) <= remaining - len(token_bytes[token_id])
+            ], dtype=torch.long, device=device)
+        if not closing_ids:
+            return name_ids if len(name_ids) else self.vocab.prefix_ids(closing)
+        return torch.cat([name_ids, torch.tensor(closing_ids, dtype=torch.long, device=device)])
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        mask = torch.full_like(scores, float("-inf"))
+        for row in range(input_ids.shape[0]):
+            allowed = self._allowed(input_ids[row, self.prompt_length:].tolist(), scores.device)
+            if not isinstance(allowed, torch.Tensor):
+                allowed = torch.tensor(allowed, dtype=torch.long, device=scores.device)
+            mask[row, allowed[allowed < scores.shape[-1]]] = 0
+        return scores + mask
+
+
+_lock = threading.Lock()
+_vocabulary: Optional[TokenVocabulary] = None
+_name_trie: Optional[NameTrie] = None
+
+
+def _get_vocabulary(tokenizer) -> TokenVocabulary:
+    global _vocabulary
+    with _lock:
+        if _vocabulary is None:
+            _vocabulary = TokenVocabulary(tokenizer)
+        return _vocabulary
+
+
+def _get_name_trie() -> Optional[NameTrie]:
+    global _name_trie
+    with _lock:
+        if _name_trie is None:
+            _name_trie = NameTrie(load_food_names(VISION_TRIE_SOURCES))
+            print(f"🌳 음식명 트라이 구성 완료: {_name_trie.size}개")
+        return _name_trie if _name_trie.size else None
+
+
+def _eos_token_ids(model, tokenizer) -> List[int]:
+    eos = getattr(model.generation_config, "eos_token_id", None) or tokenizer.eos_token_id
+    return list(eos) if isinstance(eos, (list, tuple)) else [eos]
+
+
+def constrained_generate_kwargs(model, processor, prompt_length: int, mode: str = VISION_DECODING) -> dict:
+    """generate()에 넘길 추가 인자. free 모드면 빈 dict."""
+    if mode not in ("json", "trie"):
+        return {}
+    tokenizer = processor.tokenizer
+    logits_processor = FoodJsonLogitsProcessor(
+        _get_vocabulary(tokenizer),
+        prompt_length,
+        _eos_token_ids(model, tokenizer),
+        trie=_get_name_trie() if mode == "trie" else None,
+    )
+    return {"logits_processor": LogitsProcessorList([logits_processor]), "max_new_tokens": CONSTRAINED_MAX_NEW_TOKENS}
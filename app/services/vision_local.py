@@ -0,0 +1,228 @@
+# 이 프로세스의 모델로 이미지 분석 (VISION_BACKEND=local, 분리 추론 서버 프로세스)
+# torch/transformers/peft/qwen_vl_utils를 import하므로 remote 백엔드의 API 워커는 이 모듈을 로드하지 않습니다.
+# (라우터 진입점은 app/services/vision_service.py)
+
+import os
+import json
+import time
+import hashlib
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from qwen_vl_utils import process_vision_info
+from app.core.ai_model import (
+    load_model, get_model_instance, registered_adapters, resolve_adapter, rope_deltas_guard, use_adapter,
+)
+from app.core.inference_executor import inference_executor
+from app.schemas.dtos import FoodAnalysisResponse
+from app.services.vision_scheduler import VisionBatchScheduler
+from app.services.vision_cache import vision_cache
+from app.services.vision_decoding import VISION_DECODING, constrained_generate_kwargs
+from app.services.vision_scoring import classify_food_image, default_labels, normalize_labels
+from app.services.vision_prefix_cache import prefix_cache
+from app.services.vision_preprocess import image_content, preprocess_executor
+from app.services.vision_service import ANALYSIS_MODES, ImageAnalyzer
+
+# 프롬프트 (JSON 포맷 강제 + 한국어 전문가 페르소나)
+PROMPT_TEXT = """
+    당신은 한국 음식 전문가입니다. 제공된 이미지를 분석하세요.
+    
+    질문: 이 음식의 이름은 무엇인가요?
+    
+    답변 조건:
+    1. 반드시 '한국어'로 음식 이름을 답하세요. (예: Kimchi Stew -> 김치찌개)
+    2. 가장 가능성이 높은 음식 1개와, 헷갈리는 후보 2개를 포함하세요.
+    3. 설명이나 마크다운(```json) 없이 오직 아래 JSON 데이터만 반환하세요.
+    
+    {
+        "best_candidate": "가장 확실한 음식명",
+        "candidates": ["후보1", "후보2", "후보3"]
+    }
+    """
+
+MAX_NEW_TOKENS = 256
+
+# 프롬프트가 바뀌면 이전 캐시 결과를 재사용하지 않도록 캐시 키에 포함
+RESULT_CACHE_VARIANT = hashlib.sha1(
+    f"{PROMPT_TEXT}|{MAX_NEW_TOKENS}|{VISION_DECODING}|{prefix_cache.enabled}".encode()
+).hexdigest()[:12]
+
+def build_messages(image: Image.Image) -> list:
+    """Qwen 채팅 템플릿용 메시지 구성"""
+    content = [
+        image_content(image),
+        {"type": "text", "text": PROMPT_TEXT},
+    ]
+    if prefix_cache.enabled:
+        # 접두사 KV 캐시 사용 시 고정 지시문을 이미지 앞에 배치 (캐시 가능한 구간 최대화)
+        content.reverse()
+    return [{"role": "user", "content": content}]
+
+def parse_food_output(output_text: str) -> FoodAnalysisResponse:
+    """모델 출력 텍스트를 FoodAnalysisResponse로 변환"""
+    # (1) 먼저 마크다운 기호(```json) 등을 제거하여 'clean_text'를 만듭니다.
+    clean_text = output_text.replace("```json", "").replace("```", "").strip()
+
+    try:
+        # (2) AI가 말을 잘 들어서 JSON 형태일 경우
+        data = json.loads(clean_text)
+        return FoodAnalysisResponse(**data)
+        
+    except json.JSONDecodeError:
+        # (3) AI가 학습된 본능대로 단답형("닭갈비")만 뱉었을 경우 -> 이게 정답입니다.
+        print(f"💡 JSON 파싱 실패 (단답형 응답 감지): {clean_text}")
+        
+        # 혹시 모를 줄바꿈이나 공백 제거 후 첫 줄만 가져오기
+        final_answer = clean_text.split('\n')[0].strip()
+        
+        return FoodAnalysisResponse(
+            best_candidate=final_answer,     # 예: "닭갈비"
+            candidates=[final_answer]        # 후보 리스트에도 넣어줌
+        )
+
+def _generate(model, processor, device, inputs, adapter: Optional[str]):
+    """(접두사 캐시 prefill +) generate -> (생성 토큰, 프롬프트 길이)"""
+    # prefill이 설정한 rope_deltas를 generate가 읽으므로 두 단계를 한 구간으로 직렬화
+    # (run_vision_batch의 use_adapter 안에서 호출됨 -> 가드는 어댑터 락을 다시 잡지 않음)
+    with rope_deltas_guard(model):
+        return _generate_locked(model, processor, device, inputs, adapter)
+
+def _generate_locked(model, processor, device, inputs, adapter: Optional[str]):
+    # 고정 접두사 KV 캐시 재사용 (VISION_PREFIX_CACHE=1): 이미지 이후 구간만 prefill
+    # 어댑터마다 KV 값이 다르므로 캐시도 어댑터별로 보관
+    generate_inputs = inputs
+    if prefix_cache.enabled:
+        prepared = prefix_cache.prefill(model, processor, device, inputs, key=adapter or "default")
+        if prepared is not None:
+            input_ids, attention_mask, past_key_values = prepared
+            generate_inputs = {"input_ids": input_ids, "attention_mask": attention_mask, "past_key_values": past_key_values}
+    prompt_length = generate_inputs["input_ids"].shape[1]
+
+    # VISION_DECODING=json|trie 이면 JSON 구조를 강제하고 닫는 괄호에서 바로 종료
+    generate_kwargs = {"max_new_tokens": MAX_NEW_TOKENS}
+    generate_kwargs.update(constrained_generate_kwargs(model, processor, prompt_length))
+    return model.generate(**generate_inputs, **generate_kwargs), prompt_length
+
+def run_vision_batch(model, processor, device, images: List[Image.Image], adapter: Optional[str] = None) -> List[FoodAnalysisResponse]:
+    """
+    여러 이미지를 하나의 패딩된 배치로 묶어 한 번의 generate로 추론합니다.
+    (추론 실행기의 워커 스레드에서 호출되며, 결과 순서는 입력 순서와 같습니다.)
+    adapter: 사용할 LoRA 어댑터 이름 (다중 어댑터 서빙 시, 배치 단위로 전환)
+    """
+    # 1. Qwen 입력 데이터 생성
+    texts, image_inputs = [], []
+    for image in images:
+        messages = build_messages(image)
+        texts.append(processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True))
+        batch_images, _ = process_vision_info(messages)
+        image_inputs.extend(batch_images)
+
+    inputs = processor(
+        text=texts,
+        images=image_inputs,
+        padding=True,
+        return_tensors="pt",
+    )
+    
+    # 데이터를 장치(MPS/CUDA/CPU)로 이동
+    inputs = inputs.to(device)
+
+    # 2. 추론 (Inference)
+    with use_adapter(model, adapter):
+        generated_ids, prompt_length = _generate(model, processor, device, inputs, adapter)
+    
+    # 3. 결과 디코딩 (왼쪽 패딩이므로 입력 길이는 배치 내에서 동일)
+    generated_ids_trimmed = [out_ids[prompt_length:] for out_ids in generated_ids]
+    output_texts = processor.batch_decode(
+        generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
+    )
+
+    # 4. JSON 파싱
+    return [parse_food_output(text) for text in output_texts]
+
+async def _run_batch_in_executor(images: List[Image.Image], adapter: Optional[str]) -> List[FoodAnalysisResponse]:
+    # 동기 generate/batch_decode는 이벤트 루프 밖(추론 전용 스레드)에서 실행
+    return await inference_executor.run_with_model(run_vision_batch, images, adapter)
+
+def _classify_with_adapter(model, processor, device, image: Image.Image, labels: List[str], adapter: str) -> FoodAnalysisResponse:
+    with use_adapter(model, adapter):
+        return classify_food_image(model, processor, device, image, labels)
+
+VISION_WARMUP = os.getenv("VISION_WARMUP", "1") == "1"
+
+def warmup_vision():
+    """
+    실제 요청과 같은 경로로 한 번씩 생성해 둡니다. (어댑터별)
+    CUDA 커널/메모리 풀, 접두사 KV 캐시, 제약 디코딩 사전이 첫 사용자 요청 전에 준비됩니다.
+    """
+    model, processor, device = get_model_instance()
+    image = Image.new("RGB", (448, 448), (200, 160, 120))
+    for adapter in registered_adapters():
+        started = time.perf_counter()
+        run_vision_batch(model, processor, device, [image], adapter)
+        print(f"🔥 워밍업 생성 완료 ({adapter}: {time.perf_counter() - started:.2f}s)")
+
+def prepare_vision():
+    """모델 로드 + 워밍업 (서버 시작 시 스레드에서 실행)"""
+    load_model()
+    if VISION_WARMUP:
+        warmup_vision()
+
+# 스케줄러는 같은 어댑터 요청끼리만 배치로 묶음 (group=어댑터 이름)
+vision_scheduler = VisionBatchScheduler(_run_batch_in_executor)
+adapter_requests: Dict[str, int] = {}  # 어댑터별 처리 요청 수 (A/B 비교용)
+
+def _resolve_mode(mode: str, labels: Optional[List[str]]) -> Tuple[str, Optional[List[str]]]:
+    """분석 모드 검증 + 결과 캐시 variant 계산 -> (variant, 정규화된 labels)"""
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"지원하지 않는 분석 모드입니다: {mode}")
+    if mode != "classify":
+        return RESULT_CACHE_VARIANT, None
+    labels = normalize_labels(labels or default_labels())
+    if not labels:
+        raise ValueError("분류할 후보 라벨이 없습니다.")
+    return hashlib.sha1("|".join(["classify", *labels]).encode()).hexdigest()[:12], labels
+
+def _adapter_variant(variant: str, adapter: str) -> str:
+    """어댑터(이름 + 가중치 해시)가 다르면 결과 캐시도 분리"""
+    fingerprint = registered_adapters().get(adapter) or ""
+    return hashlib.sha1(f"{variant}|{adapter}|{fingerprint}".encode()).hexdigest()[:12]
+
+async def _analyze_image(image: Image.Image, mode: str, variant: str, labels: Optional[List[str]], adapter: str) -> FoodAnalysisResponse:
+    # 결과 캐시 확인 (같은 이미지 재업로드 시 즉시 반환)
+    cache_key, cached = vision_cache.lookup(image, _adapter_variant(variant, adapter))
+    if cached is not None:
+        return cached
+
+    adapter_requests[adapter] = adapter_requests.get(adapter, 0) + 1
+    # A. 분류 모드: 단일 prefill + 라벨 배치 점수화
+    if mode == "classify":
+        result = await inference_executor.run_with_model(_classify_with_adapter, image, labels, adapter)
+    # B. 생성 모드: 스케줄러에 제출 -> 같은 어댑터의 동시 요청과 함께 배치 추론
+    else:
+        result = await vision_scheduler.submit(image, group=adapter)
+    result = result.model_copy(update={"adapter": adapter})
+    vision_cache.store(cache_key, result)
+    return result
+
+def local_analyzer(mode: str, labels: Optional[List[str]], adapter: Optional[str]) -> ImageAnalyzer:
+    """이 프로세스의 모델로 분석하는 함수 (모드/라벨/어댑터는 여기서 한 번만 확정)"""
+    variant, labels = _resolve_mode(mode, labels)
+    # 모델 준비 상태 확인 (미로딩 시 즉시 에러) + 어댑터 선택
+    get_model_instance()
+    adapter = resolve_adapter(adapter)
+    return partial(_analyze_image, mode=mode, variant=variant, labels=labels, adapter=adapter)
+
+def local_metrics() -> dict:
+    """이 프로세스의 배치 스케줄러 / 추론 실행기 / 결과 캐시 / 어댑터 지표"""
+    return {
+        "scheduler": {**vision_scheduler.metrics.snapshot(), "pending": vision_scheduler.pending},
+        "executor": inference_executor.snapshot(),
+        "preprocess": preprocess_executor.snapshot(),
+        "cache": vision_cache.snapshot(),
+        "prefix_cache": prefix_cache.snapshot(),
+        "adapters": {
+            name: {"sha256": (fingerprint or "")[:12], "requests": adapter_requests.get(name, 0)}
+            for name, fingerprint in registered_adapters().items()
+        },
+    }
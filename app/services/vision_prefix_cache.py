@@ -0,0 +1,124 @@
+# 고정 프롬프트 접두사(KV 캐시) 재사용
+# 시스템 프롬프트 + 한국어 지시문은 모든 요청에서 동일하므로, 지시문을 이미지보다 앞에 두고
+# 그 구간의 key/value 캐시를 한 번만 계산해 재사용합니다. 요청마다 prefill은 이미지 이후 구간만 수행합니다.
+
+import os
+import copy
+import threading
+import torch
+from typing import Dict, List, Optional, Tuple
+from app.core.ai_model import rope_deltas_owners
+
+VISION_PREFIX_CACHE = os.getenv("VISION_PREFIX_CACHE", "0") == "1"
+
+
+class PrefixKVCache:
+    """
+    모델(어댑터)별 고정 접두사 토큰과 그 KV 캐시를 보관합니다.
+    배치의 각 행을 [접두사][패딩][이미지+나머지] 순서로 재배치한 뒤,
+    접두사 캐시를 복제해 나머지 구간만 prefill 합니다.
+    """
+
+    def __init__(self, enabled: bool = VISION_PREFIX_CACHE):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[List[int], object]] = {}
+        self.stats = {"hits": 0, "fallbacks": 0, "prefix_tokens": 0, "saved_tokens": 0}
+
+    @staticmethod
+    def _prefix_ids(row_ids: List[int], vision_start_id: int) -> Optional[List[int]]:
+        """이미지 시작 토큰 직전까지가 고정 접두사"""
+        if vision_start_id not in row_ids:
+            return None
+        return row_ids[:row_ids.index(vision_start_id)]
+
+    def _get_or_build(self, model, key: str, prefix_ids: List[int], device):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            ids = torch.tensor([prefix_ids], dtype=torch.long, device=device)
+            # 텍스트 전용 구간이므로 mrope 3축 위치가 모두 0..P-1
+            position_ids = torch.arange(len(prefix_ids), device=device).view(1, 1, -1).expand(3, 1, -1)
+            with torch.inference_mode():
+                outputs = model(
+                    input_ids=ids,
+                    attention_mask=torch.ones_like(ids),
+                    position_ids=position_ids,
+                    use_cache=True,
+                )
+            entry = (prefix_ids, outputs.past_key_values)
+            self._entries[key] = entry
+            self.stats["prefix_tokens"] = len(prefix_ids)
+            print(f"🧠 프롬프트 접두사 KV 캐시 생성: {len(prefix_ids)} 토큰 (key={key})")
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def prefill(self, model, processor, device, inputs, key: str = "default"):
+        """
+        배치 입력의 접두사 이후 구간만 prefill 합니다.
+        반환: (input_ids, attention_mask, past_key_values) -> generate()에 그대로 전달
+              접두사가 일치하지 않으면 None (호출 측에서 일반 경로 사용)
+        모델의 rope_deltas를 설정하므로, 호출 측은 rope_deltas_guard(model) 안에서 generate까지 실행해야 합니다.
+        """
+        tokenizer = processor.tokenizer
+        vision_start_id = tokenizer.convert_tokens_to_ids("<|vision_start|>")
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+
+        rows = [ids[mask.bool()].tolist() for ids, mask in zip(inputs.input_ids, inputs.attention_mask)]
+        prefix_ids = self._prefix_ids(rows[0], vision_start_id)
+        if not prefix_ids or any(row[:len(prefix_ids)] != prefix_ids for row in rows):
+            self.stats["fallbacks"] += 1
+            return None
+        # 프롬프트가 바뀌면 다른 캐시를 쓰도록 접두사 토큰 자체를 키에 포함
+        _, prefix_cache = self._get_or_build(model, f"{key}:{hash(tuple(prefix_ids))}", prefix_ids, device)
+
+        # 1. 행 재배치: [접두사][패딩][이미지 + 나머지 텍스트]
+        prefix_len = len(prefix_ids)
+        suffixes = [row[prefix_len:] for row in rows]
+        suffix_len = max(len(s) for s in suffixes)
+        total_len = prefix_len + suffix_len
+        input_ids = torch.full((len(rows), total_len), pad_id, dtype=torch.long, device=device)
+        attention_mask = torch.zeros((len(rows), total_len), dtype=torch.long, device=device)
+        input_ids[:, :prefix_len] = torch.tensor(prefix_ids, dtype=torch.long, device=device)
+        attention_mask[:, :prefix_len] = 1
+        for i, suffix in enumerate(suffixes):
+            input_ids[i, total_len - len(suffix):] = torch.tensor(suffix, dtype=torch.long, device=device)
+            attention_mask[i, total_len - len(suffix):] = 1
+
+        # 2. 전체 시퀀스 기준 mrope 위치 계산 (패딩은 attention_mask로 제외)
+        position_ids, rope_deltas = model.get_rope_index(
+            input_ids=input_ids,
+            image_grid_thw=inputs.image_grid_thw,
+            attention_mask=attention_mask,
+        )
+        for owner in rope_deltas_owners(model):
+            owner.rope_deltas = rope_deltas
+
+        # 3. 접두사 캐시 복제 후, 마지막 토큰 직전까지 prefill (마지막 토큰은 generate가 처리)
+        cache = copy.deepcopy(prefix_cache)
+        cache.batch_repeat_interleave(len(rows))
+        with torch.inference_mode():
+            model(
+                input_ids=input_ids[:, prefix_len:total_len - 1],
+                attention_mask=attention_mask[:, :total_len - 1],
+                pixel_values=inputs.pixel_values,
+                image_grid_thw=inputs.image_grid_thw,
+                position_ids=position_ids[:, :, prefix_len:total_len - 1],
+                cache_position=torch.arange(prefix_len, total_len - 1, device=device),
+                past_key_values=cache,
+                use_cache=True,
+            )
+
+        self.stats["hits"] += 1
+        self.stats["saved_tokens"] += prefix_len * len(rows)
+        return input_ids, attention_mask, cache
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled, "entries": len(self._entries), **self.stats}
+
+
+prefix_cache = PrefixKVCache()
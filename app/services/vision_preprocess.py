@@ -0,0 +1,110 @@
+# 이미지 전처리 파이프라인
+# - 업로드를 청크 단위로 읽으며 크기 제한 초과 시 즉시 거절
+# - JPEG draft 모드로 디코딩 단계에서 미리 축소 (전체 해상도 디코딩 생략)
+# - 프로세서의 픽셀 예산(28 배수, min/max pixels)에 맞춰 단 한 번만 리사이즈
+# - 디코딩/리사이즈는 이벤트 루프 밖 전처리 워커 풀에서 실행
+
+import io
+import os
+import math
+from typing import Tuple
+from PIL import Image
+from fastapi import UploadFile
+from app.core.inference_executor import InferenceExecutor
+
+MAX_IMAGE_DIMENSION = 1024
+VISION_MAX_PIXELS = int(os.getenv("VISION_MAX_PIXELS", str(MAX_IMAGE_DIMENSION * MAX_IMAGE_DIMENSION)))
+VISION_MAX_UPLOAD_BYTES = int(os.getenv("VISION_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+VISION_PREPROCESS_WORKERS = int(os.getenv("VISION_PREPROCESS_WORKERS", "2"))
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+# Qwen2.5-VL 프로세서의 픽셀 예산 상수 (qwen_vl_utils.vision_process와 동일)
+IMAGE_FACTOR = 28
+MIN_PIXELS = 4 * 28 * 28
+MAX_RATIO = 200
+
+
+class ImageTooLargeError(Exception):
+    """업로드 이미지가 VISION_MAX_UPLOAD_BYTES를 초과할 때 발생합니다."""
+
+
+async def read_upload(file: UploadFile, max_bytes: int = VISION_MAX_UPLOAD_BYTES) -> bytes:
+    """업로드 본문을 청크 단위로 읽고, 제한을 넘는 순간 중단합니다."""
+    too_large = ImageTooLargeError(f"이미지 용량이 너무 큽니다. (최대 {max_bytes // (1024 * 1024)}MB)")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    chunks, total = [], 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def smart_resize(height: int, width: int, factor: int = IMAGE_FACTOR, min_pixels: int = MIN_PIXELS,
+                 max_pixels: int = VISION_MAX_PIXELS) -> Tuple[int, int]:
+    """
+    qwen_vl_utils.vision_process.smart_resize와 같은 계산: 가로/세로를 factor 배수로 맞추고 픽셀 수를 예산 안으로
+    (그 모듈은 torch/torchvision을 import하므로, 원격 백엔드 API 워커도 쓰는 전처리에서는 직접 계산)
+    """
+    if max(height, width) / min(height, width) > MAX_RATIO:
+        raise ValueError(f"이미지 가로세로 비율이 너무 큽니다. (최대 {MAX_RATIO}:1)")
+    h_bar = max(factor, round(height / factor) * factor)
+    w_bar = max(factor, round(width / factor) * factor)
+    if h_bar * w_bar > max_pixels:
+        beta = math.sqrt((height * width) / max_pixels)
+        h_bar = math.floor(height / beta / factor) * factor
+        w_bar = math.floor(width / beta / factor) * factor
+    elif h_bar * w_bar < min_pixels:
+        beta = math.sqrt(min_pixels / (height * width))
+        h_bar = math.ceil(height * beta / factor) * factor
+        w_bar = math.ceil(width * beta / factor) * factor
+    return h_bar, w_bar
+
+
+def target_size(width: int, height: int) -> Tuple[int, int]:
+    """긴 변 MAX_IMAGE_DIMENSION 제한 후, 프로세서 픽셀 예산에 맞는 (width, height)"""
+    scale = min(1.0, MAX_IMAGE_DIMENSION / max(width, height))
+    resized_height, resized_width = smart_resize(
+        max(1, round(height * scale)),
+        max(1, round(width * scale)),
+        factor=IMAGE_FACTOR,
+        min_pixels=MIN_PIXELS,
+        max_pixels=VISION_MAX_PIXELS,
+    )
+    return resized_width, resized_height
+
+
+def preprocess_image(image_bytes: bytes) -> Image.Image:
+    """이미지 디코딩(축소 디코딩) + RGB 변환 + 최종 크기로 1회 리사이즈"""
+    image = Image.open(io.BytesIO(image_bytes))
+    size = target_size(*image.size)
+
+    # JPEG는 디코딩 시점에 1/2, 1/4, 1/8로 축소 가능 (목표 크기 이상을 유지하는 가장 작은 배율 선택)
+    if image.format == "JPEG":
+        image.draft("RGB", size)
+    image = image.convert("RGB")
+
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def image_content(image: Image.Image) -> dict:
+    """Qwen 메시지용 이미지 항목. 이미 예산에 맞춘 크기를 명시해 process_vision_info의 재계산을 생략합니다."""
+    return {"type": "image", "image": image, "resized_width": image.width, "resized_height": image.height}
+
+
+preprocess_executor = InferenceExecutor(max_workers=VISION_PREPROCESS_WORKERS, max_queue=64, name="preprocess")
+
+
+async def load_upload_image(file: UploadFile) -> Image.Image:
+    """업로드 파일 -> 전처리된 PIL 이미지 (디코딩은 전처리 워커 풀에서 실행)"""
+    image_bytes = await read_upload(file)
+    return await preprocess_executor.run(preprocess_image, image_bytes)
@@ -0,0 +1,203 @@
+# 분리된 비전 추론 서버와의 통신 (VISION_BACKEND=remote, app/core/settings.py)
+# API 워커는 모델을 로드하지 않고, 전처리된 이미지를 공유 메모리에 써서 Unix 소켓으로 추론 서버에 넘깁니다.
+# 소켓에는 작은 JSON 헤더만 오가고 픽셀 데이터는 공유 메모리로 전달됩니다. (공유 메모리를 쓸 수 없으면 소켓으로 직접 전송)
+# 추론 서버 실행: python -m scripts.vision_server --socket /tmp/matchmeal-vision.sock
+
+import os
+import json
+import struct
+import asyncio
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from app.core.inference_executor import InferenceQueueFullError
+from app.schemas.dtos import FoodAnalysisResponse
+from app.services.vision_scheduler import VISION_REQUEST_TIMEOUT, VisionTimeoutError
+
+# 추론 서버 소켓 목록 (여러 개면 진행 중 요청이 가장 적은 서버로 분배)
+VISION_REMOTE_SOCKETS = [
+    s.strip() for s in os.getenv("VISION_REMOTE_SOCKETS", "/tmp/matchmeal-vision.sock").split(",") if s.strip()
+]
+VISION_REMOTE_SHM = os.getenv("VISION_REMOTE_SHM", "1") == "1"
+# 서버 측 스케줄러 타임아웃보다 약간 길게 (서버가 보낸 타임아웃 응답을 우선)
+VISION_REMOTE_TIMEOUT = float(os.getenv("VISION_REMOTE_TIMEOUT", str(VISION_REQUEST_TIMEOUT + 5)))
+
+_FRAME = struct.Struct("!II")  # (헤더 JSON 길이, 본문 길이)
+
+
+class RemoteInferenceError(RuntimeError):
+    """추론 서버 연결 실패 또는 서버 내부 오류"""
+
+
+async def send_frame(writer: asyncio.StreamWriter, header: dict, body: bytes = b""):
+    data = json.dumps(header, ensure_ascii=False).encode()
+    writer.write(_FRAME.pack(len(data), len(body)))
+    writer.write(data)
+    if body:
+        writer.write(body)
+    await writer.drain()
+
+
+async def recv_frame(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    header_len, body_len = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_len))
+    body = await reader.readexactly(body_len) if body_len else b""
+    return header, body
+
+
+def error_response(e: Exception) -> dict:
+    """서버 측 예외 -> 응답 헤더 (클라이언트에서 같은 종류의 예외로 복원)"""
+    response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+    if isinstance(e, InferenceQueueFullError):
+        response["retry_after"] = e.retry_after
+    return response
+
+
+def _raise_for(response: dict):
+    error, message = response.get("error"), response.get("message", "")
+    if error == "InferenceQueueFullError":
+        raise InferenceQueueFullError(response.get("retry_after", 1))
+    if error == "VisionTimeoutError":
+        raise VisionTimeoutError(message)
+    if error == "ValueError":
+        raise ValueError(message)
+    raise RemoteInferenceError(f"추론 서버 오류 ({error}): {message}")
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """클라이언트가 만든 공유 메모리에 연결 (생성/삭제는 클라이언트 책임이므로 리소스 트래커에서 제외)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def image_from_frame(header: dict, body: bytes) -> Image.Image:
+    """요청 헤더 + 본문(또는 공유 메모리)에서 RGB 이미지 복원"""
+    size, nbytes = (header["width"], header["height"]), header["nbytes"]
+    if not header.get("shm"):
+        return Image.frombytes("RGB", size, body)
+    shm = attach_shared_memory(header["shm"])
+    try:
+        view = shm.buf[:nbytes]
+        try:
+            # 공유 메모리에서 PIL 내부 버퍼로 바로 복사 (중간 bytes 객체 없음)
+            return Image.frombytes("RGB", size, view)
+        finally:
+            view.release()
+    finally:
+        shm.close()
+
+
+class VisionClient:
+    """추론 서버(들)에 요청을 보내는 클라이언트. 요청마다 짧은 Unix 소켓 연결을 사용합니다."""
+
+    def __init__(self, sockets: List[str] = VISION_REMOTE_SOCKETS, timeout: float = VISION_REMOTE_TIMEOUT,
+                 use_shm: bool = VISION_REMOTE_SHM):
+        self.sockets = list(sockets)
+        self.timeout = timeout
+        self.use_shm = use_shm
+        self._in_flight: Dict[str, int] = {path: 0 for path in self.sockets}
+        self.stats = {"requests": 0, "errors": 0, "shm_bytes": 0, "inline_bytes": 0}
+
+    def _pick(self) -> str:
+        return min(self.sockets, key=lambda path: self._in_flight[path])
+
+    async def _call(self, header: dict, body: bytes = b"", path: Optional[str] = None) -> dict:
+        path = path or self._pick()
+        self._in_flight[path] += 1
+        writer = None
+        try:
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                raise RemoteInferenceError(f"추론 서버에 연결할 수 없습니다: {path} ({e})")
+            await send_frame(writer, header, body)
+            try:
+                response, _ = await asyncio.wait_for(recv_frame(reader), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                raise VisionTimeoutError(f"이미지 분석이 {self.timeout:.0f}초 내에 완료되지 않았습니다.")
+            except asyncio.IncompleteReadError:
+                raise RemoteInferenceError(f"추론 서버 연결이 끊어졌습니다: {path}")
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._in_flight[path] -= 1
+            if writer is not None:
+                writer.close()
+
+        if not response.get("ok"):
+            _raise_for(response)
+        return response
+
+    def _share(self, data: bytes) -> Optional[shared_memory.SharedMemory]:
+        if not self.use_shm:
+            return None
+        try:
+            shm = shared_memory.SharedMemory(create=True, size=len(data))
+        except OSError as e:
+            # /dev/shm가 없거나 너무 작은 컨테이너 환경 -> 소켓으로 직접 전송
+            print(f"⚠️ 공유 메모리 생성 실패, 소켓 전송으로 대체합니다: {e}")
+            self.use_shm = False
+            return None
+        shm.buf[:len(data)] = data
+        return shm
+
+    async def analyze(self, image: Image.Image, mode: str = "generate", labels: Optional[List[str]] = None,
+                      adapter: Optional[str] = None) -> FoodAnalysisResponse:
+        data = image.tobytes()
+        header = {
+            "op": "analyze", "mode": mode, "labels": labels, "adapter": adapter,
+            "width": image.width, "height": image.height, "nbytes": len(data),
+        }
+        shm = self._share(data)
+        try:
+            if shm is not None:
+                header["shm"] = shm.name
+                self.stats["shm_bytes"] += len(data)
+                response = await self._call(header)
+            else:
+                self.stats["inline_bytes"] += len(data)
+                response = await self._call(header, data)
+        finally:
+            # 서버는 응답 전에 이미지를 복사해 두므로 여기서 바로 해제
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.stats["requests"] += 1
+        return FoodAnalysisResponse(**response["result"])
+
+    async def resolve_adapter(self, adapter: Optional[str] = None) -> str:
+        """A/B 분배를 서버 규칙으로 한 번 결정 (한 끼 사진 묶음이 같은 어댑터를 쓰도록)"""
+        return (await self._call({"op": "resolve_adapter", "adapter": adapter}))["adapter"]
+
+    async def ping(self) -> Dict[str, bool]:
+        """서버별 응답 여부 (추론 서버는 워밍업을 마친 뒤에 소켓을 엽니다)"""
+        async def _one(path: str) -> bool:
+            try:
+                await asyncio.wait_for(self._call({"op": "ping"}, path=path), timeout=2)
+                return True
+            except Exception:
+                return False
+        results = await asyncio.gather(*[_one(path) for path in self.sockets])
+        return dict(zip(self.sockets, results))
+
+    async def metrics(self) -> Dict[str, dict]:
+        """서버별 지표 (응답 없는 서버는 오류 메시지)"""
+        async def _one(path: str):
+            try:
+                return (await self._call({"op": "metrics"}, path=path))["metrics"]
+            except Exception as e:
+                return {"error": str(e)}
+        results = await asyncio.gather(*[_one(path) for path in self.sockets])
+        return dict(zip(self.sockets, results))
+
+    def snapshot(self) -> dict:
+        return {"sockets": self.sockets, "in_flight": dict(self._in_flight), "use_shm": self.use_shm, **self.stats}
+
+
+vision_client = VisionClient()
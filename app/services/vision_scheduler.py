@@ -0,0 +1,242 @@
+# 비전 추론 마이크로 배칭 스케줄러
+# 짧은 시간 창(window) 동안 들어온 요청을 모아 한 번의 generate 호출로 처리합니다.
+
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Set
+from app.core.inference_executor import InferenceQueueFullError, VISION_INFERENCE_CONCURRENCY, VISION_MAX_QUEUE
+
+VISION_BATCH_MAX_SIZE = int(os.getenv("VISION_BATCH_MAX_SIZE", "8"))
+VISION_BATCH_WINDOW_MS = float(os.getenv("VISION_BATCH_WINDOW_MS", "30"))
+VISION_REQUEST_TIMEOUT = float(os.getenv("VISION_REQUEST_TIMEOUT", "60"))
+
+
+class VisionTimeoutError(Exception):
+    """요청이 제한 시간 내에 처리되지 못했을 때 발생합니다."""
+
+
+@dataclass
+class _PendingRequest:
+    payload: Any
+    future: asyncio.Future
+    group: Hashable = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class SchedulerMetrics:
+    """배치 크기 / 큐 대기시간 / 추론 시간 통계"""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.batches = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.rejected = 0
+        self.batch_size_histogram = {}
+        self._queue_waits = deque(maxlen=window)
+        self._batch_latencies = deque(maxlen=window)
+
+    def record_batch(self, size: int, queue_waits: List[float], latency: float):
+        self.batches += 1
+        self.requests += size
+        self.batch_size_histogram[size] = self.batch_size_histogram.get(size, 0) + 1
+        self._queue_waits.extend(queue_waits)
+        self._batch_latencies.append(latency)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self._queue_waits)
+        latencies = list(self._batch_latencies)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "p95": round(waits[int(len(waits) * 0.95) - 1] * 1000, 2) if waits else 0.0,
+                "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+            },
+            "batch_latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            },
+        }
+
+
+class VisionBatchScheduler:
+    """
+    동시에 들어온 요청을 모아 runner(payload 리스트, group -> 결과 리스트)를 한 번 호출합니다.
+    - 같은 group(예: 어댑터)의 요청끼리만 한 배치로 묶음 (다른 group은 도착 순서대로 다음 배치로)
+    - 첫 요청 도착 후 batch_window_ms 동안, 또는 max_batch_size 개가 찰 때까지 대기
+    - 동시에 실행되는 배치는 최대 concurrency 개 (나머지 요청은 큐에서 다음 배치를 기다림)
+    - 처리 대기 중인 요청이 max_pending 개를 넘으면 즉시 거절 (InferenceQueueFullError)
+    - 요청별 타임아웃 (초과 시 VisionTimeoutError)
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[List[Any], Hashable], Awaitable[List[Any]]],
+        max_batch_size: int = VISION_BATCH_MAX_SIZE,
+        batch_window_ms: float = VISION_BATCH_WINDOW_MS,
+        request_timeout: float = VISION_REQUEST_TIMEOUT,
+        concurrency: int = VISION_INFERENCE_CONCURRENCY,
+        max_pending: int = VISION_MAX_QUEUE,
+    ):
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = max(0.0, batch_window_ms) / 1000
+        self.request_timeout = request_timeout
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max(1, max_pending)
+        self.metrics = SchedulerMetrics()
+        self._pending = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._deferred: deque = deque()  # 큐에서 꺼냈지만 group이 달라 다음 배치로 미룬 요청
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()  # 실행 중인 배치 (GC로 중간에 사라지지 않도록 참조 유지)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def retry_after(self) -> int:
+        """대기 중인 요청이 모두 처리될 때까지의 예상 시간(초)"""
+        latencies = self.metrics._batch_latencies
+        avg_latency = sum(latencies) / len(latencies) if latencies else 1.0
+        batches_ahead = self._pending / (self.max_batch_size * self.concurrency)
+        return max(1, math.ceil(avg_latency * batches_ahead))
+
+    def _ensure_started(self):
+        # 큐/워커는 실행 중인 이벤트 루프에서 지연 생성합니다.
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._deferred.clear()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, payload: Any, group: Hashable = None) -> Any:
+        """요청 하나를 큐에 넣고, 배치 처리 결과 중 자기 몫을 돌려받습니다."""
+        if self._pending >= self.max_pending:
+            self.metrics.rejected += 1
+            raise InferenceQueueFullError(self.retry_after())
+
+        self._ensure_started()
+        item = _PendingRequest(payload=payload, future=asyncio.get_running_loop().create_future(), group=group)
+        self._pending += 1
+        self._queue.put_nowait(item)
+        try:
+            return await asyncio.wait_for(item.future, timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise VisionTimeoutError(f"이미지 분석이 {self.request_timeout:.0f}초 내에 완료되지 않았습니다.")
+        finally:
+            self._pending -= 1
+
+    async def _collect_batch(self) -> List[_PendingRequest]:
+        # 미뤄 둔 요청이 있으면 가장 오래된 것부터 배치를 시작
+        first = self._deferred.popleft() if self._deferred else await self._queue.get()
+        batch = [first]
+        for p in list(self._deferred):
+            if len(batch) >= self.max_batch_size:
+                break
+            if p.group == first.group:
+                self._deferred.remove(p)
+                batch.append(p)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    p = self._queue.get_nowait()
+                else:
+                    p = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if p.group == first.group:
+                batch.append(p)
+            else:
+                self._deferred.append(p)
+        # 대기 중 타임아웃으로 취소된 요청은 제외
+        return [p for p in batch if not p.future.done()]
+
+    async def _run(self):
+        while True:
+            # 실행 슬롯을 먼저 확보한 뒤 배치를 모읍니다.
+            # (모든 슬롯이 사용 중이면 그동안 요청이 큐에 쌓여 다음 배치가 커집니다)
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            if batch:
+                task = asyncio.create_task(self._execute(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._on_task_done)
+            else:
+                self._slots.release()
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # _execute_batch는 runner 예외를 요청에 전달하므로, 여기까지 온 예외는 스케줄러 자체 오류
+            print(f"⚠️ 비전 배치 실행 중 예외: {type(task.exception()).__name__}: {task.exception()}")
+
+    async def aclose(self):
+        """워커와 실행 중인 배치를 취소하고 끝날 때까지 기다립니다. (서버 종료 시)"""
+        tasks = [t for t in [self._worker, *self._tasks] if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        waiting = list(self._deferred)
+        while self._queue is not None and not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        for p in waiting:
+            if not p.future.done():
+                p.future.cancel()
+        self._deferred.clear()
+        self._worker = None
+        self._tasks.clear()
+
+    async def _execute(self, batch: List[_PendingRequest]):
+        try:
+            await self._execute_batch(batch)
+        except asyncio.CancelledError:
+            # 종료 중 취소: 기다리던 요청이 타임아웃까지 남지 않도록 함께 취소
+            for p in batch:
+                if not p.future.done():
+                    p.future.cancel()
+            raise
+        finally:
+            self._slots.release()
+
+    async def _execute_batch(self, batch: List[_PendingRequest]):
+        started = time.perf_counter()
+        queue_waits = [started - p.enqueued_at for p in batch]
+        try:
+            results = await self.runner([p.payload for p in batch], batch[0].group)
+        except Exception as e:
+            self.metrics.failures += len(batch)
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+        finally:
+            self.metrics.record_batch(len(batch), queue_waits, time.perf_counter() - started)
+
+        for p, result in zip(batch, results):
+            if p.future.done():
+                continue
+            if isinstance(result, Exception):
+                p.future.set_exception(result)
+            else:
+                p.future.set_result(result)
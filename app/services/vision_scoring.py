@@ -0,0 +1,131 @@
+# 후보 라벨 점수화(분류) 모드
+# 메뉴 후보가 정해져 있으면 자유 생성 대신, 이미지 프롬프트를 한 번만 prefill 한 뒤
+# 모든 후보 라벨의 로그 우도를 하나의 배치 forward로 계산해 확률 순위를 매깁니다.
+
+import os
+import copy
+import threading
+import torch
+from typing import List, Optional, Tuple
+from PIL import Image
+from qwen_vl_utils import process_vision_info
+from app.core.ai_model import rope_deltas_guard, rope_deltas_owners
+from app.core.food_data import load_food_names
+from app.services.vision_preprocess import image_content
+from app.schemas.dtos import CandidateScore, FoodAnalysisResponse
+
+VISION_SCORING_TOP_N = int(os.getenv("VISION_SCORING_TOP_N", "100"))  # 라벨 미지정 시 DB에서 가져올 후보 수
+VISION_SCORING_TEMPERATURE = float(os.getenv("VISION_SCORING_TEMPERATURE", "1.0"))
+VISION_SCORING_CHUNK = int(os.getenv("VISION_SCORING_CHUNK", "64"))  # 한 번의 forward에 넣을 라벨 수
+VISION_SCORING_TOP_K = 3
+MAX_LABELS = 500
+
+SCORING_PROMPT = "이 음식의 이름은 무엇인가요? 한국어 음식 이름만 답하세요."
+
+_lock = threading.Lock()
+_default_labels: Optional[List[str]] = None
+
+
+def default_labels() -> List[str]:
+    """라벨이 지정되지 않은 경우 일반 음식 DB 상위 N개를 후보로 사용"""
+    global _default_labels
+    with _lock:
+        if _default_labels is None:
+            _default_labels = load_food_names(["general"], limit=VISION_SCORING_TOP_N)
+        return _default_labels
+
+
+def normalize_labels(labels: List[str]) -> List[str]:
+    """공백 제거 + 중복 제거 (순서 유지)"""
+    cleaned = []
+    for label in labels:
+        label = label.strip()
+        if label and label not in cleaned:
+            cleaned.append(label)
+    return cleaned[:MAX_LABELS]
+
+
+def _build_prefix_inputs(processor, device, image: Image.Image):
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                image_content(image),
+                {"type": "text", "text": SCORING_PROMPT},
+            ],
+        }
+    ]
+    text = processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    image_inputs, _ = process_vision_info(messages)
+    return processor(text=[text], images=image_inputs, return_tensors="pt").to(device)
+
+
+def _score_chunk(model, prefill, prefix_inputs, label_ids: List[List[int]], pad_id: int, device) -> torch.Tensor:
+    """prefill KV 캐시를 라벨 수만큼 복제하여, 라벨 토큰들의 로그 우도 합을 한 번에 계산"""
+    n = len(label_ids)
+    max_len = max(len(ids) for ids in label_ids)
+    prefix_len = prefix_inputs.input_ids.shape[1]
+
+    tokens = torch.full((n, max_len), pad_id, dtype=torch.long, device=device)
+    mask = torch.zeros((n, max_len), dtype=torch.long, device=device)
+    for i, ids in enumerate(label_ids):
+        tokens[i, :len(ids)] = torch.tensor(ids, dtype=torch.long, device=device)
+        mask[i, :len(ids)] = 1
+
+    cache = copy.deepcopy(prefill.past_key_values)
+    cache.batch_repeat_interleave(n)
+
+    # 텍스트 토큰의 mrope 위치 = cache_position + rope_deltas (3축 동일)
+    cache_position = torch.arange(prefix_len, prefix_len + max_len, device=device)
+    deltas = next((m.rope_deltas for m in rope_deltas_owners(model) if m.rope_deltas is not None), None)
+    offset = deltas.reshape(-1)[:1].to(device) if deltas is not None else 0
+    position_ids = (cache_position.view(1, -1) + offset).expand(n, -1).unsqueeze(0).expand(3, -1, -1)
+
+    outputs = model(
+        input_ids=tokens,
+        attention_mask=torch.cat([prefix_inputs.attention_mask.expand(n, -1), mask], dim=1),
+        past_key_values=cache,
+        position_ids=position_ids,
+        cache_position=cache_position,
+        use_cache=True,
+    )
+
+    # 첫 토큰은 prefill 마지막 위치의 분포, 나머지는 라벨 패스의 직전 위치 분포로 계산
+    scores = torch.log_softmax(prefill.logits[0, -1].float(), dim=-1)[tokens[:, 0]]
+    if max_len > 1:
+        logits = outputs.logits[:, :-1].float()
+        targets = tokens[:, 1:]
+        token_logprobs = logits.gather(-1, targets.unsqueeze(-1)).squeeze(-1) - torch.logsumexp(logits, dim=-1)
+        scores += (token_logprobs * mask[:, 1:]).sum(dim=-1)
+    return scores
+
+
+def score_labels(model, processor, device, image: Image.Image, labels: List[str]) -> List[Tuple[str, float]]:
+    """각 라벨의 보정된 확률을 (라벨, 확률) 리스트로 내림차순 반환"""
+    tokenizer = processor.tokenizer
+    end_ids = tokenizer.encode("<|im_end|>", add_special_tokens=False)
+    label_ids = [tokenizer.encode(label, add_special_tokens=False) + end_ids for label in labels]
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+
+    # prefill이 모델에 남긴 rope_deltas를 _score_chunk가 읽으므로 같은 모델의 다른 추론과 직렬화
+    with rope_deltas_guard(model), torch.inference_mode():
+        prefix_inputs = _build_prefix_inputs(processor, device, image)
+        prefill = model(**prefix_inputs, use_cache=True)
+        scores = torch.cat([
+            _score_chunk(model, prefill, prefix_inputs, label_ids[i:i + VISION_SCORING_CHUNK], pad_id, device)
+            for i in range(0, len(label_ids), VISION_SCORING_CHUNK)
+        ])
+        # 라벨 전체에 대한 소프트맥스 (temperature로 확률 보정)
+        probabilities = torch.softmax(scores / VISION_SCORING_TEMPERATURE, dim=0).tolist()
+
+    return sorted(zip(labels, probabilities), key=lambda item: item[1], reverse=True)
+
+
+def classify_food_image(model, processor, device, image: Image.Image, labels: List[str]) -> FoodAnalysisResponse:
+    """추론 실행기에서 호출: 후보 점수화 결과를 FoodAnalysisResponse로 변환"""
+    ranked = score_labels(model, processor, device, image, labels)[:VISION_SCORING_TOP_K]
+    return FoodAnalysisResponse(
+        best_candidate=ranked[0][0],
+        candidates=[name for name, _ in ranked],
+        scores=[CandidateScore(name=name, probability=round(prob, 4)) for name, prob in ranked],
+    )
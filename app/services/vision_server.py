@@ -0,0 +1,58 @@
+# 비전 추론 전용 서버 프로세스 (VISION_BACKEND=remote 구성에서 모델을 소유)
+# 여러 API 워커의 요청을 Unix 소켓으로 받아, 이 프로세스의 배치 스케줄러/결과 캐시로 처리합니다.
+
+import os
+import asyncio
+from app.core.ai_model import resolve_adapter
+from app.services.vision_remote import error_response, image_from_frame, recv_frame, send_frame
+from app.services.vision_local import local_analyzer, local_metrics, prepare_vision, vision_scheduler
+
+
+async def _handle_analyze(header: dict, body: bytes) -> dict:
+    analyze = local_analyzer(header.get("mode", "generate"), header.get("labels"), header.get("adapter"))
+    image = image_from_frame(header, body)
+    result = await analyze(image)
+    return {"ok": True, "result": result.model_dump()}
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        header, body = await recv_frame(reader)
+        op = header.get("op")
+        try:
+            if op == "analyze":
+                response = await _handle_analyze(header, body)
+            elif op == "resolve_adapter":
+                response = {"ok": True, "adapter": resolve_adapter(header.get("adapter"))}
+            elif op == "ping":
+                response = {"ok": True}
+            elif op == "metrics":
+                response = {"ok": True, "metrics": local_metrics()}
+            else:
+                raise ValueError(f"알 수 없는 요청입니다: {op}")
+        except Exception as e:
+            response = error_response(e)
+        await send_frame(writer, response)
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass  # 클라이언트가 먼저 연결을 끊음 (타임아웃 등)
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str):
+    """모델 로드와 워밍업을 마친 뒤 socket_path에서 요청을 받습니다. (소켓이 열려 있으면 준비 완료)"""
+    print(f"🔍 AI 모델 로딩 시도... (추론 서버: {socket_path})")
+    await asyncio.get_running_loop().run_in_executor(None, prepare_vision)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # 이전 실행에서 남은 소켓 파일
+    server = await asyncio.start_unix_server(_handle, path=socket_path)
+    os.chmod(socket_path, 0o660)
+    print(f"✅ 비전 추론 서버 준비 완료: {socket_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await vision_scheduler.aclose()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
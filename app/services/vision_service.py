@@ -1,103 +1,95 @@
-import io
-import json
+# 이미지 분석 서비스 (라우터 진입점)
+# - VISION_BACKEND=remote: 전처리 후 추론 서버로 전송 (torch 등 모델 의존성을 import하지 않음)
+# - VISION_BACKEND=local: 모델 추론 모듈(app/services/vision_local.py)을 처음 분석할 때 import
+
+import os
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Union
 from PIL import Image
 from fastapi import UploadFile
-from qwen_vl_utils import process_vision_info
-from app.core.ai_model import get_model_instance
 from app.schemas.dtos import FoodAnalysisResponse
+from app.core.settings import VISION_BACKEND
+from app.services.vision_remote import vision_client
+from app.services.vision_preprocess import ImageTooLargeError, load_upload_image, preprocess_executor, preprocess_image, read_upload
 
-MAX_IMAGE_DIMENSION = 1024
+ANALYSIS_MODES = ("generate", "classify")
+VISION_BATCH_MAX_IMAGES = int(os.getenv("VISION_BATCH_MAX_IMAGES", "16"))  # /analyze-batch 1회 최대 이미지 수
 
-def preprocess_image(image_bytes: bytes) -> Image.Image:
-    """이미지 리사이징 및 RGB 변환"""
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    width, height = image.size
-    
-    # 너무 큰 이미지는 리사이징 (메모리 절약 및 속도 향상)
-    if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
-        image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
-    
-    return image
+ImageAnalyzer = Callable[[Image.Image], Awaitable[FoodAnalysisResponse]]
 
-async def analyze_food_image(file: UploadFile) -> FoodAnalysisResponse:
-    # 1. 모델 가져오기
-    model, processor, device = get_model_instance()
-    
-    # 2. 이미지 읽기 및 전처리
-    image_bytes = await file.read()
-    image = preprocess_image(image_bytes)
-    
-    # 3. 프롬프트 작성 (JSON 포맷 강제 + 한국어 전문가 페르소나)
-    prompt_text = """
-    당신은 한국 음식 전문가입니다. 제공된 이미지를 분석하세요.
-    
-    질문: 이 음식의 이름은 무엇인가요?
-    
-    답변 조건:
-    1. 반드시 '한국어'로 음식 이름을 답하세요. (예: Kimchi Stew -> 김치찌개)
-    2. 가장 가능성이 높은 음식 1개와, 헷갈리는 후보 2개를 포함하세요.
-    3. 설명이나 마크다운(```json) 없이 오직 아래 JSON 데이터만 반환하세요.
-    
-    {
-        "best_candidate": "가장 확실한 음식명",
-        "candidates": ["후보1", "후보2", "후보3"]
-    }
+async def _analyzer(mode: str, labels: Optional[List[str]], adapter: Optional[str], pin_adapter: bool = False) -> ImageAnalyzer:
+    """VISION_BACKEND에 따라 로컬 모델 또는 원격 추론 서버로 분석하는 함수를 반환"""
+    if VISION_BACKEND != "remote":
+        from app.services.vision_local import local_analyzer
+        return local_analyzer(mode, labels, adapter)
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"지원하지 않는 분석 모드입니다: {mode}")
+    if pin_adapter:
+        # 여러 이미지가 같은 어댑터를 쓰도록 A/B 분배를 미리 한 번 결정
+        adapter = await vision_client.resolve_adapter(adapter)
+    return partial(vision_client.analyze, mode=mode, labels=labels, adapter=adapter)
+
+async def analyze_food_image(
+    file: UploadFile, mode: str = "generate", labels: Optional[List[str]] = None, adapter: Optional[str] = None
+) -> FoodAnalysisResponse:
+    """
+    mode="generate": 자유 생성(기본). 동시 요청과 함께 배치 추론합니다.
+    mode="classify": 후보 라벨(labels, 미지정 시 음식 DB 상위 N개)의 확률 순위를 반환합니다.
+    adapter: LoRA 어댑터 이름 (미지정 시 A/B 분배 또는 기본 어댑터)
     """
+    # 1. 모드/모델 상태/어댑터 확인 (업로드를 읽기 전에 빠르게 실패)
+    analyze = await _analyzer(mode, labels, adapter)
     
-    messages = [
-        {
-            "role": "user",
-            "content": [
-                {"type": "image", "image": image},
-                {"type": "text", "text": prompt_text},
-            ],
-        }
-    ]
+    # 2. 이미지 읽기(용량 제한 스트리밍) 및 전처리(축소 디코딩, 전처리 워커 풀)
+    image = await load_upload_image(file)
 
-    # 4. Qwen 입력 데이터 생성
-    text = processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-    image_inputs, video_inputs = process_vision_info(messages)
-    
-    inputs = processor(
-        text=[text],
-        images=image_inputs,
-        videos=video_inputs,
-        padding=True,
-        return_tensors="pt",
-    )
-    
-    # 데이터를 장치(MPS/CUDA/CPU)로 이동
-    inputs = inputs.to(device)
+    # 3. 캐시 확인 후 추론 (remote: 추론 서버에서 캐시/배치 처리)
+    return await analyze(image)
 
-    # 5. 추론 (Inference)
-    generated_ids = model.generate(**inputs, max_new_tokens=256)
-    
-    # 6. 결과 디코딩
-    generated_ids_trimmed = [
-        out_ids[len(in_ids) :] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
-    ]
-    output_text = processor.batch_decode(
-        generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
-    )[0]
+async def read_batch_uploads(files: List[UploadFile]) -> List[Union[bytes, Exception]]:
+    """
+    배치 요청의 업로드를 모두 읽어 둡니다. (응답 스트리밍 중에는 업로드 파일이 닫힐 수 있음)
+    이미지별 오류(형식/용량)는 예외 객체로 담아 다른 이미지 처리에 영향을 주지 않습니다.
+    """
+    if len(files) > VISION_BATCH_MAX_IMAGES:
+        raise ValueError(f"한 번에 최대 {VISION_BATCH_MAX_IMAGES}장까지 분석할 수 있습니다.")
+    payloads = []
+    for file in files:
+        if not (file.content_type or "").startswith("image/"):
+            payloads.append(ValueError("이미지 파일만 업로드 가능합니다."))
+            continue
+        try:
+            payloads.append(await read_upload(file))
+        except ImageTooLargeError as e:
+            payloads.append(e)
+    return payloads
 
-    # 7. JSON 파싱 및 반환 (핵심 수정 부분)
-    
-    # (1) 먼저 마크다운 기호(```json) 등을 제거하여 'clean_text'를 만듭니다.
-    clean_text = output_text.replace("```json", "").replace("```", "").strip()
+async def analyze_food_images(
+    payloads: List[Union[bytes, Exception]], mode: str = "generate", labels: Optional[List[str]] = None,
+    adapter: Optional[str] = None,
+) -> AsyncIterator[Tuple[int, Union[FoodAnalysisResponse, Exception]]]:
+    """
+    여러 이미지를 동시에 제출하고, 끝나는 순서대로 (입력 인덱스, 결과 또는 예외)를 내보냅니다.
+    생성 모드에서는 스케줄러가 동시에 들어온 이미지들을 최대 배치 크기 단위로 묶어 한 번에 추론합니다.
+    한 끼 사진 묶음은 같은 어댑터로 분석합니다.
+    """
+    analyze = await _analyzer(mode, labels, adapter, pin_adapter=True)
+
+    async def _one(index: int, payload: Union[bytes, Exception]):
+        try:
+            if isinstance(payload, Exception):
+                raise payload
+            image = await preprocess_executor.run(preprocess_image, payload)
+            return index, await analyze(image)
+        except Exception as e:
+            return index, e
 
+    tasks = [asyncio.create_task(_one(i, payload)) for i, payload in enumerate(payloads)]
     try:
-        # (2) AI가 말을 잘 들어서 JSON 형태일 경우
-        data = json.loads(clean_text)
-        return FoodAnalysisResponse(**data)
-        
-    except json.JSONDecodeError:
-        # (3) AI가 학습된 본능대로 단답형("닭갈비")만 뱉었을 경우 -> 이게 정답입니다.
-        print(f"💡 JSON 파싱 실패 (단답형 응답 감지): {clean_text}")
-        
-        # 혹시 모를 줄바꿈이나 공백 제거 후 첫 줄만 가져오기
-        final_answer = clean_text.split('\n')[0].strip()
-        
-        return FoodAnalysisResponse(
-            best_candidate=final_answer,     # 예: "닭갈비"
-            candidates=[final_answer]        # 후보 리스트에도 넣어줌
-        )
\ No newline at end of file
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # 클라이언트가 연결을 끊으면 남은 작업 취소
+        for task in tasks:
+            task.cancel()
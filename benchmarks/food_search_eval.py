@@ -0,0 +1,107 @@
+# 음식 검색 오프라인 평가: 검색 방식(vector / lexical / hybrid)별 recall@k, MRR, 지연 시간
+# 사용법: python -m benchmarks.food_search_eval --modes vector,lexical,hybrid --samples 300 --k 5
+#         python -m benchmarks.food_search_eval --queries eval_queries.jsonl   # {"query": "...", "expected": ["음식명", ...]}
+# 질의 파일이 없으면 CSV 음식명에서 질의를 만듭니다. (원래 이름 / 띄어쓰기 변형 / 괄호 제거)
+# 정답 판정은 정규화한 음식명 일치 기준입니다.
+# 임베딩 캐시가 켜져 있으면 두 번째 실행부터 벡터 쪽 지연이 작아집니다. (콜드 지연: EMBEDDING_CACHE_ENABLED=0)
+
+import json
+import time
+import random
+import argparse
+from typing import List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def generated_queries(samples: int, seed: int) -> List[Tuple[str, List[str]]]:
+    from app.core.food_data import load_food_names
+
+    rng = random.Random(seed)
+    names = load_food_names()
+    queries = []
+    for name in rng.sample(names, min(samples, len(names))):
+        queries.append((name, [name]))
+        compact = name.replace(" ", "")
+        if len(compact) >= 3:
+            cut = rng.randint(1, len(compact) - 1)
+            queries.append((f"{compact[:cut]} {compact[cut:]}", [name]))
+        if "(" in name:
+            queries.append((name.split("(")[0].strip(), [name]))
+    return queries
+
+
+def load_queries(path: str) -> List[Tuple[str, List[str]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [(item["query"], item["expected"]) for item in (json.loads(line) for line in f if line.strip())]
+
+
+def evaluate(mode: str, queries: List[Tuple[str, List[str]]], k: int) -> dict:
+    from app.services.food_name_index import normalize_name
+    from app.services.vector_store import food_store
+
+    hits_1 = hits_k = 0
+    reciprocal_ranks, latencies = [], []
+    for query, expected in queries:
+        targets = {normalize_name(name) for name in expected}
+        started = time.perf_counter()
+        results = food_store.search_food(query, k=k, mode=mode)
+        latencies.append(time.perf_counter() - started)
+        ranks = [i for i, doc in enumerate(results) if normalize_name(doc.metadata.get("name", "")) in targets]
+        if ranks:
+            hits_k += 1
+            hits_1 += ranks[0] == 0
+            reciprocal_ranks.append(1 / (ranks[0] + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+    latencies.sort()
+    n = len(queries)
+    return {
+        "mode": mode,
+        "queries": n,
+        "recall@1": round(hits_1 / n, 4) if n else 0.0,
+        f"recall@{k}": round(hits_k / n, 4) if n else 0.0,
+        "mrr": round(sum(reciprocal_ranks) / n, 4) if n else 0.0,
+        "p50_ms": round(latencies[n // 2] * 1000, 2) if n else 0.0,
+        "p95_ms": round(latencies[min(n - 1, int(n * 0.95))] * 1000, 2) if n else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음식 검색 방식별 recall@k / 지연 시간 비교")
+    parser.add_argument("--modes", default="vector,lexical,hybrid", help="비교할 검색 방식 목록")
+    parser.add_argument("--queries", default="", help="질의 JSONL 파일 ({query, expected}) - 없으면 CSV에서 생성")
+    parser.add_argument("--samples", type=int, default=300, help="생성 질의에 쓸 음식명 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lexical-weight", type=float, default=None, help="FOOD_HYBRID_LEXICAL_WEIGHT 대신 사용")
+    parser.add_argument("--vector-weight", type=float, default=None, help="FOOD_HYBRID_VECTOR_WEIGHT 대신 사용")
+    parser.add_argument("--rrf-k", type=int, default=None, help="FOOD_HYBRID_RRF_K 대신 사용")
+    args = parser.parse_args()
+
+    import app.services.vector_store as vector_store
+    if args.lexical_weight is not None:
+        vector_store.FOOD_HYBRID_LEXICAL_WEIGHT = args.lexical_weight
+    if args.vector_weight is not None:
+        vector_store.FOOD_HYBRID_VECTOR_WEIGHT = args.vector_weight
+    if args.rrf_k is not None:
+        vector_store.FOOD_HYBRID_RRF_K = args.rrf_k
+
+    queries = load_queries(args.queries) if args.queries else generated_queries(args.samples, args.seed)
+    print(f"▶️ 질의 {len(queries)}개, k={args.k}")
+    vector_store.food_store.build_lookup_indexes()
+
+    rows = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        evaluate(mode, queries[:5], args.k)  # 워밍업 (첫 호출의 연결 비용 제외)
+        rows.append(evaluate(mode, queries, args.k))
+
+    recall_k = f"recall@{args.k}"
+    print(f"\n{'mode':<8} {'recall@1':>9} {recall_k:>9} {'mrr':>7} {'p50(ms)':>9} {'p95(ms)':>9}")
+    for r in rows:
+        print(f"{r['mode']:<8} {r['recall@1']:>9} {r[recall_k]:>9} {r['mrr']:>7} {r['p50_ms']:>9} {r['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
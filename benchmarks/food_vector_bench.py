@@ -0,0 +1,132 @@
+# 음식 벡터 검색 백엔드 비교: Chroma(HNSW, float32 1536차원) vs mmap 색인(줄인 차원 + float16/int8)
+# 사용법: python -m benchmarks.food_vector_bench --variants 256:int8,256:float16,512:float16 --samples 200 --k 10 --workers 4
+# 정답은 전체 차원 float32 전수 검색 top-k이며, 각 백엔드의 recall@k와 검색 지연(p50/p95)을 비교합니다.
+# --workers N: 같은 mmap 색인을 여는 프로세스 N개의 전용(private) 메모리 -> 워커를 늘려도 색인 메모리는 공유됨을 확인
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _memory_mb() -> dict:
+    """/proc/self/smaps_rollup 기준 RSS / 전용 메모리 (Linux)"""
+    fields = {}
+    with open("/proc/self/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), 1),
+    }
+
+
+def run_worker(directory: str, searches: int) -> dict:
+    import numpy as np
+    from app.services.food_vector_index import MmapVectorIndex
+
+    index = MmapVectorIndex(directory)
+    index.load()
+    index.align(index.ids)
+    rng = np.random.default_rng(0)
+    source_dim = index.manifest["source_dim"]
+    for _ in range(searches):
+        index.search(rng.standard_normal(source_dim).astype(np.float32), k=10)
+    return _memory_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs mmap 양자화 색인의 recall@k / 지연 / 메모리 비교")
+    parser.add_argument("--variants", default="256:int8,256:float16,512:float16", help="차원:형식 목록")
+    parser.add_argument("--samples", type=int, default=200, help="질의로 쓸 음식명 수")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="mmap 색인을 여는 프로세스 수 (0이면 생략)")
+    parser.add_argument("--worker", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, searches=50)))
+        return
+
+    import numpy as np
+    from app.core.food_data import iter_food_records
+    from app.services.food_vector_index import MmapVectorIndex, fetch_embeddings, write_index
+    from app.services.vector_store import food_store
+
+    records = list(iter_food_records())
+    ids = [row_id for row_id, _ in records]
+    collection = food_store.db._collection
+    print(f"📥 임베딩 {len(ids)}개 조회 중...")
+    vectors, present = fetch_embeddings(collection, ids)
+    full = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    rng = random.Random(args.seed)
+    names = [meta["name"] for _, meta in rng.sample(records, min(args.samples, len(records)))]
+    queries = np.asarray([food_store.embedding_function.embed_query(name) for name in names], dtype=np.float32)
+    truth = [set(np.argsort(-(full @ q))[:args.k].tolist()) for q in queries]
+    position = {row_id: i for i, row_id in enumerate(ids)}
+
+    def measure(label: str, search) -> dict:
+        search(queries[0])  # 워밍업
+        hits, latencies = 0, []
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            rows = search(q)
+            latencies.append(time.perf_counter() - started)
+            hits += len(expected & set(rows))
+        return {
+            "backend": label,
+            f"recall@{args.k}": round(hits / (len(queries) * args.k), 4),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        }
+
+    def chroma_search(q):
+        res = collection.query(query_embeddings=[q.tolist()], n_results=args.k, include=[])
+        return [position[row_id] for row_id in res["ids"][0] if row_id in position]
+
+    rows = [{**measure("chroma", chroma_search), "size_mb": round(vectors.nbytes / 1024 / 1024, 1)}]
+    workdir = tempfile.mkdtemp(prefix="food_vectors_")
+    worker_dir = None
+    for variant in [v.strip() for v in args.variants.split(",") if v.strip()]:
+        dim, dtype = variant.split(":")
+        directory = os.path.join(workdir, variant.replace(":", "_"))
+        write_index(directory, ids, vectors, present, dim=int(dim), dtype=dtype)
+        index = MmapVectorIndex(directory)
+        index.load()
+        index.align(ids)
+        result = measure(f"mmap {dim}d {dtype}", lambda q: [row for row, _ in index.search(q, args.k)])
+        rows.append({**result, "size_mb": index.snapshot()["file_mb"]})
+        worker_dir = worker_dir or directory
+
+    recall_k = f"recall@{args.k}"
+    print(f"\n{'backend':<20} {recall_k:>10} {'p50(ms)':>9} {'p95(ms)':>9} {'size(MB)':>9}")
+    for r in rows:
+        print(f"{r['backend']:<20} {r[recall_k]:>10} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['size_mb']:>9}")
+
+    if args.workers and worker_dir:
+        cmd = [sys.executable, "-m", "benchmarks.food_vector_bench", "--worker", worker_dir]
+        procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) for _ in range(args.workers)]
+        print(f"\n워커 {args.workers}개가 같은 색인({os.path.basename(worker_dir)})을 열었을 때 프로세스별 메모리:")
+        for i, proc in enumerate(procs):
+            out, _ = proc.communicate()
+            print(f"  worker {i}: {out.strip().splitlines()[-1] if out.strip() else '실패'}")
+
+
+if __name__ == "__main__":
+    main()
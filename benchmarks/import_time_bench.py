@@ -0,0 +1,65 @@
+# 서버 cold start 벤치마크: `import app.main` 소요 시간 / 메모리 / 무거운 모듈 로드 여부
+# 사용법: python -m benchmarks.import_time_bench --backends none,remote,local --runs 3
+# 백엔드(VISION_BACKEND)마다 새 프로세스에서 측정합니다. (import 캐시가 섞이지 않도록)
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HEAVY_MODULES = ("torch", "transformers", "peft", "qwen_vl_utils", "chromadb", "langchain_openai")
+
+
+def run_worker() -> dict:
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    import_seconds = time.perf_counter() - started
+    return {
+        "backend": os.getenv("VISION_BACKEND", "local"),
+        "import_s": round(import_seconds, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "modules": len(sys.modules),
+        "heavy": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VISION_BACKEND별 app.main import 시간/메모리 비교")
+    parser.add_argument("--backends", default="none,remote,local", help="비교할 VISION_BACKEND 목록")
+    parser.add_argument("--runs", type=int, default=3, help="백엔드별 측정 횟수 (중앙값 사용)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(), ensure_ascii=False))
+        return
+
+    rows = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        env = {**os.environ, "VISION_BACKEND": backend}
+        cmd = [sys.executable, "-m", "benchmarks.import_time_bench", "--worker"]
+        print(f"▶️ VISION_BACKEND={backend} 측정 중...")
+        runs = []
+        for _ in range(args.runs):
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"❌ {backend} 실패:\n{proc.stderr[-2000:]}")
+                break
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        if runs:
+            runs.sort(key=lambda r: r["import_s"])
+            rows.append(runs[len(runs) // 2])
+
+    print(f"\n{'backend':<8} {'import(s)':>10} {'peak(MB)':>9} {'modules':>8}  heavy modules")
+    for r in rows:
+        print(f"{r['backend']:<8} {r['import_s']:>10} {r['peak_rss_mb']:>9} {r['modules']:>8}  {', '.join(r['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
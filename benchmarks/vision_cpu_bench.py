@@ -0,0 +1,107 @@
+# CPU 추론 모드 벤치마크 (FP32 기준 대비 int8 / bf16의 지연시간과 메모리)
+# 사용법: python -m benchmarks.vision_cpu_bench --image sample.jpg --modes fp32,int8,bf16 --runs 5
+# 모드마다 별도 프로세스에서 측정하므로 RSS(최대 상주 메모리)가 서로 섞이지 않습니다.
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _load_image(path: str):
+    from PIL import Image
+    from app.services.vision_preprocess import preprocess_image
+    if path:
+        with open(path, "rb") as f:
+            return preprocess_image(f.read())
+    # 샘플 이미지가 없으면 합성 이미지 사용 (지연시간 측정용)
+    return Image.radial_gradient("L").resize((640, 480)).convert("RGB")
+
+
+def run_worker(args) -> dict:
+    """현재 프로세스의 환경변수(VISION_CPU_MODE 등) 그대로 모델을 로드하고 측정합니다."""
+    from app.core.ai_model import load_model, get_model_instance
+    from app.services.vision_local import run_vision_batch
+
+    started = time.perf_counter()
+    load_model()
+    load_seconds = time.perf_counter() - started
+    model, processor, device = get_model_instance()
+    image = _load_image(args.image)
+
+    # 워밍업 1회 (첫 호출의 커널 초기화 비용 제외)
+    result = run_vision_batch(model, processor, device, [image])[0]
+    latencies = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        run_vision_batch(model, processor, device, [image])
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    return {
+        "mode": os.getenv("VISION_CPU_MODE", "fp32"),
+        "load_s": round(load_seconds, 2),
+        "latency_p50_s": round(latencies[len(latencies) // 2], 3),
+        "latency_max_s": round(latencies[-1], 3),
+        "rss_mb": round(_current_rss_mb(), 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "best_candidate": result.best_candidate,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU 추론 모드별 지연시간/메모리 비교")
+    parser.add_argument("--image", default="", help="테스트 이미지 경로 (없으면 합성 이미지)")
+    parser.add_argument("--modes", default="fp32,int8,bf16", help="비교할 VISION_CPU_MODE 목록")
+    parser.add_argument("--runs", type=int, default=5, help="모드별 측정 횟수")
+    parser.add_argument("--threads", type=int, default=0, help="VISION_CPU_THREADS (0이면 기본값)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args), ensure_ascii=False))
+        return
+
+    rows = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        env = {**os.environ, "VISION_DEVICE": "cpu", "VISION_CPU_MODE": mode, "VISION_CACHE_ENABLED": "0"}
+        if args.threads:
+            env["VISION_CPU_THREADS"] = str(args.threads)
+        cmd = [sys.executable, "-m", "benchmarks.vision_cpu_bench", "--worker", "--runs", str(args.runs)]
+        if args.image:
+            cmd += ["--image", args.image]
+        print(f"▶️ {mode} 측정 중...")
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"❌ {mode} 실패:\n{proc.stderr[-2000:]}")
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    baseline = next((r for r in rows if r["mode"] == "fp32"), None)
+    print(f"\n{'mode':<6} {'load(s)':>8} {'p50(s)':>8} {'max(s)':>8} {'rss(MB)':>9} {'peak(MB)':>9} {'speedup':>8} {'mem':>6}  answer")
+    for r in rows:
+        speedup = baseline["latency_p50_s"] / r["latency_p50_s"] if baseline else 0
+        mem = r["peak_rss_mb"] / baseline["peak_rss_mb"] if baseline else 0
+        print(f"{r['mode']:<6} {r['load_s']:>8} {r['latency_p50_s']:>8} {r['latency_max_s']:>8} "
+              f"{r['rss_mb']:>9} {r['peak_rss_mb']:>9} {speedup:>7.2f}x {mem:>5.2f}x  {r['best_candidate']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# 고정 프롬프트 접두사 KV 캐시 벤치마크 (prefill 시간 비교)
+# 사용법: VISION_PREFIX_CACHE=1 python -m benchmarks.vision_prefix_bench --image sample.jpg --batch 4 --runs 5
+# 같은 입력(지시문 -> 이미지 순서)에 대해 전체 prefill vs 접두사 캐시 + 나머지 prefill 시간을 비교합니다.
+
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ["VISION_PREFIX_CACHE"] = "1"  # 지시문을 이미지 앞에 두는 메시지 구성을 사용
+
+
+def _timed(fn, runs: int) -> float:
+    import torch
+    fn()  # 워밍업 (접두사 캐시 생성 포함)
+    elapsed = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        elapsed.append(time.perf_counter() - t0)
+    return sorted(elapsed)[len(elapsed) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 접두사 KV 캐시의 prefill 절감 효과 측정")
+    parser.add_argument("--image", default="", help="테스트 이미지 경로 (없으면 합성 이미지)")
+    parser.add_argument("--batch", type=int, default=1, help="배치 크기")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수")
+    args = parser.parse_args()
+
+    import torch
+    from PIL import Image
+    from qwen_vl_utils import process_vision_info
+    from app.core.ai_model import load_model, get_model_instance
+    from app.services.vision_preprocess import preprocess_image
+    from app.services.vision_local import build_messages
+    from app.services.vision_prefix_cache import prefix_cache
+
+    load_model()
+    model, processor, device = get_model_instance()
+    if args.image:
+        with open(args.image, "rb") as f:
+            image = preprocess_image(f.read())
+    else:
+        image = Image.radial_gradient("L").resize((640, 480)).convert("RGB")
+
+    texts, image_inputs = [], []
+    for _ in range(args.batch):
+        messages = build_messages(image)
+        texts.append(processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True))
+        image_inputs.extend(process_vision_info(messages)[0])
+    inputs = processor(text=texts, images=image_inputs, padding=True, return_tensors="pt").to(device)
+
+    def full_prefill():
+        with torch.inference_mode():
+            model(**inputs, use_cache=True)
+
+    def cached_prefill():
+        if prefix_cache.prefill(model, processor, device, inputs) is None:
+            raise RuntimeError("접두사가 일치하지 않아 캐시 경로를 사용할 수 없습니다.")
+
+    baseline = _timed(full_prefill, args.runs)
+    cached = _timed(cached_prefill, args.runs)
+    stats = prefix_cache.snapshot()
+    total_tokens = inputs.input_ids.shape[1]
+
+    print(f"\n배치 {args.batch}, 프롬프트 {total_tokens} 토큰 중 접두사 {stats['prefix_tokens']} 토큰 캐시")
+    print(f"전체 prefill      : {baseline * 1000:8.1f} ms")
+    print(f"접두사 캐시 prefill: {cached * 1000:8.1f} ms")
+    print(f"절감               : {(baseline - cached) * 1000:8.1f} ms ({(1 - cached / baseline) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
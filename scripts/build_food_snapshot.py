@@ -0,0 +1,62 @@
+# 음식 검색 색인 스냅샷 빌드 (app/services/food_snapshot.py)
+# 사용법: python -m scripts.build_food_snapshot --out ./snapshots [--sync] [--dim 256] [--dtype int8]
+# 서버는 FOOD_SNAPSHOT_DIR=./snapshots 로 시작하면 CURRENT 버전을 검증 후 바로 로드합니다. (재임베딩 없음)
+
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+from app.core.food_data import build_page_content, iter_food_records
+from app.services.food_name_index import FoodNameIndex
+from app.services.food_snapshot import build_snapshot
+from app.services.food_vector_index import FOOD_VECTOR_DIM, FOOD_VECTOR_DTYPE, VECTOR_DTYPES, fetch_embeddings
+from app.services.vector_store import food_store
+
+EMBED_BATCH = 512
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 + 메타데이터 + 음식명 색인 + manifest를 담은 버전별 스냅샷을 만듭니다.")
+    parser.add_argument("--out", default="./snapshots", help="스냅샷 상위 디렉터리 (버전별 하위 디렉터리 + CURRENT)")
+    parser.add_argument("--sync", action="store_true", help="빌드 전에 CSV -> Chroma 동기화 실행")
+    parser.add_argument("--dim", type=int, default=FOOD_VECTOR_DIM, help="남길 벡터 차원 수")
+    parser.add_argument("--dtype", choices=VECTOR_DTYPES, default=FOOD_VECTOR_DTYPE, help="벡터 저장 형식")
+    parser.add_argument("--no-current", action="store_true", help="CURRENT를 새 버전으로 바꾸지 않음")
+    args = parser.parse_args()
+
+    if args.sync:
+        food_store.load_from_csvs(force=True)
+
+    records = list(iter_food_records())
+    if not records:
+        raise SystemExit("❌ CSV에서 읽은 음식 데이터가 없습니다.")
+    ids = [row_id for row_id, _ in records]
+    print(f"📥 Chroma에서 임베딩 {len(ids)}개 조회 중...")
+    try:
+        vectors, present = fetch_embeddings(food_store.db._collection, ids)
+    except ValueError:
+        vectors, present = None, np.zeros(len(ids), dtype=bool)
+
+    # 컬렉션에 없는 행만 임베딩 (임베딩 캐시를 거치므로 이전에 임베딩한 텍스트는 API 호출 없음)
+    missing = np.flatnonzero(~present)
+    if len(missing):
+        print(f"🔄 컬렉션에 없는 {len(missing)}개 행 임베딩 중...")
+    for start in range(0, len(missing), EMBED_BATCH):
+        rows = missing[start:start + EMBED_BATCH]
+        embedded = food_store.embedding_function.embed_documents([build_page_content(records[i][1]) for i in rows])
+        if vectors is None:
+            vectors = np.zeros((len(ids), len(embedded[0])), dtype=np.float32)
+        vectors[rows] = np.asarray(embedded, dtype=np.float32)
+        present[rows] = True
+
+    names = FoodNameIndex()
+    names.build(meta for _, meta in records)
+    directory, manifest = build_snapshot(args.out, records, vectors, present, names.export(),
+                                         dim=args.dim, dtype=args.dtype, make_current=not args.no_current)
+    print(f"✅ 스냅샷 생성 완료: {directory}")
+    print(f"   버전 {manifest['version']} / {manifest['rows']}행 / 벡터 {manifest['vectors']['dim']}차원 {manifest['vectors']['dtype']}")
+
+
+if __name__ == "__main__":
+    main()
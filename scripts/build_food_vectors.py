@@ -0,0 +1,34 @@
+# Chroma에 저장된 음식 임베딩 -> 줄인 차원 + 양자화 mmap 색인 (FOOD_VECTOR_BACKEND=mmap에서 사용)
+# 사용법: python -m scripts.build_food_vectors [--dim 256] [--dtype int8] [--out ./chroma_db/food_vectors]
+# 임베딩 API를 호출하지 않습니다. (먼저 python -m scripts.ingest_foods로 컬렉션을 동기화하세요)
+
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+from app.core.food_data import iter_food_records
+from app.services.food_vector_index import (
+    FOOD_VECTOR_DIM, FOOD_VECTOR_DTYPE, FOOD_VECTOR_INDEX_DIR, VECTOR_DTYPES, fetch_embeddings, write_index,
+)
+from app.services.vector_store import food_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음식 임베딩을 mmap 검색 색인 파일로 내보냅니다.")
+    parser.add_argument("--dim", type=int, default=FOOD_VECTOR_DIM, help="남길 차원 수 (앞에서부터)")
+    parser.add_argument("--dtype", choices=VECTOR_DTYPES, default=FOOD_VECTOR_DTYPE, help="저장 형식")
+    parser.add_argument("--out", default=FOOD_VECTOR_INDEX_DIR, help="색인 디렉터리")
+    args = parser.parse_args()
+
+    ids = [row_id for row_id, _ in iter_food_records()]
+    print(f"📥 Chroma에서 임베딩 {len(ids)}개 조회 중...")
+    vectors, present = fetch_embeddings(food_store.db._collection, ids)
+    manifest = write_index(args.out, ids, vectors, present, dim=args.dim, dtype=args.dtype)
+    size_mb = manifest["count"] * manifest["dim"] * (1 if args.dtype == "int8" else 2) / 1024 / 1024
+    print(f"✅ 색인 저장 완료: {args.out} ({manifest}, 약 {size_mb:.1f}MB)")
+    if manifest["missing"]:
+        print(f"⚠️ 임베딩이 없는 행 {manifest['missing']}개는 검색되지 않습니다. ingest_foods로 동기화 후 다시 실행하세요.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# 음식 CSV -> 벡터 DB 적재/동기화 스크립트 (서버 시작 없이)
+# 사용법: python -m scripts.ingest_foods [--dry-run] [--rebuild] [--concurrency 8]
+
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+from app.services.food_ingest import INGEST_CONCURRENCY
+from app.services.vector_store import food_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="영양 성분 CSV를 벡터 DB(food_collection)와 동기화합니다. 바뀐 행만 다시 임베딩합니다.")
+    parser.add_argument("--dry-run", action="store_true", help="추가/수정/삭제/건너뜀 건수만 계산 (DB 변경 없음)")
+    parser.add_argument("--rebuild", action="store_true", help="컬렉션과 체크포인트를 비우고 처음부터 다시 적재")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="동시에 보낼 임베딩 요청 수")
+    args = parser.parse_args()
+
+    if args.rebuild and not args.dry_run:
+        print("🧹 food_collection 초기화 중...")
+        food_store.reset()
+    # CLI 실행은 CSV 지문이 같아도 항상 DB와 실제로 비교
+    food_store.load_from_csvs(concurrency=args.concurrency, force=True, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
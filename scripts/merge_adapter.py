@@ -0,0 +1,23 @@
+# LoRA 어댑터 병합 빌드 스크립트
+# 사용법: python -m scripts.merge_adapter --adapter models/food_adapter_v1.0 --output models/merged/food_adapter_v1.0
+
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+from app.core.ai_model import ADAPTER_PATH, MERGED_MODEL_PATH, merge_adapter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LoRA 어댑터를 기본 Qwen2.5-VL 가중치에 병합하여 safetensors로 저장합니다.")
+    parser.add_argument("--adapter", default=ADAPTER_PATH, help="어댑터 폴더 (기본: VISION_ADAPTER_PATH)")
+    parser.add_argument("--output", default=MERGED_MODEL_PATH, help="병합 체크포인트 저장 폴더 (기본: VISION_MERGED_MODEL_PATH)")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "bfloat16", "float32"], help="저장 dtype")
+    args = parser.parse_args()
+
+    import torch
+    merge_adapter(args.adapter, args.output, dtype=getattr(torch, args.dtype))
+
+
+if __name__ == "__main__":
+    main()
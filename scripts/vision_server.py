@@ -0,0 +1,26 @@
+# 비전 추론 서버 실행 스크립트 (API 워커는 VISION_BACKEND=remote로 실행)
+# 사용법: python -m scripts.vision_server --socket /tmp/matchmeal-vision.sock
+# 여러 개 실행 시 소켓 경로를 달리하고 API 쪽에 VISION_REMOTE_SOCKETS=a.sock,b.sock 으로 등록
+
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+from app.services.vision_remote import VISION_REMOTE_SOCKETS
+from app.services.vision_server import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qwen2.5-VL 모델을 소유하는 비전 추론 서버를 Unix 소켓으로 실행합니다.")
+    parser.add_argument("--socket", default=VISION_REMOTE_SOCKETS[0], help="소켓 경로 (기본: VISION_REMOTE_SOCKETS의 첫 번째)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.socket))
+    except KeyboardInterrupt:
+        print("👋 비전 추론 서버가 종료됩니다.")
+
+
+if __name__ == "__main__":
+    main()
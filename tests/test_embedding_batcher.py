@@ -0,0 +1,131 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.release.wait(timeout=5)
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("embedding API down")
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _submit_all(batcher, texts):
+    futures = [batcher.submit(text) for text in texts]
+    batcher.inner.release.set()
+    return futures
+
+
+def test_concurrent_queries_share_one_request_and_dedup():
+    inner = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(inner, wait_ms=200, max_size=16, concurrency=1)
+    futures = _submit_all(batcher, ["김치", "비빔밥", "김치", "김치"])
+    assert [f.result(timeout=5) for f in futures] == [[2.0], [3.0], [2.0], [2.0]]
+    assert inner.calls == [["김치", "비빔밥"]]
+    stats = batcher.snapshot()
+    assert stats["queries"] == 4 and stats["batches"] == 1 and stats["deduplicated"] == 2
+
+
+def test_max_size_splits_batches():
+    inner = RecordingEmbeddings()
+    batcher = EmbeddingBatcher(inner, wait_ms=200, max_size=2, concurrency=2)
+    futures = _submit_all(batcher, ["a", "bb", "ccc", "dddd", "eeeee"])
+    assert [f.result(timeout=5)[0] for f in futures] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert sorted(len(call) for call in inner.calls) == [1, 2, 2]
+
+
+def test_errors_fan_out_to_every_waiter():
+    inner = RecordingEmbeddings(fail=True)
+    batcher = EmbeddingBatcher(inner, wait_ms=200, max_size=16, concurrency=1)
+    futures = _submit_all(batcher, ["김치", "김치", "비빔밥"])
+    for future in futures:
+        with pytest.raises(RuntimeError, match="embedding API down"):
+            future.result(timeout=5)
+    assert len(inner.calls) == 1 and batcher.snapshot()["errors"] == 1
+
+
+def test_async_queries_are_batched():
+    inner = RecordingEmbeddings()
+    inner.release.set()
+    batcher = EmbeddingBatcher(inner, wait_ms=100, max_size=16, concurrency=1)
+
+    async def run():
+        return await asyncio.gather(*(batcher.aembed_query(text) for text in ["가", "나나", "가"]))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [1.0]]
+    assert inner.calls == [["가", "나나"]]
+
+
+def test_embed_documents_passes_through():
+    inner = RecordingEmbeddings()
+    inner.release.set()
+    batcher = EmbeddingBatcher(inner)
+    assert batcher.embed_documents(["a", "a"]) == [[1.0], [1.0]]
+    assert inner.calls == [["a", "a"]] and batcher.snapshot()["batches"] == 0
+
+
+def test_cancelled_waiter_does_not_block_the_rest_of_the_batch():
+    inner = RecordingEmbeddings()
+    inner.release.set()
+    batcher = EmbeddingBatcher(inner, wait_ms=300, max_size=16, concurrency=1)
+
+    async def run():
+        slow = asyncio.ensure_future(asyncio.wait_for(batcher.aembed_query("취소"), timeout=0.05))
+        others = [asyncio.ensure_future(batcher.aembed_query(text)) for text in ("김치", "비빔밥")]
+        with pytest.raises(asyncio.TimeoutError):
+            await slow  # 배치가 전송되기 전에 시간 초과 -> 내부 future 취소
+        return await asyncio.wait_for(asyncio.gather(*others), timeout=5)
+
+    assert asyncio.run(run()) == [[2.0], [3.0]]
+    assert inner.calls == [["김치", "비빔밥"]]
+    assert batcher.snapshot()["cancelled"] == 1
+
+
+def test_flush_skips_cancelled_futures_and_resolves_the_rest():
+    import time
+    from concurrent.futures import Future
+    inner = RecordingEmbeddings()
+    inner.release.set()
+    batcher = EmbeddingBatcher(inner)
+    cancelled, waiting, failing = Future(), Future(), Future()
+    cancelled.cancel()
+    now = time.perf_counter()
+    batcher._flush([("a", cancelled, now), ("bb", waiting, now)])
+    assert waiting.result(timeout=1) == [2.0] and inner.calls == [["bb"]]
+
+    inner.fail = True
+    gone = Future()
+    gone.cancel()
+    batcher._flush([("a", gone, now), ("c", failing, now)])
+    with pytest.raises(RuntimeError):
+        failing.result(timeout=1)
+    assert batcher.snapshot()["cancelled"] == 2
+
+
+def test_sync_embed_query_times_out(monkeypatch):
+    from app.services import embedding_batcher
+    monkeypatch.setattr(embedding_batcher, "EMBEDDING_BATCH_TIMEOUT", 0.1)
+    inner = RecordingEmbeddings()  # release를 걸지 않아 응답이 오지 않음
+    batcher = EmbeddingBatcher(inner, wait_ms=0, max_size=16, concurrency=1)
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.embed_query("김치")
+    finally:
+        inner.release.set()
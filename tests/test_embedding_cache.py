@@ -0,0 +1,106 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from app.services import embedding_cache as ec
+from app.services.embedding_cache import EmbeddingCache, text_key
+
+
+def _last_used(cache, key):
+    row = cache._conn.execute("SELECT last_used FROM embeddings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "c.sqlite3"), max_entries=10)
+    cache.put_many("m", {"a": [1.0, 2.0]})
+    found = cache.get_many(["a", "b", "a"])
+    assert found == {"a": [1.0, 2.0]}
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1 and cache.stats["writes"] == 1
+
+
+def test_hits_buffer_touches_until_flush(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "c.sqlite3"), max_entries=10, touch_flush_seconds=3600, touch_flush_size=100)
+    monkeypatch.setattr(ec.time, "time", lambda: 100.0)
+    cache.put_many("m", {"a": [1.0]})
+    monkeypatch.setattr(ec.time, "time", lambda: 200.0)
+    cache.get_many(["a"])
+    assert _last_used(cache, "a") == 100.0  # 조회 경로에서는 쓰지 않음
+    cache.flush()
+    assert _last_used(cache, "a") == 200.0
+
+
+def test_touch_buffer_flushes_when_full(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "c.sqlite3"), max_entries=10, touch_flush_seconds=3600, touch_flush_size=2)
+    monkeypatch.setattr(ec.time, "time", lambda: 100.0)
+    cache.put_many("m", {"a": [1.0], "b": [2.0]})
+    monkeypatch.setattr(ec.time, "time", lambda: 200.0)
+    cache.get_many(["a", "b"])
+    assert _last_used(cache, "a") == 200.0 and not cache._touched
+
+
+def test_eviction_keeps_recently_hit_entries(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "c.sqlite3"), max_entries=4, touch_flush_seconds=3600)
+    clock = iter(range(100, 200))
+    monkeypatch.setattr(ec.time, "time", lambda: float(next(clock)))
+    for key in "abcd":
+        cache.put_many("m", {key: [1.0]})
+    cache.get_many(["a"])  # 버퍼에만 있는 사용 시각도 정리 전에 반영돼야 함
+    cache.put_many("m", {"e": [1.0]})
+    remaining = {row[0] for row in cache._conn.execute("SELECT key FROM embeddings")}
+    assert remaining == {"a", "d", "e"}
+    assert cache.stats["evictions"] == 2 and cache._entries == 3
+
+
+def test_eviction_counts_actual_deletions(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "c.sqlite3"), max_entries=4)
+    cache.put_many("m", {k: [1.0] for k in "abcd"})
+    cache._conn.execute("DELETE FROM embeddings WHERE key IN ('a', 'b', 'c')")  # 다른 프로세스가 지운 경우
+    cache._entries = 10
+    cache.put_many("m", {"e": [1.0]})
+    assert cache.stats["evictions"] == 2
+    assert cache._entries == cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 0
+
+
+def test_text_key_depends_on_model():
+    assert text_key("a", "김치") != text_key("b", "김치")
+
+
+def test_async_embeddings_touch_sqlite_off_the_loop(tmp_path):
+    import asyncio
+    import threading
+    from langchain_core.embeddings import Embeddings
+
+    class Inner(Embeddings):
+        def embed_documents(self, texts):
+            return [[float(len(t))] for t in texts]
+
+        def embed_query(self, text):
+            return [float(len(text))]
+
+        async def aembed_query(self, text):
+            return [float(len(text))]
+
+    class RecordingCache(EmbeddingCache):
+        threads = []
+
+        def get_many(self, keys):
+            self.threads.append(threading.current_thread().name)
+            return super().get_many(keys)
+
+        def put_many(self, model, items):
+            self.threads.append(threading.current_thread().name)
+            super().put_many(model, items)
+
+    cache = RecordingCache(str(tmp_path / "c.sqlite3"))
+    embeddings = ec.CachedEmbeddings(Inner(), cache)
+
+    async def run():
+        first = await embeddings.aembed_query("김치")
+        second = await embeddings.aembed_query("김치")
+        return threading.current_thread().name, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    assert first == second == [2.0]
+    assert len(cache.threads) == 3 and loop_thread not in cache.threads
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,181 @@
+import os
+
+import pytest
+
+from app.core import food_data
+from app.services import food_ingest
+from app.services.food_ingest import IngestCheckpoint, iter_batches, sync_food_collection
+
+
+class FakeCollection:
+    """Chroma 컬렉션 중 동기화가 쓰는 get/upsert/delete만 흉내"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def get(self, include, limit, offset):
+        ids = sorted(self.docs)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [self.docs[i] for i in ids]}
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        for doc_id, meta in zip(ids, metadatas):
+            self.docs[doc_id] = meta
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+
+class FakeEmbeddings:
+    def __init__(self, failures=0):
+        self.calls = 0
+        self.failures = failures
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("rate limited")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def csv_source(tmp_path, monkeypatch):
+    path = tmp_path / "foods.csv"
+    files = [{"key": "t", "path": str(path), "header_row": 0, "encoding": "utf-8",
+              "map": {"name": 0, "kcal": 1, "carb": 2, "sugar": 3, "fat": 4, "prot": 5, "sodium": 6}}]
+    monkeypatch.setattr(food_data, "FOOD_CSV_FILES", files)
+    monkeypatch.setattr(food_ingest, "FOOD_CSV_FILES", files)
+    monkeypatch.setattr(food_ingest.time, "sleep", lambda seconds: None)
+
+    def write(rows, mtime):
+        path.write_text("name,kcal,carb,sugar,fat,prot,sodium\n" +
+                        "".join(f"{name},{kcal},1,1,1,1,1\n" for name, kcal in rows), encoding="utf-8")
+        os.utime(path, ns=(mtime, mtime))
+    return write
+
+
+def test_sync_diffs_by_content_hash(csv_source, tmp_path):
+    collection, checkpoint = FakeCollection(), IngestCheckpoint(str(tmp_path / "ckpt"))
+    csv_source([("김치찌개", 100), ("된장찌개", 200), ("비빔밥", 300)], mtime=1_000_000_000)
+    first = sync_food_collection(collection, FakeEmbeddings(), checkpoint, concurrency=2)
+    assert (first["added"], first["updated"], first["deleted"], first["skipped"]) == (3, 0, 0, 0)
+    assert set(collection.docs) == {"t:김치찌개#1", "t:된장찌개#1", "t:비빔밥#1"}
+
+    csv_source([("김치찌개", 100), ("된장찌개", 250), ("불고기", 400)], mtime=2_000_000_000)
+    second = sync_food_collection(collection, FakeEmbeddings(), checkpoint, concurrency=2)
+    assert (second["added"], second["updated"], second["deleted"], second["skipped"]) == (1, 1, 1, 1)
+    assert second["rows"] == 2
+    assert collection.docs["t:된장찌개#1"]["calories"] == 250.0
+    assert "t:비빔밥#1" not in collection.docs
+
+
+def test_unchanged_fingerprint_skips_comparison(csv_source, tmp_path):
+    collection, checkpoint = FakeCollection(), IngestCheckpoint(str(tmp_path / "ckpt"))
+    csv_source([("김치찌개", 100)], mtime=1_000_000_000)
+    sync_food_collection(collection, FakeEmbeddings(), checkpoint)
+    assert checkpoint.load()["completed"] is True
+
+    embeddings = FakeEmbeddings()
+    skipped = sync_food_collection(collection, embeddings, checkpoint)
+    assert skipped["rows"] == 0 and skipped["skipped"] == 0 and embeddings.calls == 0
+
+    forced = sync_food_collection(collection, embeddings, checkpoint, force=True)
+    assert forced["skipped"] == 1 and embeddings.calls == 0
+
+    csv_source([("김치찌개", 100), ("비빔밥", 300)], mtime=3_000_000_000)  # 지문이 바뀌면 다시 비교
+    changed = sync_food_collection(collection, embeddings, checkpoint)
+    assert changed["added"] == 1 and embeddings.calls == 1
+
+
+def test_dry_run_counts_without_writing(csv_source, tmp_path):
+    collection, checkpoint = FakeCollection(), IngestCheckpoint(str(tmp_path / "ckpt"))
+    csv_source([("김치찌개", 100), ("비빔밥", 300)], mtime=1_000_000_000)
+    embeddings = FakeEmbeddings()
+    report = sync_food_collection(collection, embeddings, checkpoint, dry_run=True)
+    assert report["added"] == 2
+    assert collection.docs == {} and embeddings.calls == 0 and not checkpoint.exists()
+
+
+def test_retries_and_embed_time_are_summed_by_coordinator(csv_source, tmp_path):
+    collection, checkpoint = FakeCollection(), IngestCheckpoint(str(tmp_path / "ckpt"))
+    csv_source([("김치찌개", 100), ("비빔밥", 300)], mtime=1_000_000_000)
+    report = sync_food_collection(collection, FakeEmbeddings(failures=2), checkpoint, concurrency=1)
+    assert report["retries"] == 2 and report["rows"] == 2
+
+
+def test_iter_batches_respects_item_and_token_limits():
+    records = [(f"r{i}", {"name": f"음식{i}", "calories": 1, "carbohydrate": 1, "protein": 1, "fat": 1, "sugar": 1})
+               for i in range(7)]
+    batches = list(iter_batches(records, lambda text: 10, max_items=3, max_tokens=25))
+    assert [len(b.ids) for b in batches] == [2, 2, 2, 1]
+    assert [b.index for b in batches] == [0, 1, 2, 3]
+
+
+@pytest.fixture
+def two_sources(tmp_path, monkeypatch):
+    mapping = {"name": 0, "kcal": 1, "carb": 2, "sugar": 3, "fat": 4, "prot": 5, "sodium": 6}
+    files = [{"key": key, "path": str(tmp_path / f"{key}.csv"), "header_row": 0, "encoding": "utf-8", "map": mapping}
+             for key in ("a", "b")]
+    monkeypatch.setattr(food_data, "FOOD_CSV_FILES", files)
+    monkeypatch.setattr(food_ingest, "FOOD_CSV_FILES", files)
+
+    def write(key, names, tail=b""):
+        body = "name,kcal,carb,sugar,fat,prot,sodium\n" + "".join(f"{name},1,1,1,1,1,1\n" for name in names)
+        (tmp_path / f"{key}.csv").write_bytes(body.encode("utf-8") + tail)
+    return write, tmp_path
+
+
+def _seed(two_sources):
+    write, tmp_path = two_sources
+    write("a", ["김치찌개", "비빔밥"])
+    write("b", ["라면"])
+    collection, checkpoint = FakeCollection(), IngestCheckpoint(str(tmp_path / "ckpt"))
+    sync_food_collection(collection, FakeEmbeddings(), checkpoint)
+    assert set(collection.docs) == {"a:김치찌개#1", "a:비빔밥#1", "b:라면#1"}
+    return write, tmp_path, collection, checkpoint
+
+
+def test_missing_source_keeps_its_documents(two_sources):
+    write, tmp_path, collection, checkpoint = _seed(two_sources)
+    os.remove(tmp_path / "a.csv")
+    write("b", [])  # 끝까지 읽은 빈 파일은 실제로 행이 사라진 것
+    report = sync_food_collection(collection, FakeEmbeddings(), checkpoint, force=True)
+    assert set(collection.docs) == {"a:김치찌개#1", "a:비빔밥#1"}
+    assert report["deleted"] == 1 and report["incomplete_sources"] == ["a"]
+    assert checkpoint.load()["completed"] is False  # 다음 시작 때 다시 비교
+
+
+def test_all_sources_missing_deletes_nothing(two_sources):
+    _, tmp_path, collection, checkpoint = _seed(two_sources)
+    os.remove(tmp_path / "a.csv")
+    os.remove(tmp_path / "b.csv")
+    collection.docs["legacy-uuid"] = {"name": "이전 방식 문서"}
+    report = sync_food_collection(collection, FakeEmbeddings(), checkpoint, force=True)
+    assert report["deleted"] == 0 and len(collection.docs) == 4
+
+
+def test_truncated_source_keeps_unread_rows(two_sources):
+    write, _, collection, checkpoint = _seed(two_sources)
+    write("a", ["김치찌개"], tail=b"\xff\xfe broken,1,1,1,1,1,1\n")  # 읽는 도중 디코딩 실패
+    report = sync_food_collection(collection, FakeEmbeddings(), checkpoint, force=True)
+    assert "a:비빔밥#1" in collection.docs and report["deleted"] == 0
+    assert report["incomplete_sources"] == ["a"]
+
+
+def test_legacy_ids_are_replaced_only_after_a_complete_full_read(two_sources):
+    write, tmp_path, collection, checkpoint = _seed(two_sources)
+    collection.docs["legacy-uuid"] = {"name": "이전 방식 문서"}
+    sync_food_collection(collection, FakeEmbeddings(), checkpoint, sources=["a"], force=True)
+    assert "legacy-uuid" in collection.docs and "b:라면#1" in collection.docs  # 일부 파일 동기화
+    report = sync_food_collection(collection, FakeEmbeddings(), checkpoint, force=True)
+    assert "legacy-uuid" not in collection.docs and report["deleted"] == 1
+
+
+def test_iter_food_rows_reports_read_status(two_sources):
+    write, tmp_path = two_sources
+    write("a", ["김치찌개"])
+    status = {}
+    rows = list(food_data.iter_food_rows(status=status))
+    assert [meta["name"] for _, meta in rows] == ["김치찌개"]
+    assert status == {"a": True, "b": False}
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("dotenv")
+
+from langchain_core.documents import Document
+
+from app.services.food_lexical import FoodLexicalIndex, lexical_terms, reciprocal_rank_fusion
+from app.services.vector_store import _fuse
+
+
+def _meta(row_id, name, sodium=300.0):
+    return {"row_id": row_id, "name": name, "calories": 300.0, "carbohydrate": 10.0,
+            "protein": 10.0, "fat": 5.0, "sugar": 1.0, "sodium": sodium}
+
+
+RECORDS = [
+    ("t:1", _meta("t:1", "김치찌개", sodium=1200)),
+    ("t:2", _meta("t:2", "김치볶음밥", sodium=500)),
+    ("t:3", _meta("t:3", "된장찌개", sodium=900)),
+    ("t:4", _meta("t:4", "닭가슴살 샐러드")),
+]
+
+
+def _doc(row_id):
+    return Document(page_content=row_id, metadata={"row_id": row_id, "name": row_id})
+
+
+def test_lexical_terms_use_name_ngrams():
+    terms = lexical_terms("김치찌개")
+    assert {"김치", "치찌", "찌개", "김치찌", "치찌개"} <= set(terms)
+    assert lexical_terms("죽") == ["죽"]
+
+
+def test_bm25_ranks_name_matches_first():
+    index = FoodLexicalIndex()
+    index.build(RECORDS)
+    names = [meta["name"] for meta, _ in index.search("김치찌개", k=3)]
+    assert names[0] == "김치찌개" and "김치볶음밥" in names
+    scores = [score for _, score in index.search("찌개", k=5)]
+    assert scores == sorted(scores, reverse=True)
+    assert index.search("초밥", k=3) == []
+
+
+def test_bm25_mask_excludes_rows():
+    index = FoodLexicalIndex()
+    index.build(RECORDS)
+    mask = np.array([False, True, True, True])
+    names = [meta["name"] for meta, _ in index.search("김치찌개", k=5, mask=mask)]
+    assert "김치찌개" not in names and set(names) == {"김치볶음밥", "된장찌개"}
+
+
+def test_reciprocal_rank_fusion_weights():
+    fused = dict(reciprocal_rank_fusion([(1.0, ["a", "b"]), (1.0, ["b", "c"])], rrf_k=0))
+    assert fused["b"] == pytest.approx(1 / 2 + 1 / 1)
+    assert fused["a"] == pytest.approx(1.0) and fused["c"] == pytest.approx(1 / 2)
+    order = [key for key, _ in reciprocal_rank_fusion([(2.0, ["x"]), (1.0, ["y"])])]
+    assert order == ["x", "y"]
+
+
+def test_fuse_dedups_by_row_id_and_prefers_agreement():
+    vector = [_doc("a"), _doc("b"), _doc("c")]
+    lexical = [_doc("b"), _doc("d")]
+    fused = _fuse(vector, lexical, k=3)
+    assert [doc.metadata["row_id"] for doc in fused][0] == "b"
+    assert len({doc.metadata["row_id"] for doc in fused}) == 3
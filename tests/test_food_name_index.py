@@ -0,0 +1,68 @@
+import pytest
+
+from app.services.food_name_index import FoodNameIndex, name_aliases, normalize_name, to_jamo
+
+
+def _meta(row_id, name):
+    return {"row_id": row_id, "name": name}
+
+
+ROWS = [
+    _meta("g:1", "김치찌개"),
+    _meta("g:2", "떡볶이"),
+    _meta("p:1", "농심 신라면(봉지)"),
+    _meta("p:2", "저염 된장찌개"),
+]
+
+
+@pytest.fixture
+def index():
+    index = FoodNameIndex()
+    index.build(ROWS)
+    return index
+
+
+def test_normalize_and_aliases():
+    assert normalize_name(" 신라면 (봉지) ") == "신라면"
+    assert normalize_name("ＣＯＫＥ ｚｅｒｏ") == "cokezero"
+    assert name_aliases("농심 신라면(봉지)") == ["농심신라면", "신라면"]
+    assert to_jamo("김") == "ㄱㅣㅁ"
+
+
+def test_exact_and_normalized_hits_are_confident(index):
+    assert index.lookup("김치찌개")[1:] == ("exact", 1.0)
+    meta, kind, score = index.lookup("농심신라면")
+    assert meta["row_id"] == "p:1" and kind == "normalized" and score == 1.0
+
+
+def test_brand_stripped_names_are_low_confidence_aliases(index):
+    meta, kind, score = index.lookup("신라면")
+    assert meta["row_id"] == "p:1" and kind == "alias" and score < 1.0
+
+
+@pytest.mark.parametrize("query, wrong_row", [("저염 김치찌개", "g:1"), ("매운 떡볶이", "g:2"), ("된장찌개", "p:2")])
+def test_modifier_words_never_produce_a_confident_match(index, query, wrong_row):
+    # 앞 단어(수식어)만 다른 음식을 확정 일치로 돌려주면 다른 행의 영양 성분이 정답처럼 보임
+    match = index.lookup(query)
+    assert match is None or match[1] not in ("exact", "normalized")
+
+
+def test_fuzzy_tolerates_typos(index):
+    meta, kind, score = index.lookup("김치찌게")
+    assert meta["row_id"] == "g:1" and kind == "fuzzy" and score < 1.0
+    assert index.lookup("스테이크") is None
+
+
+def test_export_restore_round_trip(index):
+    restored = FoodNameIndex()
+    restored.restore(index.export(), {meta["row_id"]: meta for meta in ROWS})
+    assert restored.lookup("신라면")[1] == "alias"
+    assert restored.lookup("농심신라면")[1] == "normalized"
+
+
+def test_restore_old_snapshot_format_separates_aliases(index):
+    # 이전 형식: 별칭이 normalized에 섞여 있고 aliases 키가 없음
+    old = {"exact": index.export()["exact"], "normalized": {"농심신라면": "p:1", "신라면": "p:1"}}
+    restored = FoodNameIndex()
+    restored.restore(old, {meta["row_id"]: meta for meta in ROWS})
+    assert restored.lookup("신라면")[1] == "alias"
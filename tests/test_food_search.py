@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("dotenv")
+
+from langchain_core.documents import Document
+
+from app.services import vector_store
+from app.services.nutrition_table import nutrition_table, parse_conditions
+from app.services.vector_store import FoodVectorStore
+
+
+def _meta(row_id, name, calories=300.0, sugar=1.0, sodium=300.0, protein=10.0):
+    return {"row_id": row_id, "name": name, "calories": calories, "carbohydrate": 10.0,
+            "protein": protein, "fat": 5.0, "sugar": sugar, "sodium": sodium}
+
+
+RECORDS = [
+    ("t:1", _meta("t:1", "김치찌개", sodium=1200)),
+    ("t:2", _meta("t:2", "김치볶음밥", sodium=500)),
+    ("t:3", _meta("t:3", "된장찌개", sodium=900)),
+    ("t:4", _meta("t:4", "닭가슴살 샐러드", protein=30)),
+]
+
+
+def _doc(row_id):
+    return Document(page_content=row_id, metadata={"row_id": row_id, "name": row_id})
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Chroma 없이 조회 색인만 쓰는 FoodVectorStore (CSV 대신 RECORDS)"""
+    builds = []
+
+    def fake_records():
+        builds.append(threading.current_thread().name)
+        time.sleep(0.05)  # 동시 호출이 겹치도록
+        return iter(RECORDS)
+
+    monkeypatch.setattr(vector_store, "iter_food_records", fake_records)
+    for index in (vector_store.food_name_index, nutrition_table, vector_store.food_lexical_index):
+        monkeypatch.setattr(index, "_built", False)
+    store = FoodVectorStore.__new__(FoodVectorStore)
+    store.snapshot_manifest = None
+    store._vector_index_checked = True
+    store._vector_index_lock = threading.Lock()
+    store._lookup_lock = threading.RLock()
+    store.builds = builds
+    return store
+
+
+def test_lazy_lookup_build_runs_once(store):
+    threads = [threading.Thread(target=store.ensure_lookup_indexes) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.builds) == 1
+    assert len(nutrition_table) == len(RECORDS)
+
+
+def test_async_paths_build_off_the_event_loop(store):
+    async def run():
+        loop_thread = threading.current_thread().name
+        doc = await store.alookup_food("김치찌개")
+        results = await store.asearch_food_where("김치", parse_conditions("high_bp"), k=5)
+        return loop_thread, doc, results
+
+    loop_thread, doc, results = asyncio.run(run())
+    assert store.builds and loop_thread not in store.builds
+    assert len(store.builds) == 1
+    assert doc.metadata["row_id"] == "t:1"
+    assert all(d.metadata["sodium"] < 600 for d in results) and results
+
+
+def test_vector_timeout_only_with_lexical_fallback(store, monkeypatch):
+    store.ensure_lookup_indexes()
+    monkeypatch.setattr(vector_store, "FOOD_VECTOR_TIMEOUT", 0.01)
+
+    async def slow_vector(query, k, filter=None, mask=None):
+        await asyncio.sleep(0.05)
+        return [_doc("t:4")]
+
+    monkeypatch.setattr(store, "_avector_search", slow_vector, raising=False)
+    vector = asyncio.run(store.asearch_food("김치찌개", k=2, mode="vector"))
+    hybrid = asyncio.run(store.asearch_food("김치찌개", k=2, mode="hybrid"))
+    assert [d.metadata["row_id"] for d in vector] == ["t:4"]  # vector 모드는 끝까지 기다림
+    assert hybrid and hybrid[0].metadata["name"] == "김치찌개"  # hybrid는 어휘 결과로 대체
+
+
+def test_low_confidence_name_hits_go_through_vector_search(store, monkeypatch):
+    store.ensure_lookup_indexes()
+    queries = []
+
+    def fake_search(query, k=5, **kwargs):
+        queries.append(query)
+        return [_doc("vector-hit")] if query != "김치찌게" else []
+
+    monkeypatch.setattr(store, "search_food", fake_search, raising=False)
+    assert store.lookup_food("김치찌개").metadata["row_id"] == "t:1"  # 확정 일치: 벡터 검색 없음
+    assert store.lookup_food("매운 김치찌개").metadata["row_id"] == "vector-hit"
+    assert store.lookup_food("김치찌게").metadata["row_id"] == "t:1"  # 벡터 결과가 없으면 유사 일치로 대체
+    assert queries == ["매운 김치찌개", "김치찌게"]
+
+
+def test_async_lexical_search_runs_off_the_event_loop(store, monkeypatch):
+    store.ensure_lookup_indexes()
+    threads = []
+    lexical = store._lexical_search
+
+    def tracked_lexical(query, k, mask=None):
+        threads.append(threading.current_thread().name)
+        return lexical(query, k, mask)
+
+    async def vector(query, k, filter=None, mask=None):
+        return [_doc("t:4")]
+
+    async def failing_vector(query, k, filter=None, mask=None):
+        raise RuntimeError("embedding down")
+
+    async def run():
+        loop_thread = threading.current_thread().name
+        hybrid = await store.asearch_food("김치찌개", k=2, mode="hybrid")
+        only_lexical = await store.asearch_food("김치찌개", k=2, mode="lexical")
+        monkeypatch.setattr(store, "_avector_search", failing_vector, raising=False)
+        fallback = await store.asearch_food("김치찌개", k=2, mode="hybrid")
+        many = await store.asearch_food_many(["김치찌개", "된장찌개"], k=2, mode="lexical")
+        return loop_thread, hybrid, only_lexical, fallback, many
+
+    monkeypatch.setattr(store, "_lexical_search", tracked_lexical, raising=False)
+    monkeypatch.setattr(store, "_avector_search", vector, raising=False)
+    loop_thread, hybrid, only_lexical, fallback, many = asyncio.run(run())
+    assert len(threads) == 5 and loop_thread not in threads
+    assert {d.metadata["row_id"] for d in hybrid} >= {"t:4"}
+    assert only_lexical[0].metadata["name"] == "김치찌개" and fallback[0].metadata["name"] == "김치찌개"
+    assert len(fallback) <= 2 and len(many) == 2
@@ -0,0 +1,82 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from app.services import food_snapshot
+from app.services.food_snapshot import (
+    SnapshotError, build_snapshot, load_snapshot_records, resolve_snapshot, snapshot_is_stale, validate_snapshot,
+)
+
+RECORDS = [
+    ("t:김치찌개#1", {"row_id": "t:김치찌개#1", "name": "김치찌개", "calories": 300.0}),
+    ("t:비빔밥#1", {"row_id": "t:비빔밥#1", "name": "비빔밥", "calories": 550.0}),
+]
+NAMES = {"exact": {"김치찌개": "t:김치찌개#1"}, "normalized": {}}
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    csv = tmp_path / "foods.csv"
+    csv.write_text("name\n김치찌개\n비빔밥\n", encoding="utf-8")
+    monkeypatch.setattr(food_snapshot, "FOOD_CSV_FILES", [{"key": "t", "path": str(csv)}])
+    vectors = np.random.default_rng(0).normal(size=(2, 16)).astype(np.float32)
+    directory, manifest = build_snapshot(str(tmp_path / "snapshots"), RECORDS, vectors,
+                                         np.ones(2, dtype=bool), NAMES, dim=8, dtype="int8")
+    return tmp_path, directory, manifest, csv
+
+
+def test_build_validate_and_load(snapshot):
+    tmp_path, directory, manifest, _ = snapshot
+    assert resolve_snapshot(str(tmp_path / "snapshots")) == directory  # CURRENT로 찾기
+    assert validate_snapshot(directory)["version"] == manifest["version"]
+    records, names = load_snapshot_records(directory)
+    assert records == RECORDS and names == NAMES
+    assert {"records.jsonl", "names.json", os.path.join("vectors", "vectors.npy")} <= set(manifest["files"])
+
+
+def test_corrupted_file_is_rejected(snapshot):
+    _, directory, _, _ = snapshot
+    with open(os.path.join(directory, "records.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"row_id": "x", "name": "변조"}\n')
+    with pytest.raises(SnapshotError, match="records.jsonl"):
+        validate_snapshot(directory)
+    validate_snapshot(directory, verify_checksums=False)  # 해시 검증을 끄면 존재 여부만 확인
+
+
+def test_missing_file_and_bad_manifest_are_rejected(snapshot):
+    _, directory, _, _ = snapshot
+    os.remove(os.path.join(directory, "names.json"))
+    with pytest.raises(SnapshotError, match="names.json"):
+        validate_snapshot(directory, verify_checksums=False)
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        f.write("{not json")
+    with pytest.raises(SnapshotError):
+        validate_snapshot(directory)
+
+
+def test_incompatible_manifest_is_rejected(snapshot):
+    _, directory, manifest, _ = snapshot
+    path = os.path.join(directory, "manifest.json")
+    for field, value in (("embedding_model", "other-model"), ("format", 999)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**manifest, field: value}, f)
+        with pytest.raises(SnapshotError):
+            validate_snapshot(directory)
+
+
+def test_resolve_missing_snapshot(tmp_path):
+    with pytest.raises(SnapshotError):
+        resolve_snapshot(str(tmp_path))
+
+
+def test_stale_when_source_csv_changes(snapshot, monkeypatch):
+    _, _, manifest, csv = snapshot
+    assert snapshot_is_stale(manifest) is False
+    csv.write_text("name\n김치찌개\n", encoding="utf-8")
+    assert snapshot_is_stale(manifest) is True
+    monkeypatch.setattr(food_snapshot, "FOOD_CSV_FILES", [{"key": "t", "path": str(csv) + ".missing"}])
+    assert snapshot_is_stale(manifest) is None
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.services.food_vector_index import MmapVectorIndex, quantize, reduce_dimension, write_index
+
+
+def _vectors(n=50, dim=32, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_reduce_dimension_normalizes():
+    reduced = reduce_dimension(_vectors(), 8)
+    assert reduced.shape == (50, 8)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float16", 1e-3), ("int8", 1 / 127)])
+def test_quantize_round_trip(dtype, tolerance):
+    vectors = reduce_dimension(_vectors(), 16)
+    quantized, scales = quantize(vectors, dtype)
+    restored = quantized.astype(np.float32) * (scales[:, None] if scales is not None else 1.0)
+    assert quantized.dtype == np.dtype(dtype)
+    assert np.abs(restored - vectors).max() <= tolerance
+    if dtype == "int8":
+        assert np.abs(quantized).max(axis=1).min() == 127  # 행마다 최대 절댓값을 127로
+
+
+def test_quantize_zero_row_and_unknown_dtype():
+    quantized, scales = quantize(np.zeros((1, 4), dtype=np.float32), "int8")
+    assert not quantized.any() and scales[0] > 0
+    with pytest.raises(ValueError):
+        quantize(np.zeros((1, 4), dtype=np.float32), "int4")
+
+
+@pytest.fixture
+def index(tmp_path):
+    vectors = _vectors()
+    present = np.ones(len(vectors), dtype=bool)
+    present[3] = False
+    ids = [f"r{i}" for i in range(len(vectors))]
+    manifest = write_index(str(tmp_path / "idx"), ids, vectors, present, dim=16, dtype="int8")
+    assert manifest["missing"] == 1 and manifest["dim"] == 16
+    index = MmapVectorIndex(str(tmp_path / "idx"))
+    assert index.load()
+    index.align(list(reversed(ids)))  # 테이블 행 순서가 색인과 달라도 매핑
+    return index, vectors
+
+
+def test_search_finds_self_in_table_order(index):
+    index, vectors = index
+    hits = index.search(vectors[7], k=3)
+    assert hits[0][0] == 49 - 7 and hits[0][1] == pytest.approx(1.0, abs=0.02)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_search_requires_load_and_align(tmp_path):
+    index = MmapVectorIndex(str(tmp_path / "missing"))
+    assert index.load() is False
+    with pytest.raises(RuntimeError):
+        index.search(np.ones(16), k=1)
+
+
+def test_load_rejects_mismatched_ids(tmp_path):
+    directory = str(tmp_path / "idx")
+    write_index(directory, ["a", "b"], _vectors(2), np.ones(2, dtype=bool), dim=8, dtype="float16")
+    (tmp_path / "idx" / "ids.json").write_text('["a"]', encoding="utf-8")
+    with pytest.raises(ValueError):
+        MmapVectorIndex(directory).load()
+
+
+def test_search_many_matches_single_queries_with_masks(index):
+    index, vectors = index
+    queries = vectors[[5, 10, 20]]
+    table_mask = np.zeros(50, dtype=bool)
+    table_mask[::2] = True  # 테이블 행 기준 짝수 행만 허용
+    masks = [None, table_mask, np.zeros(50, dtype=bool)]
+    many = index.search_many(queries, k=4, masks=masks)
+    for query, mask, hits in zip(queries, masks, many):
+        single = index.search(query, k=4, mask=mask)
+        assert [row for row, _ in hits] == [row for row, _ in single]
+        assert np.allclose([s for _, s in hits], [s for _, s in single], atol=1e-5)
+    assert all(row % 2 == 0 for row, _ in many[1])
+    assert many[2] == []
+
+
+def test_search_many_skips_rows_missing_from_table(index):
+    index, vectors = index
+    index.align([f"r{i}" for i in range(10)])  # 테이블에 없는 색인 행은 결과에서 제외
+    hits = index.search_many(vectors[[20, 2]], k=5)
+    assert all(0 <= row < 10 for result in hits for row, _ in result)
+    assert hits[1][0][0] == 2
+    assert index.search_many(np.empty((0, 32)), k=3) == []
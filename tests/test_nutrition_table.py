@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.services.nutrition_table import NutritionTable, parse_conditions, to_chroma_where, unknown_conditions
+
+ROWS = [
+    ("a", {"calories": 300, "sugar": 2, "sodium": 500, "protein": 25}),
+    ("b", {"calories": 500, "sugar": 1, "sodium": 400, "protein": 30}),
+    ("c", {"calories": 350, "sugar": 9, "sodium": 900, "protein": 5}),
+    ("d", {"calories": 200, "sugar": 3, "sodium": 100, "protein": 10}),
+]
+
+
+@pytest.fixture
+def table():
+    table = NutritionTable()
+    table.build(ROWS)
+    return table
+
+
+def test_parse_conditions_combines_with_and():
+    expected = [("sugar", "<", 5), ("sodium", "<", 600)]
+    assert parse_conditions("diabetes,high_bp") == expected
+    assert parse_conditions("Diabetes AND high_bp") == expected
+    assert parse_conditions("diabetes + high_bp") == expected
+    assert parse_conditions("general") == [] and parse_conditions("") == []
+
+
+def test_unknown_conditions_are_skipped_not_raised():
+    assert parse_conditions("diabetes, keto") == [("sugar", "<", 5)]
+    assert unknown_conditions("diabetes, keto & vegan") == ["keto", "vegan"]
+    assert unknown_conditions("diet") == []
+
+
+def test_to_chroma_where():
+    assert to_chroma_where([]) is None
+    assert to_chroma_where([("sugar", "<", 5)]) == {"sugar": {"$lt": 5}}
+    assert to_chroma_where(parse_conditions("diabetes,muscle")) == {
+        "$and": [{"sugar": {"$lt": 5}}, {"protein": {"$gte": 20}}]
+    }
+
+
+def test_mask_and_select(table):
+    predicates = parse_conditions("diabetes,high_bp")
+    assert table.mask(predicates).tolist() == [True, True, False, True]
+    assert table.mask([]).all()
+    assert table.select(predicates, sort_by="protein", descending=True) == ["b", "a", "d"]
+    assert table.select(predicates, sort_by="calories", limit=2) == ["d", "a"]
+    assert table.count(parse_conditions("muscle")) == 2
+
+
+def test_missing_nutrient_defaults_to_zero(table):
+    assert table.columns["fat"].tolist() == [0.0] * 4
+
+
+def test_unknown_nutrient_raises(table):
+    with pytest.raises(ValueError):
+        table.mask([("vitamin", "<", 1)])
+    with pytest.raises(ValueError):
+        table.select([], sort_by="vitamin")
+
+
+def test_snapshot_stays_consistent_across_rebuild(table):
+    snapshot = table.snapshot()
+    table.build([("z", {"sugar": 1})])
+    mask = snapshot.mask(parse_conditions("diabetes"))
+    assert snapshot.ids[mask].tolist() == ["a", "b", "d"]  # 이전 빌드의 행 ID와 마스크 길이가 맞음
+    assert table.ids.tolist() == ["z"] and len(table) == 1
+    assert isinstance(table.snapshot().columns["sugar"], np.ndarray)
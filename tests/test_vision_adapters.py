@@ -0,0 +1,167 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("peft")
+pytest.importorskip("qwen_vl_utils")
+pytest.importorskip("torchvision")
+
+from PIL import Image
+
+from app.core import ai_model
+from app.core.ai_model import resolve_adapter, rope_deltas_guard, use_adapter
+from app.services import vision_local, vision_scoring
+
+
+class FakePeftModel:
+    """use_adapter가 보는 부분만 흉내 (peft_config 2개 이상 -> 전환 + 잠금)"""
+
+    def __init__(self, names):
+        self.peft_config = {name: object() for name in names}
+        self.active_adapter = names[0]
+        self.switches = []
+
+    def set_adapter(self, name):
+        self.switches.append(name)
+        self.active_adapter = name
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(ai_model, "PeftModel", FakePeftModel)
+    monkeypatch.setattr(ai_model, "_adapters", {"v1": "hash1", "v2": "hash2"})
+    monkeypatch.setattr(ai_model, "_adapter_split", {})
+    return FakePeftModel(["v1", "v2"])
+
+
+def _run_in_thread(fn, timeout=5):
+    result, errors = [], []
+
+    def target():
+        try:
+            result.append(fn())
+        except Exception as e:  # pragma: no cover - 실패 시 메시지 확인용
+            errors.append(e)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "교착: use_adapter 안에서 rope_deltas_guard를 잡지 못함"
+    if errors:
+        raise errors[0]
+    return result[0]
+
+
+def test_classify_under_adapter_does_not_deadlock(model, monkeypatch):
+    def fake_score_labels(model, processor, device, image, labels):
+        with rope_deltas_guard(model):  # 실제 score_labels와 같은 잠금 순서
+            return [(label, 1.0 / len(labels)) for label in labels]
+
+    monkeypatch.setattr(vision_scoring, "score_labels", fake_score_labels)
+    image = Image.new("RGB", (32, 32))
+    result = _run_in_thread(
+        lambda: vision_local._classify_with_adapter(model, None, "cpu", image, ["김치찌개", "비빔밥"], "v2")
+    )
+    assert result.best_candidate == "김치찌개"
+    assert model.active_adapter == "v2"
+
+
+def test_generate_under_adapter_does_not_deadlock(model, monkeypatch):
+    seen = []
+
+    def fake_generate_locked(model, processor, device, inputs, adapter):
+        seen.append((adapter, model.active_adapter))
+        return "ids", 3
+
+    monkeypatch.setattr(vision_local, "_generate_locked", fake_generate_locked)
+
+    def run():
+        with use_adapter(model, "v2"):
+            return vision_local._generate(model, None, "cpu", {}, "v2")
+
+    assert _run_in_thread(run) == ("ids", 3)
+    assert seen == [("v2", "v2")]
+
+
+def test_classify_and_generate_interleave_across_threads(model, monkeypatch):
+    monkeypatch.setattr(vision_local, "_generate_locked", lambda *args: ("ids", 1))
+    monkeypatch.setattr(vision_scoring, "score_labels", lambda m, p, d, i, labels: [(labels[0], 1.0)])
+    image = Image.new("RGB", (32, 32))
+
+    def work(i):
+        adapter = ("v1", "v2")[i % 2]
+        if i % 3:
+            with use_adapter(model, adapter):
+                vision_local._generate(model, None, "cpu", {}, adapter)
+        else:
+            vision_local._classify_with_adapter(model, None, "cpu", image, ["김치"], adapter)
+
+    def run():
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return True
+
+    assert _run_in_thread(run)
+
+
+def test_use_adapter_switches_only_when_needed(model):
+    with use_adapter(model, "v1"):
+        pass
+    with use_adapter(model, "v2"):
+        assert model.active_adapter == "v2"
+    assert model.switches == ["v2"]
+
+
+def test_single_adapter_model_is_not_locked(monkeypatch):
+    monkeypatch.setattr(ai_model, "PeftModel", FakePeftModel)
+    model = FakePeftModel(["only"])
+    with ai_model._adapter_lock:  # 어댑터가 하나면 잠금/전환 없이 통과
+        with use_adapter(model, "only"):
+            pass
+    assert model.switches == []
+
+
+def test_resolve_adapter(model, monkeypatch):
+    assert resolve_adapter() == "v1"
+    assert resolve_adapter("v2") == "v2"
+    with pytest.raises(ValueError):
+        resolve_adapter("v9")
+    monkeypatch.setattr(ai_model, "_adapter_split", {"v2": 1.0})
+    assert {resolve_adapter() for _ in range(5)} == {"v2"}
+
+
+def test_adapter_specs_and_pairs(monkeypatch):
+    assert ai_model._parse_pairs("a=1, b=2,bad,=3,c=") == {"a": "1", "b": "2"}
+    monkeypatch.setattr(ai_model, "VISION_ADAPTERS", "v1=/abs/v1,v2=rel/v2")
+    specs = ai_model.adapter_specs()
+    assert specs["v1"] == "/abs/v1" and specs["v2"].endswith("rel/v2") and list(specs) == ["v1", "v2"]
+
+
+def _write_checkpoint(tmp_path, adapter_sha256):
+    merged = tmp_path / "merged"
+    merged.mkdir()
+    (merged / ai_model.MERGE_MANIFEST).write_text(json.dumps({"adapter_sha256": adapter_sha256}), encoding="utf-8")
+    return str(merged)
+
+
+def test_merged_checkpoint_requires_matching_adapter_hash(tmp_path):
+    adapter = tmp_path / "adapter"
+    adapter.mkdir()
+    (adapter / ai_model.ADAPTER_HASH_FILES[0]).write_text('{"r": 8}', encoding="utf-8")
+    merged = _write_checkpoint(tmp_path, ai_model.adapter_fingerprint(str(adapter)))
+    assert ai_model._merged_checkpoint_is_valid(merged, str(adapter))
+
+    (adapter / ai_model.ADAPTER_HASH_FILES[0]).write_text('{"r": 16}', encoding="utf-8")  # 어댑터 재학습
+    assert not ai_model._merged_checkpoint_is_valid(merged, str(adapter))
+    assert not ai_model._merged_checkpoint_is_valid(str(tmp_path / "missing"), str(adapter))
+
+
+def test_merged_checkpoint_without_adapter_is_used_with_warning(tmp_path, capsys):
+    merged = _write_checkpoint(tmp_path, "abc123")
+    assert ai_model._merged_checkpoint_is_valid(merged, str(tmp_path / "no-adapter"))
+    assert "검증 없이" in capsys.readouterr().out
@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("PIL")
+
+from fastapi import HTTPException
+
+from app.core.inference_executor import InferenceQueueFullError
+from app.routers import vision
+from app.services.vision_scheduler import VisionTimeoutError
+
+FILES = [SimpleNamespace(filename=f"{i}.jpg") for i in range(3)]
+
+
+class _FakeResults:
+    """analyze_food_images 대역: 첫 결과에서 first_error를 던지거나, 결과를 차례로 내보냄 (aclose 호출을 기록)"""
+
+    def __init__(self, payloads, first_error=None):
+        self.pending = list(payloads)
+        self.first_error = first_error
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        if self.first_error is not None:
+            raise self.first_error
+        if not self.pending:
+            raise StopAsyncIteration
+        index = self.pending.pop(0)
+        return index, SimpleNamespace(model_dump=lambda: {"food_name": f"food-{index}"})
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _fake_batch(monkeypatch, first_error=None):
+    created = []
+
+    async def read_batch_uploads(files):
+        return list(range(len(files)))
+
+    def analyze_food_images(payloads, **kwargs):
+        created.append(_FakeResults(payloads, first_error))
+        return created[-1]
+
+    monkeypatch.setattr(vision, "read_batch_uploads", read_batch_uploads)
+    monkeypatch.setattr(vision, "analyze_food_images", analyze_food_images)
+    return created
+
+
+def _call():
+    return vision.analyze_food_batch(files=FILES, mode="generate", labels=None, adapter=None, x_vision_adapter=None)
+
+
+@pytest.mark.parametrize("error,status", [(VisionTimeoutError("timeout"), 504),
+                                          (InferenceQueueFullError(retry_after=1), 429)])
+def test_first_result_error_closes_the_generator(monkeypatch, error, status):
+    created = _fake_batch(monkeypatch, first_error=error)
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(_call())
+    assert info.value.status_code == status
+    assert created[0].closed
+
+
+def test_disconnect_mid_stream_closes_the_generator(monkeypatch):
+    created = _fake_batch(monkeypatch)
+
+    async def run():
+        response = await _call()
+        stream = response.body_iterator
+        line = await stream.__anext__()
+        await stream.aclose()  # 클라이언트가 첫 줄만 받고 끊음
+        return line
+
+    assert '"food-0"' in asyncio.run(run())
+    assert created[0].closed and created[0].pending
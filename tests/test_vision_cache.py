@@ -0,0 +1,101 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("pydantic")
+
+from app.schemas.dtos import FoodAnalysisResponse
+from app.services import vision_cache as vision_cache_module
+from app.services.vision_cache import VisionResultCache
+
+
+def _image(shade: int) -> "Image.Image":
+    image = Image.new("RGB", (64, 64), (shade, shade, shade))
+    for x in range(32):
+        for y in range(64):
+            image.putpixel((x, y), (255 - shade, 0, 0))
+    return image
+
+
+def _result(name: str) -> FoodAnalysisResponse:
+    return FoodAnalysisResponse(best_candidate=name, candidates=[name])
+
+
+def _store(cache, image, name, variant=""):
+    key, cached = cache.lookup(image, variant)
+    assert cached is None
+    cache.store(key, _result(name))
+
+
+def test_exact_hit_and_lru_eviction():
+    cache = VisionResultCache(max_entries=2, ttl=60, cache_dir="", phash_distance=-1, enabled=True)
+    first, second, third = _image(10), _image(20), _image(30)
+    _store(cache, first, "a")
+    _store(cache, second, "b")
+    assert cache.lookup(first)[1].best_candidate == "a"  # first가 최근 사용 -> second가 밀려남
+    _store(cache, third, "c")
+
+    assert cache.lookup(second)[1] is None
+    assert cache.lookup(first)[1].best_candidate == "a"
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(vision_cache_module.time, "time", lambda: now[0])
+    cache = VisionResultCache(max_entries=8, ttl=10, cache_dir="", phash_distance=-1, enabled=True)
+    image = _image(10)
+    _store(cache, image, "a")
+    now[0] += 5
+    assert cache.lookup(image)[1] is not None
+    now[0] += 10
+    assert cache.lookup(image)[1] is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    options = dict(max_entries=8, ttl=60, cache_dir=str(tmp_path), phash_distance=-1, enabled=True)
+    image = _image(10)
+    _store(VisionResultCache(**options), image, "a", variant="v1")
+
+    cache = VisionResultCache(**options)
+    assert cache.lookup(image, "v1")[1].best_candidate == "a"
+    assert cache.lookup(image, "v2")[1] is None
+    assert cache.stats["disk_hits"] == 1
+
+
+def test_near_duplicate_hit_within_variant():
+    cache = VisionResultCache(max_entries=8, ttl=60, cache_dir="", phash_distance=4, enabled=True)
+    _store(cache, _image(10), "a", variant="generate")
+    near = _image(12)  # 밝기만 조금 다른 같은 구도 -> dHash 동일, SHA는 다름
+    assert cache.lookup(near, "generate")[1].best_candidate == "a"
+    assert cache.stats["near_hits"] == 1
+
+
+def test_near_duplicate_does_not_cross_variants():
+    cache = VisionResultCache(max_entries=8, ttl=60, cache_dir="", phash_distance=4, enabled=True)
+    image = _image(10)
+    _store(cache, image, "free text", variant="generate|adapter-a")
+
+    # 같은 이미지라도 variant(모드/라벨/어댑터)가 다르면 둘 다 miss
+    assert cache.lookup(image, "classify|labels")[1] is None
+    assert cache.lookup(image, "generate|adapter-b")[1] is None
+    assert cache.stats["near_hits"] == 0
+    assert cache.stats["misses"] == 3  # 최초 저장 전 lookup 포함
+
+
+def test_disabled_cache_never_stores():
+    cache = VisionResultCache(max_entries=8, ttl=60, cache_dir="", phash_distance=-1, enabled=False)
+    key, cached = cache.lookup(_image(10))
+    cache.store(key, _result("a"))
+    assert cached is None and cache.lookup(_image(10))[1] is None
+
+
+def test_perceptual_hash_compares_adjacent_pixels():
+    image = Image.new("L", (9, 8))
+    image.putdata([(col * 37 + row * 11) % 256 for row in range(8) for col in range(9)])
+    pixels = [[(col * 37 + row * 11) % 256 for col in range(9)] for row in range(8)]
+    expected = 0
+    for row in range(8):
+        for col in range(8):
+            expected = (expected << 1) | (pixels[row][col] > pixels[row][col + 1])
+    assert vision_cache_module.perceptual_hash(image) == expected
+    assert vision_cache_module.perceptual_hash(image.convert("RGB")) == expected
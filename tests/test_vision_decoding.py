@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.vision_decoding import (
+    MAX_NAME_BYTES, FoodJsonLogitsProcessor, NameTrie, TokenVocabulary, _build_template, _is_name_safe,
+)
+
+MULTI_BYTE_TOKENS = [b'{"best_candidate": "', b'", "', b'"]}', b'", "candidates": ["', "김치".encode(), "찌개".encode(),
+                     "비빔밥".encode(), b'"]']
+
+
+def make_vocab():
+    """단일 바이트 256개 + 몇 개의 다중 바이트 토큰 + 마지막 id는 EOS(바이트 없음)"""
+    vocab = TokenVocabulary.__new__(TokenVocabulary)
+    vocab._index_tokens([bytes([b]) for b in range(256)] + MULTI_BYTE_TOKENS + [None])
+    return vocab
+
+
+VOCAB = make_vocab()
+EOS = len(VOCAB.token_bytes) - 1
+PROMPT = [1, 2, 3]
+
+
+def decode(processor, steps=80, seed=0, prefer=None):
+    """무작위 점수(선호 토큰에 가산점)로 탐욕 디코딩 -> 생성 바이트열"""
+    generator = torch.Generator().manual_seed(seed)
+    ids = list(PROMPT)
+    for _ in range(steps):
+        scores = torch.rand((1, len(VOCAB.token_bytes)), generator=generator)
+        for token_id in prefer or ():
+            scores[0, token_id] += 0.5
+        scores = processor(torch.tensor([ids]), scores)
+        next_id = int(scores.argmax())
+        ids.append(next_id)
+        if next_id == EOS:
+            break
+    assert ids[-1] == EOS, "템플릿 완료 후 EOS로 끝나야 함"
+    return b"".join(VOCAB.token_bytes[i] for i in ids[len(PROMPT):-1])
+
+
+def test_name_trie_walk_and_continuations():
+    trie = NameTrie(["김치", "김치찌개", 'bad"name', ""])
+    assert trie.size == 2
+    assert trie.walk("김치".encode()) is not None and trie.walk("된장".encode()) is None
+    conts = set(trie.continuations(trie.walk("김치".encode()), b'", "', 6))
+    assert "찌개".encode() in conts  # 더 긴 이름으로 계속
+    assert b'"' in conts and b'", ' in conts  # 이름이 끝나는 지점에서는 닫는 리터럴
+    assert all(len(c) <= 6 for c in conts)
+
+
+def test_processor_forces_literals_then_eos():
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS])
+    first = processor(torch.tensor([PROMPT]), torch.zeros((1, len(VOCAB.token_bytes))))
+    allowed = {VOCAB.token_bytes[i] for i in torch.nonzero(first[0] == 0).flatten().tolist()}
+    assert allowed == {b"{", b'{"best_candidate": "'}
+    done = VOCAB.bytes_to_ids[b'{"best_candidate": "'] + [ord("a")] + VOCAB.bytes_to_ids[b'", "candidates": ["']
+    for _ in range(2):
+        done += [ord("a")] + VOCAB.bytes_to_ids[b'", "']
+    done += [ord("a")] + VOCAB.bytes_to_ids[b'"]}']
+    last = processor(torch.tensor([PROMPT + done]), torch.zeros((1, len(VOCAB.token_bytes))))
+    assert torch.nonzero(last[0] == 0).flatten().tolist() == [EOS]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_json_mode_always_produces_parsable_output(seed):
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS], template=_build_template(2))
+    # 실제 토크나이저처럼 완성된 글자 위주로 (ASCII + 한글 토큰)
+    prefer = list(range(0x20, 0x7F)) + VOCAB.bytes_to_ids["김치".encode()] + VOCAB.bytes_to_ids["비빔밥".encode()]
+    data = decode(processor, steps=400, seed=seed, prefer=prefer)
+    parsed = json.loads(data.decode("utf-8"))
+    assert set(parsed) == {"best_candidate", "candidates"} and len(parsed["candidates"]) == 2
+
+
+def test_name_is_closed_at_max_length_even_if_utf8_is_incomplete():
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS], template=_build_template(1))
+    data = decode(processor, steps=200, seed=0)  # 무작위 바이트 -> 깨진 UTF-8이 대부분
+    best = data.split(b'{"best_candidate": "', 1)[1].split(b'"', 1)[0]
+    assert len(best) <= MAX_NAME_BYTES
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_korean_name_crossing_the_cap_ends_on_a_character_boundary(seed):
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS], template=_build_template(1))
+    # 9바이트 "비빔밥"과 한글 바이트(선행/이어지는 바이트)를 강하게 선호 -> 상한 근처에서 글자가 잘리기 쉬움
+    korean = VOCAB.bytes_to_ids["비빔밥".encode()] * 3 + list(range(0x80, 0xF0))
+    data = decode(processor, steps=200, seed=seed, prefer=korean)
+    best = data.split(b'{"best_candidate": "', 1)[1].split(b'"', 1)[0]
+    assert len(best) <= MAX_NAME_BYTES
+    best.decode("utf-8")  # 잘린 글자(U+FFFD)가 없어야 함
+    json.loads(data.decode("utf-8"))
+
+
+def test_near_cap_only_tokens_that_fit_are_allowed():
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS], template=_build_template(1))
+    head = VOCAB.bytes_to_ids[b'{"best_candidate": "']
+    name = "비빔밥".encode() * 6  # 54바이트, 남은 6바이트에 "비빔밥"(9바이트)은 들어가지 않음
+    ids = head + [VOCAB.bytes_to_ids["비빔밥".encode()][0]] * 6
+    scores = processor(torch.tensor([PROMPT + ids]), torch.zeros((1, len(VOCAB.token_bytes))))
+    allowed = [VOCAB.token_bytes[i] for i in torch.nonzero(scores[0] == 0).flatten().tolist()]
+    assert "비빔밥".encode() not in allowed and "김치".encode() in allowed
+    assert all(len(name) + len(t) <= MAX_NAME_BYTES or t.startswith(b'"') for t in allowed)
+    # 글자 중간(선행 바이트만 있음)에서는 그 글자를 완성하는 이어지는 바이트만
+    ids_mid = ids + [0xEB]
+    scores = processor(torch.tensor([PROMPT + ids_mid]), torch.zeros((1, len(VOCAB.token_bytes))))
+    allowed = [VOCAB.token_bytes[i] for i in torch.nonzero(scores[0] == 0).flatten().tolist()]
+    assert allowed and all(0x80 <= t[0] < 0xC0 for t in allowed)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_trie_mode_only_emits_dictionary_names(seed):
+    names = ["김치", "김치찌개", "비빔밥"]
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS], trie=NameTrie(names))
+    parsed = json.loads(decode(processor, steps=120, seed=seed).decode("utf-8"))
+    assert parsed["best_candidate"] in names
+    assert len(parsed["candidates"]) == 3 and set(parsed["candidates"]) <= set(names)
+
+
+def test_special_token_in_output_ends_generation():
+    processor = FoodJsonLogitsProcessor(VOCAB, len(PROMPT), [EOS])
+    scores = processor(torch.tensor([PROMPT + [EOS]]), torch.zeros((1, len(VOCAB.token_bytes))))
+    assert torch.nonzero(scores[0] == 0).flatten().tolist() == [EOS]
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.vision_preprocess import IMAGE_FACTOR, MIN_PIXELS, smart_resize, target_size
+
+HEAVY_MODULES = ("torch", "transformers", "peft", "qwen_vl_utils", "app.core.ai_model", "app.services.vision_local")
+
+
+def test_remote_backend_router_does_not_import_model_modules():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("PIL")
+    code = (
+        "import json, sys; import app.routers.vision; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    env = {**os.environ, "VISION_BACKEND": "remote"}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
+
+
+@pytest.mark.parametrize("height,width", [(1, 1), (480, 640), (3000, 4000), (100, 5000), (28, 28), (1023, 77)])
+def test_smart_resize_respects_factor_and_budget(height, width):
+    max_pixels = 1024 * 1024
+    h, w = smart_resize(height, width, max_pixels=max_pixels)
+    assert h % IMAGE_FACTOR == 0 and w % IMAGE_FACTOR == 0
+    assert MIN_PIXELS <= h * w <= max_pixels
+
+
+def test_smart_resize_matches_qwen_vl_utils():
+    vision_process = pytest.importorskip("qwen_vl_utils.vision_process")
+    for height, width in [(480, 640), (3000, 4000), (100, 5000), (33, 47)]:
+        assert smart_resize(height, width, max_pixels=1024 * 1024) == vision_process.smart_resize(
+            height, width, factor=IMAGE_FACTOR, min_pixels=MIN_PIXELS, max_pixels=1024 * 1024
+        )
+
+
+def test_smart_resize_rejects_extreme_aspect_ratio():
+    with pytest.raises(ValueError):
+        smart_resize(10, 5000)
+
+
+def test_target_size_caps_long_side():
+    width, height = target_size(4000, 3000)
+    assert max(width, height) <= 1024 + IMAGE_FACTOR
+    assert width % IMAGE_FACTOR == 0 and height % IMAGE_FACTOR == 0
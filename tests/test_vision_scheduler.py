@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.core.inference_executor import InferenceQueueFullError
+from app.services.vision_scheduler import VisionBatchScheduler, VisionTimeoutError
+
+
+def _recording_runner(batches, delay=0.0):
+    async def runner(payloads, group):
+        batches.append((group, list(payloads)))
+        await asyncio.sleep(delay)
+        return [f"{group}:{p}" for p in payloads]
+    return runner
+
+
+def test_groups_are_batched_separately():
+    batches = []
+
+    async def main():
+        scheduler = VisionBatchScheduler(_recording_runner(batches), max_batch_size=8, batch_window_ms=20,
+                                         request_timeout=5, concurrency=1, max_pending=32)
+        results = await asyncio.gather(
+            scheduler.submit(1, group="a"), scheduler.submit(2, group="b"),
+            scheduler.submit(3, group="a"), scheduler.submit(4, group="a"),
+        )
+        await scheduler.aclose()
+        return results
+
+    results = asyncio.run(main())
+    assert results == ["a:1", "b:2", "a:3", "a:4"]
+    assert batches == [("a", [1, 3, 4]), ("b", [2])]
+
+
+def test_max_batch_size_splits_batches():
+    batches = []
+
+    async def main():
+        scheduler = VisionBatchScheduler(_recording_runner(batches), max_batch_size=2, batch_window_ms=20,
+                                         request_timeout=5, concurrency=1, max_pending=32)
+        await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+        await scheduler.aclose()
+        return scheduler.metrics.snapshot()
+
+    metrics = asyncio.run(main())
+    assert [payloads for _, payloads in batches] == [[0, 1], [2, 3], [4]]
+    assert metrics["batch_size_histogram"] == {1: 1, 2: 2}
+
+
+def test_rejects_when_pending_exceeds_max_pending():
+    async def main():
+        scheduler = VisionBatchScheduler(_recording_runner([], delay=0.2), max_batch_size=1, batch_window_ms=0,
+                                         request_timeout=5, concurrency=1, max_pending=2)
+        accepted = [asyncio.create_task(scheduler.submit(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFullError) as excinfo:
+            await scheduler.submit(99)
+        assert excinfo.value.retry_after >= 1
+        await asyncio.gather(*accepted)
+        await scheduler.aclose()
+        return scheduler.metrics.rejected
+
+    assert asyncio.run(main()) == 1
+
+
+def test_request_timeout():
+    async def main():
+        scheduler = VisionBatchScheduler(_recording_runner([], delay=1.0), max_batch_size=1, batch_window_ms=0,
+                                         request_timeout=0.05, concurrency=1, max_pending=4)
+        with pytest.raises(VisionTimeoutError):
+            await scheduler.submit(1)
+        await scheduler.aclose()
+        return scheduler.metrics.timeouts, scheduler.pending
+
+    assert asyncio.run(main()) == (1, 0)
+
+
+def test_runner_error_reaches_every_request():
+    async def runner(payloads, group):
+        raise RuntimeError("model failed")
+
+    async def main():
+        scheduler = VisionBatchScheduler(runner, max_batch_size=4, batch_window_ms=20, request_timeout=5,
+                                         concurrency=1, max_pending=8)
+        results = await asyncio.gather(*(scheduler.submit(i) for i in range(3)), return_exceptions=True)
+        await scheduler.aclose()
+        return results, scheduler.metrics.failures
+
+    results, failures = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert failures == 3
+
+
+def test_batch_tasks_are_tracked_and_cancelled_on_close():
+    started = []
+
+    async def runner(payloads, group):
+        started.append(payloads)
+        await asyncio.sleep(10)
+        return payloads
+
+    async def main():
+        scheduler = VisionBatchScheduler(runner, max_batch_size=1, batch_window_ms=0, request_timeout=5,
+                                         concurrency=2, max_pending=8)
+        requests = [asyncio.create_task(scheduler.submit(i)) for i in range(3)]
+        while len(started) < 2:
+            await asyncio.sleep(0.01)
+        assert len(scheduler._tasks) == 2
+        await scheduler.aclose()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        return scheduler, results
+
+    scheduler, results = asyncio.run(main())
+    assert not scheduler._tasks
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)